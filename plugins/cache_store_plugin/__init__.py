@@ -0,0 +1 @@
+ALL_PLUGIN_CACHE_STORES = {}
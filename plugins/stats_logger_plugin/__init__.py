@@ -0,0 +1 @@
+ALL_PLUGIN_STATS_LOGGERS = []
@@ -2,6 +2,7 @@ from flask_login import current_user
 from typing import List
 
 from app.db import with_session
+from app.auth.permission_resolver import get_permission_resolver
 from app.datasource import abort_request, api_assert
 from const.datasources import (
     ACCESS_RESTRICTED_STATUS_CODE,
@@ -11,12 +12,15 @@ from const.datasources import (
 from models.admin import QueryEngine, QueryMetastore, QueryEngineEnvironment
 from models.query_execution import QueryExecution, StatementExecution
 from models.metastore import DataSchema, DataTable, DataTableColumn
-from models.datadoc import DataDoc, DataCell, DataDocDataCell
 from logic.query_execution_permission import (
     user_can_access_query_execution,
     get_user_environments_by_execution_id,
 )
 from logic import query_execution as query_execution_logic
+from logic.admin import (
+    get_query_engine_environment_ids,
+    get_query_metastore_environment_ids,
+)
 
 
 def abort_404():
@@ -53,13 +57,9 @@ def verify_query_engine_environment_permission(
 
 @with_session
 def verify_query_engine_permission(query_engine_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .filter(QueryEngine.id == query_engine_id)
-    ]
-    verify_environment_permission(environment_ids)
+    verify_environment_permission(
+        get_query_engine_environment_ids(query_engine_id, session=session)
+    )
 
 
 @with_session
@@ -86,14 +86,9 @@ def verify_statement_execution_permission(statement_execution_id, session=None):
 
 @with_session
 def verify_metastore_permission(metastore_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryMetastore)
-        .filter(QueryMetastore.id == metastore_id)
-    ]
-    verify_environment_permission(environment_ids)
+    verify_environment_permission(
+        get_query_metastore_environment_ids(metastore_id, session=session)
+    )
 
 
 @with_session
@@ -116,17 +111,20 @@ def verify_data_table_permission(table_id, session=None):
     verify_environment_permission(environment_ids)
 
 
+@with_session
+def verify_data_tables_permission(table_ids: List[int], session=None):
+    environment_ids_by_table_id = get_permission_resolver().get_data_table_environment_ids(
+        table_ids, session=session
+    )
+    for environment_ids in environment_ids_by_table_id.values():
+        verify_environment_permission(environment_ids)
+
+
 @with_session
 def get_data_table_environment_ids(table_id, session=None):
-    return [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryMetastore)
-        .join(DataSchema)
-        .join(DataTable)
-        .filter(DataTable.id == table_id)
-    ]
+    return get_permission_resolver().get_data_table_environment_ids(
+        [table_id], session=session
+    )[table_id]
 
 
 @with_session
@@ -153,33 +151,27 @@ def verify_data_doc_permission(data_doc_id, session=None):
 @with_session
 def get_data_doc_environment_ids(data_doc_id, session=None):
     return [
-        eid
-        for eid, in session.query(DataDoc.environment_id).filter(
-            DataDoc.id == data_doc_id
-        )
+        doc.environment_id
+        for doc in get_permission_resolver()
+        .get_data_docs([data_doc_id], session=session)
+        .values()
     ]
 
 
 @with_session
 def verify_data_cell_permission(cell_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(DataDoc.environment_id)
-        .join(DataDocDataCell)
-        .join(DataCell)
-        .filter(DataCell.id == cell_id)
-    ]
-    verify_environment_permission(environment_ids)
+    verify_data_cells_permission([cell_id], session=session)
 
 
 @with_session
 def verify_data_cells_permission(cell_ids: List, session=None):
+    permission_resolver = get_permission_resolver()
+    doc_ids = permission_resolver.get_data_cell_data_doc_ids(
+        cell_ids, session=session
+    ).values()
     environment_ids = [
-        eid
-        for eid, in session.query(DataDoc.environment_id)
-        .join(DataDocDataCell)
-        .join(DataCell)
-        .filter(DataCell.id.in_(cell_ids))
+        doc.environment_id
+        for doc in permission_resolver.get_data_docs(doc_ids, session=session).values()
     ]
     verify_environment_permission(environment_ids)
 
@@ -0,0 +1,203 @@
+"""Resolves the facts permission checks depend on
+
+Facts are loaded for many items in one query and memoized for the rest of
+the request, so checks of the same data doc, cell or table in one request
+only query once.
+"""
+from collections import namedtuple
+from typing import Dict, List
+
+import flask
+from sqlalchemy import and_
+
+from lib.logger import get_logger
+from lib.stats_logger import stats_logger
+from models.admin import QueryEngine, QueryEngineEnvironment, QueryMetastore
+from models.datadoc import DataDoc, DataDocDataCell, DataDocEditor
+from models.metastore import DataSchema, DataTable
+
+LOG = get_logger(__file__)
+
+DataDocFacts = namedtuple("DataDocFacts", ["environment_id", "public", "owner_uid"])
+# read and write of a DataDocEditor, None if the user is not an editor
+EditorFacts = namedtuple("EditorFacts", ["read", "write"])
+
+
+class PermissionResolver:
+    def __init__(self):
+        # Number of queries made to resolve permissions
+        self.num_queries = 0
+
+        # Values are None for items that do not exist
+        self._data_doc_by_id = {}
+        self._editor_by_data_doc_id_and_uid = {}
+        self._data_doc_id_by_data_cell_id = {}
+        self._environment_ids_by_data_table_id = {}
+
+    def get_data_docs(
+        self, data_doc_ids: List[int], session
+    ) -> Dict[int, DataDocFacts]:
+        """Facts of the data docs that exist, by id"""
+        missing_ids = self._get_missing(self._data_doc_by_id, data_doc_ids)
+        if missing_ids:
+            self._count_query()
+            for doc_id, environment_id, public, owner_uid in session.query(
+                DataDoc.id, DataDoc.environment_id, DataDoc.public, DataDoc.owner_uid
+            ).filter(DataDoc.id.in_(missing_ids)):
+                self._data_doc_by_id[doc_id] = DataDocFacts(
+                    environment_id, public, owner_uid
+                )
+            self._set_missing(self._data_doc_by_id, missing_ids)
+
+        return self._get_existing(self._data_doc_by_id, data_doc_ids)
+
+    def get_data_doc_editors(
+        self, data_doc_ids: List[int], uid: int, session
+    ) -> Dict[int, EditorFacts]:
+        """Editor facts of uid for the data docs that exist, by data doc id.
+           The facts are None if uid is not an editor of the data doc.
+        """
+        missing_ids = [
+            doc_id
+            for doc_id in data_doc_ids
+            if (doc_id, uid) not in self._editor_by_data_doc_id_and_uid
+        ]
+        if missing_ids:
+            self._count_query()
+            # The data docs are loaded in the same query
+            for (
+                doc_id,
+                environment_id,
+                public,
+                owner_uid,
+                editor_id,
+                read,
+                write,
+            ) in (
+                session.query(
+                    DataDoc.id,
+                    DataDoc.environment_id,
+                    DataDoc.public,
+                    DataDoc.owner_uid,
+                    DataDocEditor.id,
+                    DataDocEditor.read,
+                    DataDocEditor.write,
+                )
+                .outerjoin(
+                    DataDocEditor,
+                    and_(
+                        DataDoc.id == DataDocEditor.data_doc_id,
+                        DataDocEditor.uid == uid,
+                    ),
+                )
+                .filter(DataDoc.id.in_(missing_ids))
+            ):
+                self._data_doc_by_id[doc_id] = DataDocFacts(
+                    environment_id, public, owner_uid
+                )
+                self._editor_by_data_doc_id_and_uid[(doc_id, uid)] = (
+                    None if editor_id is None else EditorFacts(read, write)
+                )
+            self._set_missing(self._data_doc_by_id, missing_ids)
+            for doc_id in missing_ids:
+                self._editor_by_data_doc_id_and_uid.setdefault((doc_id, uid), None)
+
+        return {
+            doc_id: self._editor_by_data_doc_id_and_uid[(doc_id, uid)]
+            for doc_id in data_doc_ids
+            if self._data_doc_by_id[doc_id] is not None
+        }
+
+    def get_data_cell_data_doc_ids(
+        self, data_cell_ids: List[int], session
+    ) -> Dict[int, int]:
+        """Data doc id of the data cells that are in a data doc, by cell id"""
+        missing_ids = self._get_missing(
+            self._data_doc_id_by_data_cell_id, data_cell_ids
+        )
+        if missing_ids:
+            self._count_query()
+            # The data docs are loaded in the same query
+            for (cell_id, doc_id, environment_id, public, owner_uid,) in (
+                session.query(
+                    DataDocDataCell.data_cell_id,
+                    DataDoc.id,
+                    DataDoc.environment_id,
+                    DataDoc.public,
+                    DataDoc.owner_uid,
+                )
+                .join(DataDoc)
+                .filter(DataDocDataCell.data_cell_id.in_(missing_ids))
+            ):
+                self._data_doc_id_by_data_cell_id[cell_id] = doc_id
+                self._data_doc_by_id[doc_id] = DataDocFacts(
+                    environment_id, public, owner_uid
+                )
+            self._set_missing(self._data_doc_id_by_data_cell_id, missing_ids)
+
+        return self._get_existing(self._data_doc_id_by_data_cell_id, data_cell_ids)
+
+    def get_data_table_environment_ids(
+        self, data_table_ids: List[int], session
+    ) -> Dict[int, List[int]]:
+        """Ids of the environments each data table is accessible from"""
+        missing_ids = self._get_missing(
+            self._environment_ids_by_data_table_id, data_table_ids
+        )
+        if missing_ids:
+            self._count_query()
+            for table_id in missing_ids:
+                self._environment_ids_by_data_table_id[table_id] = []
+            for table_id, environment_id in (
+                session.query(DataTable.id, QueryEngineEnvironment.environment_id)
+                .join(DataSchema)
+                .join(QueryMetastore)
+                .join(QueryEngine)
+                .join(QueryEngineEnvironment)
+                .filter(DataTable.id.in_(missing_ids))
+            ):
+                self._environment_ids_by_data_table_id[table_id].append(environment_id)
+
+        return {
+            table_id: self._environment_ids_by_data_table_id[table_id]
+            for table_id in data_table_ids
+        }
+
+    def log_num_queries(self, endpoint: str):
+        if self.num_queries:
+            stats_logger.incr(
+                "permission.queries", self.num_queries, tags={"endpoint": endpoint}
+            )
+            LOG.debug("{} permission queries for {}".format(self.num_queries, endpoint))
+
+    def _count_query(self):
+        self.num_queries += 1
+
+    @staticmethod
+    def _get_missing(facts_by_id, ids):
+        return list(set(item_id for item_id in ids if item_id not in facts_by_id))
+
+    @staticmethod
+    def _set_missing(facts_by_id, ids):
+        for item_id in ids:
+            facts_by_id.setdefault(item_id, None)
+
+    @staticmethod
+    def _get_existing(facts_by_id, ids):
+        return {
+            item_id: facts_by_id[item_id]
+            for item_id in ids
+            if facts_by_id[item_id] is not None
+        }
+
+
+def get_permission_resolver() -> PermissionResolver:
+    """The permission resolver of the request, outside of requests
+       a new resolver is returned so nothing is memoized
+    """
+    if not flask.has_request_context():
+        return PermissionResolver()
+
+    if "permission_resolver" not in flask.g:
+        flask.g.permission_resolver = PermissionResolver()
+    return flask.g.permission_resolver
@@ -5,8 +5,6 @@ from flask import abort, session as flask_session
 from app.db import with_session
 from const.datasources import ACCESS_RESTRICTED_STATUS_CODE, UNAUTHORIZED_STATUS_CODE
 from const.user_roles import UserRoleType
-
-# from lib.utils.decorators import in_mem_memoized
 from models.user import User
 from app.db import DBSession, get_session
 from logic.admin import get_api_access_token
@@ -21,6 +19,7 @@ class AuthenticationError(Exception):
 class AuthUser(UserMixin):
     def __init__(self, user: User):
         self._user_dict = user.to_dict(with_roles=True)
+        self._environment_ids = None
 
     @property
     def id(self):
@@ -34,9 +33,13 @@ class AuthUser(UserMixin):
         return UserRoleType.ADMIN.value in self._user_dict["roles"]
 
     @property
-    # @in_mem_memoized(300)
     def environment_ids(self):
-        return get_all_accessible_environment_ids_by_uid(self.id, session=get_session())
+        # The user is loaded for each request, so this is memoized per request
+        if self._environment_ids is None:
+            self._environment_ids = get_all_accessible_environment_ids_by_uid(
+                self.id, session=get_session()
+            )
+        return self._environment_ids
 
 
 class QuerybookLoginManager(LoginManager):
@@ -14,7 +14,7 @@ from app.flask_app import flask_app, limiter
 from app.db import get_session
 from const.datasources import DS_PATH
 from lib.logger import get_logger
-from logic.impression import create_impression
+from logic.impression import record_impression
 
 LOG = get_logger(__file__)
 _host = socket.gethostname()
@@ -60,6 +60,10 @@ def register(url, methods=None, require_auth=True, custom_response=False):
                 kwargs.update(params)
                 results = fn(**kwargs)
 
+                # e.g 304 Not Modified, returned as is
+                if isinstance(results, flask.Response):
+                    return results
+
                 if not custom_response:
                     if not isinstance(results, dict) or "data" not in results:
                         results = {"data": results, "host": _host}
@@ -112,7 +116,7 @@ def with_impression(
                 # since we only do impression for GET and we should have GET something
                 if result is not None and item_id_name in kwargs:
                     item_id = kwargs[item_id_name]
-                    create_impression(item_id, item_type, current_user.id)
+                    record_impression(item_id, item_type, current_user.id)
             except Exception as e:
                 LOG.error(e, exc_info=True)
             finally:
@@ -157,3 +161,11 @@ def teardown_database_session(error):
     database_session = flask.g.pop("database_session", None)
     if database_session is not None:
         get_session().remove()
+
+
+@flask_app.teardown_request
+def teardown_permission_resolver(error):
+    """Log the number of permission queries of the request"""
+    permission_resolver = flask.g.pop("permission_resolver", None)
+    if permission_resolver is not None:
+        permission_resolver.log_num_queries(flask.request.endpoint)
@@ -1,15 +1,25 @@
 from typing import List
 
 import boto3
+from botocore.config import Config
 from lib.logger import get_logger
 
 _LOG = get_logger(__file__)
 
+# Glue throttles aggressively when a large catalog is synced,
+# botocore retries throttled calls with exponential backoff
+# up to this many attempts
+GLUE_MAX_ATTEMPTS = 10
+
 
 class GlueDataCatalogClient:
     def __init__(self, catalog_id, region="us-east-1"):
         self.catalog_id = catalog_id
-        self._glue_client = boto3.client("glue", region_name=region)
+        self._glue_client = boto3.client(
+            "glue",
+            region_name=region,
+            config=Config(retries={"max_attempts": GLUE_MAX_ATTEMPTS}),
+        )
 
     def __del__(self):
         del self._glue_client
@@ -110,19 +120,23 @@ class GlueDataCatalogClient:
 
         return result
 
-    def get_hms_style_partitions(self, db_name, tb_name) -> List[str]:
+    def get_hms_style_partitions(
+        self, db_name, tb_name, partition_keys=None
+    ) -> List[str]:
         """
         Gets partitiion information for db_name.tb_name from Glue Data Catalog and converts into a
         Hive Metastore style representation
 
         :param db_name: The name of the database
         :param tb_name: The name of the table
+        :param partition_keys: The PartitionKeys of the Glue table, fetched with get_table if not provided
         :return: The partitions of db_name.tb_name in the format ['dt=2016-03-14/hr=00', 'dt=2016-03-14/hr=01', ...]
         """
         _LOG.info(f"Get hms style partitions for ${db_name}.${tb_name}")
 
-        table = self.get_table(db_name, tb_name)
-        partition_keys = table.get("Table").get("PartitionKeys")
+        if partition_keys is None:
+            table = self.get_table(db_name, tb_name)
+            partition_keys = table.get("Table").get("PartitionKeys")
         partition_key_names = [
             partition_key.get("Name") for partition_key in partition_keys
         ]
@@ -1,6 +1,7 @@
 from io import BytesIO
 from os import SEEK_END
 from datetime import datetime
+from typing import List
 from urllib.parse import quote
 
 import requests
@@ -174,3 +175,28 @@ class GoogleKeySigner(object):
                 **params,
             )
         return None
+
+
+class GoogleBlobDeleter(object):
+    # Most calls that a batch request accepts
+    MAX_BLOBS = 100
+
+    def __init__(self, bucket_name):
+        from google.cloud import storage
+
+        cred = get_google_credentials()
+        self._client = storage.Client(project=cred.project_id, credentials=cred)
+        self._bucket = self._client.bucket(bucket_name)
+
+    def delete_blobs(self, blob_names: List[str]):
+        """Delete up to MAX_BLOBS blobs in one batch request, missing ones are ignored
+        """
+        from google.api_core.exceptions import NotFound
+
+        try:
+            with self._client.batch():
+                for blob_name in blob_names:
+                    self._bucket.delete_blob(blob_name)
+        except NotFound:
+            # Raised once every call of the batch is done
+            pass
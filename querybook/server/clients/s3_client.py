@@ -1,3 +1,5 @@
+from typing import List
+
 import boto3
 import botocore
 
@@ -92,6 +94,26 @@ class S3KeySigner(object):
         return None
 
 
+class S3KeyDeleter(object):
+    # Most keys that DeleteObjects accepts in a request
+    MAX_KEYS = 1000
+
+    def __init__(self, bucket_name):
+        self._bucket_name = bucket_name
+        self._s3 = boto3.client("s3")
+
+    def delete_keys(self, keys: List[str]) -> List[str]:
+        """Delete up to MAX_KEYS keys in one request, returns the keys that failed
+        """
+        if not keys:
+            return []
+        response = self._s3.delete_objects(
+            Bucket=self._bucket_name,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+        return [error["Key"] for error in response.get("Errors", [])]
+
+
 class S3FileReader(ChunkReader):
     def __init__(
         self,
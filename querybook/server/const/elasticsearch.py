@@ -7,3 +7,4 @@ class ElasticsearchItem(Enum):
     datadocs = "datadocs"
     tables = "tables"
     users = "users"
+    query_executions = "query_executions"
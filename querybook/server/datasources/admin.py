@@ -156,6 +156,8 @@ def update_query_engine(id, **fields_to_update):
             ],
             session=session,
         )
+        if "metastore_id" in fields_to_update:
+            logic.get_query_metastore_environment_ids.invalidate_all()
         query_engine_dict = query_engine.to_dict_admin()
         return query_engine_dict
 
@@ -1,3 +1,4 @@
+from flask import after_this_request, request, Response
 from flask_login import current_user
 
 from app.auth.permission import (
@@ -35,9 +36,31 @@ LOG = get_logger(__file__)
 @register("/datadoc/<int:id>/", methods=["GET"])
 @with_impression("id", ImpressionItemType.DATA_DOC)
 def get_datadoc(id):
-    doc = datadoc_collab.get_datadoc(id)
-    api_assert(doc, "Invalid doc")
-    return doc
+    with DBSession() as session:
+        version = datadoc_collab.get_datadoc_version(id, session=session)
+        api_assert(version is not None, "Invalid doc")
+
+        doc = logic.get_serialized_data_doc(id, version, session=session)
+        api_assert(doc, "Invalid doc")
+        # Edits made in the last seconds are only in the live contexts
+        doc = datadoc_collab.apply_live_data_cell_contexts(doc)
+
+        # The doc is the same for everyone who can read it, so the
+        # version and the context versions identify the response
+        context_versions = sum(cell["context_version"] for cell in doc["cells"])
+        etag = f"datadoc-{id}-{version}-{context_versions}"
+
+        @after_this_request
+        def set_etag(response):
+            response.set_etag(etag, weak=True)
+            # Browsers keep the doc but revalidate it on every load
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304)
+        return doc
 
 
 @register("/datadoc/<int:id>/", methods=["DELETE"])
@@ -160,6 +183,8 @@ def clone_data_doc(id):
         assert_can_read(id, session=session)
         try:
             verify_data_doc_permission(id, session=session)
+            # Clones the edits that are not persisted yet
+            datadoc_collab.persist_data_doc_cell_contexts(id, session=session)
             data_doc = logic.clone_data_doc(
                 id=id, owner_uid=current_user.id, session=session
             )
@@ -177,6 +202,23 @@ def update_data_cell(cell_id, fields={}, sid=""):
     return datadoc_collab.update_data_cell(cell_id, fields, sid=sid)
 
 
+@register("/data_cell/<int:cell_id>/delta/", methods=["PUT"])
+def patch_data_cell(cell_id, context_version, delta, sid=""):
+    return datadoc_collab.patch_data_cell(cell_id, context_version, delta, sid=sid)
+
+
+@register("/data_cell/<int:cell_id>/context/", methods=["GET"])
+def get_data_cell_context(cell_id):
+    with DBSession() as session:
+        verify_data_cell_permission(cell_id, session=session)
+        data_doc = logic.get_data_doc_by_data_cell_id(cell_id, session=session)
+        if data_doc is not None:
+            assert_can_read(data_doc.id, session=session)
+        return datadoc_collab.get_data_cell_context_and_version(
+            cell_id, session=session
+        )
+
+
 @register("/data_cell/<int:id>/query_execution/", methods=["GET"])
 def get_data_cell_executions(id):
     with DBSession() as session:
@@ -6,6 +6,7 @@ from app.auth.permission import (
     verify_metastore_permission,
     verify_data_schema_permission,
     verify_data_table_permission,
+    verify_data_tables_permission,
     verify_data_column_permission,
 )
 from app.db import DBSession
@@ -389,8 +390,8 @@ def update_table_boost_score(data):
     """Batch update table boost scores"""
     # TODO: verify user is a service account
     with DBSession() as session:
+        verify_data_tables_permission([d["table_id"] for d in data], session=session)
         for d in data:
-            verify_data_table_permission(d["table_id"], session=session)
             logic.update_table(
                 id=d["table_id"], score=d["boost_score"], session=session
             )
@@ -442,8 +443,8 @@ def create_table_stats(data):
     """Batch add/update table stats"""
     # TODO: verify user is a service account
     with DBSession() as session:
+        verify_data_tables_permission([d["table_id"] for d in data], session=session)
         for d in data:
-            verify_data_table_permission(d["table_id"], session=session)
             for s in d["stats"]:
                 logic.upsert_table_stat(
                     table_id=d["table_id"],
@@ -114,9 +114,13 @@ def cancel_query_execution(query_execution_id):
 
 @register("/query_execution/search/", methods=["GET"])
 def search_query_execution(
-    environment_id, filters={}, orderBy=None, limit=100, offset=0
+    environment_id, filters={}, orderBy=None, limit=100, offset=0, cursor=None
 ):
     verify_environment_permission([environment_id])
+    api_assert(
+        cursor is None or orderBy == "created_at",
+        "cursor is only supported when ordered by created_at, use offset",
+    )
     with DBSession() as session:
         if "user" in filters:
             api_assert(
@@ -131,6 +135,7 @@ def search_query_execution(
             orderBy=orderBy,
             limit=limit,
             offset=offset,
+            cursor=cursor,
             session=session,
         )
 
@@ -408,12 +413,18 @@ def add_query_execution_viewer(execution_id, uid):
             execution_id=execution_id, uid=uid, session=session
         )
         session.commit()
+    logic.update_es_query_execution_by_id(execution_id)
     return viewer.to_dict()
 
 
 @register("/query_execution_viewer/<int:id>/", methods=["DELETE"])
 def delete_query_execution_viewer(id):
-    return QueryExecutionViewer.delete(id)
+    with DBSession() as session:
+        viewer = QueryExecutionViewer.get(id=id, session=session)
+        if viewer:
+            execution_id = viewer.query_execution_id
+            QueryExecutionViewer.delete(id, session=session)
+            logic.update_es_query_execution_by_id(execution_id)
 
 
 @register("/query_execution/<int:execution_id>/viewer/", methods=["GET"])
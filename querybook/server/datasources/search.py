@@ -6,8 +6,12 @@ from app.auth.permission import (
     verify_metastore_permission,
 )
 from app.datasource import register, api_assert
+from lib.elasticsearch.search_cache import cached_search
 from lib.logger import get_logger
 from logic.elasticsearch import ES_CONFIG, get_hosted_es
+from logic.environment import get_environment_by_id
+from logic.query_execution import get_engine_ids_by_environment_id
+from logic.table_name_index import suggest_table_names
 
 
 LOG = get_logger(__file__)
@@ -138,6 +142,76 @@ def _data_doc_access_terms(user_id):
     ]
 
 
+def _construct_query_execution_query(
+    keywords, filters, limit, offset, check_access=True, sort_key=None, sort_order=None,
+):
+    search_query = _match_any_field(keywords, search_fields=["query", "tables^2"])
+    search_filter = _match_filters(filters)
+    if search_filter == {}:
+        search_filter["filter"] = {"bool": {}}
+    if check_access:
+        search_filter["filter"]["bool"]["should"] = _query_execution_access_terms(
+            current_user.id
+        )
+        search_filter["filter"]["bool"]["minimum_should_match"] = 1
+
+    bool_query = {"filter": search_filter["filter"]}
+    if search_query != {}:
+        bool_query["must"] = [search_query]
+    if "range" in search_filter:
+        bool_query.setdefault("must", [])
+        bool_query["must"].append({"range": search_filter["range"]})
+
+    query = {
+        "query": {"bool": bool_query},
+        "_source": [
+            "id",
+            "engine_id",
+            "uid",
+            "status",
+            "tables",
+            "created_at",
+            "completed_at",
+        ],
+        "size": limit,
+        "from": offset,
+    }
+
+    if not sort_key and not keywords:
+        sort_key = "created_at"
+        sort_order = "desc"
+    if sort_key:
+        if not isinstance(sort_key, list):
+            sort_key = [sort_key]
+            sort_order = [sort_order]
+        sort_query = [
+            {val: {"order": order}} for order, val in zip(sort_order, sort_key)
+        ]
+
+        query.update({"sort": sort_query})
+    # The start of the query is returned if no keyword is in it
+    query.update(
+        _highlight_fields(
+            {
+                "query": {
+                    "fragment_size": 60,
+                    "number_of_fragments": 3,
+                    "no_match_size": 120,
+                }
+            }
+        )
+    )
+
+    return json.dumps(query)
+
+
+def _query_execution_access_terms(user_id):
+    return [
+        {"term": {"uid": user_id}},
+        {"term": {"readable_user_ids": user_id}},
+    ]
+
+
 def _match_table_word_fields(fields):
     search_fields = []
     for field in fields:
@@ -258,7 +332,8 @@ def _parse_results(results, get_count):
     ret = []
     elements = extract_hits(results)
     for element in elements:
-        r = element.get("_source", {})
+        # Copy since the response may be cached
+        r = dict(element.get("_source", {}))
         if element.get("highlight"):
             r.update({"highlight": element.get("highlight")})
         ret.append(r)
@@ -270,12 +345,19 @@ def _parse_results(results, get_count):
     return ret
 
 
+def _search(query, index_name, doc_type):
+    def search():
+        try:
+            return get_hosted_es().search(index_name, doc_type, body=query)
+        except Exception as e:
+            LOG.warning("Got ElasticSearch exception: \n " + str(e))
+        return None
+
+    return cached_search(index_name, query, search)
+
+
 def _get_matching_objects(query, index_name, doc_type, get_count=False):
-    result = None
-    try:
-        result = get_hosted_es().search(index_name, doc_type, body=query)
-    except Exception as e:
-        LOG.warning("Got ElasticSearch exception: \n " + str(e))
+    result = _search(query, index_name, doc_type)
 
     if result is None:
         LOG.debug("No Elasticsearch attempt succeeded")
@@ -287,7 +369,7 @@ def _get_matching_objects(query, index_name, doc_type, get_count=False):
 def search_datadoc(
     environment_id,
     keywords,
-    filters=[],
+    filters=None,
     fields=[],
     sort_key=None,
     sort_order=None,
@@ -295,7 +377,7 @@ def search_datadoc(
     offset=0,
 ):
     verify_environment_permission([environment_id])
-    filters.append(["environment_id", environment_id])
+    filters = [*(filters or []), ["environment_id", environment_id]]
 
     query = _construct_datadoc_query(
         keywords=keywords,
@@ -315,11 +397,49 @@ def search_datadoc(
     return {"count": count, "results": results}
 
 
+@register("/search/query_execution/", methods=["GET"])
+def search_query_executions(
+    environment_id,
+    keywords,
+    filters=None,
+    sort_key=None,
+    sort_order=None,
+    limit=100,
+    offset=0,
+):
+    verify_environment_permission([environment_id])
+    api_assert(limit <= 1000, "Requesting too many query executions")
+    # The engines of the environment when searching, as engines can be moved
+    engine_ids = get_engine_ids_by_environment_id(environment_id)
+    if not engine_ids:
+        return {"count": 0, "results": []}
+    filters = [*(filters or []), ["engine_id", engine_ids]]
+
+    # Executions of a shareable environment can be seen by all its users
+    environment = get_environment_by_id(environment_id)
+    query = _construct_query_execution_query(
+        keywords=keywords,
+        filters=filters,
+        limit=limit,
+        offset=offset,
+        check_access=not environment.shareable,
+        sort_key=sort_key,
+        sort_order=sort_order,
+    )
+    results, count = _get_matching_objects(
+        query,
+        ES_CONFIG["query_executions"]["index_name"],
+        ES_CONFIG["query_executions"]["type_name"],
+        True,
+    )
+    return {"count": count, "results": results}
+
+
 @register("/search/tables/", methods=["GET"])
 def search_tables(
     metastore_id,
     keywords,
-    filters=[],
+    filters=None,
     fields=[],
     sort_key=None,
     sort_order=None,
@@ -328,7 +448,7 @@ def search_tables(
     concise=False,
 ):
     verify_metastore_permission(metastore_id)
-    filters.append(["metastore_id", metastore_id])
+    filters = [*(filters or []), ["metastore_id", metastore_id]]
 
     query = _construct_tables_query(
         keywords=keywords,
@@ -353,6 +473,11 @@ def search_tables(
 def suggest_tables(metastore_id, prefix, limit=10):
     verify_metastore_permission(metastore_id)
 
+    # Elasticsearch is only used until the table name index is built
+    table_names = suggest_table_names(metastore_id, prefix, limit)
+    if table_names is not None:
+        return table_names
+
     query = {
         "suggest": {
             "suggest": {
@@ -369,14 +494,7 @@ def suggest_tables(metastore_id, prefix, limit=10):
     index_name = ES_CONFIG["tables"]["index_name"]
     type_name = ES_CONFIG["tables"]["type_name"]
 
-    result = None
-    try:
-        result = get_hosted_es().search(index_name, type_name, body=query)
-    except Exception as e:
-        LOG.info(e)
-    finally:
-        if result is None:
-            result = {}
+    result = _search(query, index_name, type_name) or {}
     options = next(iter(result.get("suggest", {}).get("suggest", [])), {}).get(
         "options", []
     )
@@ -407,15 +525,7 @@ def suggest_user(name, limit=10, offset=None):
     index_name = ES_CONFIG["users"]["index_name"]
     type_name = ES_CONFIG["users"]["type_name"]
 
-    result = None
-    try:
-        # print '\n--ES latest hosted_index %s\n' % hosted_index
-        result = get_hosted_es().search(index_name, type_name, body=query)
-    except Exception as e:
-        LOG.info(e)
-    finally:
-        if result is None:
-            result = {}
+    result = _search(query, index_name, type_name) or {}
 
     options = next(iter(result.get("suggest", {}).get("suggest", [])), {}).get(
         "options", []
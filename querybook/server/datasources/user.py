@@ -65,9 +65,7 @@ def get_user_environment_ids():
     visible_environments = environment_logic.get_all_visible_environments_by_uid(
         uid=current_user.id
     )
-    user_environment_ids = environment_logic.get_all_accessible_environment_ids_by_uid(
-        uid=current_user.id
-    )
+    user_environment_ids = current_user.environment_ids
     return [visible_environments, user_environment_ids]
 
 
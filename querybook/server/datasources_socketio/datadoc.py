@@ -16,15 +16,63 @@ from logic.datadoc_permission import assert_can_read
 from .helper import register_socket
 
 
+# Sessions without any action in this many seconds are expired
+DATA_DOC_SESSION_TIMEOUT = 5 * 60
+
+# KEYS: sessions (sid scored by last action time), session users (sid -> uid),
+#       cursors (sid -> data cell id)
+# ARGV: sessions with last action time before this are expired
+# Returns a flat list of sid, uid, cursor ("" if none) of live sessions
+GET_AND_EXPIRE_SESSIONS_SCRIPT = """
+local expired = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", "(" .. ARGV[1])
+for _, sid in ipairs(expired) do
+    redis.call("HDEL", KEYS[2], sid)
+end
+if #expired > 0 then
+    redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", "(" .. ARGV[1])
+end
+
+local cursors = {}
+local raw_cursors = redis.call("HGETALL", KEYS[3])
+for i = 1, #raw_cursors, 2 do
+    local sid = raw_cursors[i]
+    if redis.call("ZSCORE", KEYS[1], sid) then
+        cursors[sid] = raw_cursors[i + 1]
+    else
+        -- Cursor belongs to a no longer valid session
+        redis.call("HDEL", KEYS[3], sid)
+    end
+end
+
+local result = {}
+for _, sid in ipairs(redis.call("ZRANGE", KEYS[1], 0, -1)) do
+    local uid = redis.call("HGET", KEYS[2], sid)
+    if uid then
+        table.insert(result, sid)
+        table.insert(result, uid)
+        table.insert(result, cursors[sid] or "")
+    end
+end
+return result
+"""
+
+
 def to_string(s):
     return s.decode("ascii")
 
 
+def get_session_keys(data_doc_id):
+    return (
+        f"data_doc/{data_doc_id}/sessions",
+        f"data_doc/{data_doc_id}/session_users",
+        f"data_doc/{data_doc_id}/cursors",
+    )
+
+
 @with_redis
 def send_data_doc_session_info(data_doc_id, room, redis_conn=None):
-    user_dict = get_and_expire_user_dict(data_doc_id, redis_conn=redis_conn)
-    cursor_dict = get_and_expire_cursor_dict(
-        data_doc_id, user_dict, redis_conn=redis_conn
+    user_dict, cursor_dict = get_and_expire_session_dicts(
+        data_doc_id, redis_conn=redis_conn
     )
 
     socketio.emit(
@@ -37,48 +85,34 @@ def send_data_doc_session_info(data_doc_id, room, redis_conn=None):
 
 
 @with_redis
-def get_and_expire_cursor_dict(data_doc_id, user_dict, redis_conn=None):
-    cursor_key = f"data_doc/{data_doc_id}/cursors"
-    raw_cursor_dict = redis_conn.hgetall(cursor_key)
-    cursor_dict = {}
-
-    for raw_sid, raw_uid in raw_cursor_dict.items():
-        sid = to_string(raw_sid)
-        if sid in user_dict:
-            cursor_dict[sid] = int(raw_uid)
-        else:
-            # Cursor belongs to a no longer valid session
-            redis_conn.hdel(cursor_key, sid)
-    return cursor_dict
-
-
-@with_redis
-def get_and_expire_user_dict(data_doc_id, redis_conn=None):
-    """Gets entries in data doc users, expire anything more than 5 minutes
+def get_and_expire_session_dicts(data_doc_id, redis_conn=None):
+    """Gets the users and cursors of the data doc sessions, expire
+       sessions without any action in the last 5 minutes along with
+       their cursors. Done in one script call.
 
     Arguments:
         data_doc_id {[number]}
 
     Keyword Arguments:
         redis_conn {[Redis]} -- [Redis connection] (default: {None})
-    """
-    user_key = f"data_doc/{data_doc_id}/users"
-    raw_user_dict = redis_conn.hgetall(user_key) or {}
-    user_dict = {}
-    now = int(time.time())
-
-    for raw_sid, value in raw_user_dict.items():
-        sid = to_string(raw_sid)
 
-        values = to_string(value).split("|")
-        uid = values[0]
-        last_action_time = 0 if len(values) < 2 else int(values[1])
+    Returns:
+        Tuple[Dict[str, int], Dict[str, int]] -- sid to uid, sid to data cell id
+    """
+    get_and_expire_sessions = redis_conn.register_script(GET_AND_EXPIRE_SESSIONS_SCRIPT)
+    raw_sessions = get_and_expire_sessions(
+        keys=get_session_keys(data_doc_id),
+        args=[int(time.time()) - DATA_DOC_SESSION_TIMEOUT],
+    )
 
-        if now - last_action_time > (5 * 60):  # if last action time is 5 mins ago
-            redis_conn.hdel(user_key, sid)
-        else:
-            user_dict[sid] = int(uid)
-    return user_dict
+    user_dict = {}
+    cursor_dict = {}
+    for i in range(0, len(raw_sessions), 3):
+        sid = to_string(raw_sessions[i])
+        user_dict[sid] = int(raw_sessions[i + 1])
+        if raw_sessions[i + 2]:
+            cursor_dict[sid] = int(raw_sessions[i + 2])
+    return user_dict, cursor_dict
 
 
 @with_redis
@@ -92,17 +126,23 @@ def update_user_list(data_doc_id, add=False, redis_conn=None):
         add {bool} -- (default: {False})
     """
     # Update the list of users in This room
-    key = f"data_doc/{data_doc_id}/users"
+    session_key, session_user_key, cursor_key = get_session_keys(data_doc_id)
     should_send_info = False
 
-    if add:
-        now = int(time.time())
-        should_send_info = (
-            redis_conn.hset(key, request.sid, f"{current_user.id}|{now}") == 1
-        )
-    else:
-        redis_conn.hdel(key, request.sid)
-        should_send_info = True
+    with redis_conn.pipeline() as pipe:
+        if add:
+            pipe.zadd(session_key, {request.sid: int(time.time())})
+            pipe.hset(session_user_key, request.sid, current_user.id)
+            pipe.expire(session_key, DATA_DOC_SESSION_TIMEOUT)
+            pipe.expire(session_user_key, DATA_DOC_SESSION_TIMEOUT)
+            pipe.expire(cursor_key, DATA_DOC_SESSION_TIMEOUT)
+            # Only if the session is new
+            should_send_info = pipe.execute()[0] == 1
+        else:
+            pipe.zrem(session_key, request.sid)
+            pipe.hdel(session_user_key, request.sid)
+            pipe.execute()
+            should_send_info = True
 
     if should_send_info:
         socketio.emit(
@@ -117,9 +157,12 @@ def update_user_list(data_doc_id, add=False, redis_conn=None):
 @with_redis
 def update_user_cursor(data_doc_id, data_cell_id=None, redis_conn=None):
     """Update the user cursor in redis"""
-    key = f"data_doc/{data_doc_id}/cursors"
+    _, _, key = get_session_keys(data_doc_id)
     if data_cell_id is not None:
-        redis_conn.hset(key, request.sid, data_cell_id)
+        with redis_conn.pipeline() as pipe:
+            pipe.hset(key, request.sid, data_cell_id)
+            pipe.expire(key, DATA_DOC_SESSION_TIMEOUT)
+            pipe.execute()
     else:
         redis_conn.hdel(key, request.sid)
 
@@ -47,6 +47,16 @@ class QuerybookSettings(object):
     # Search
     ELASTICSEARCH_HOST = get_env_config("ELASTICSEARCH_HOST", optional=False)
     ELASTICSEARCH_CONNECTION_TYPE = get_env_config("ELASTICSEARCH_CONNECTION_TYPE")
+    ELASTICSEARCH_BULK_CHUNK_SIZE = int(get_env_config("ELASTICSEARCH_BULK_CHUNK_SIZE"))
+    ELASTICSEARCH_BULK_THREAD_COUNT = int(
+        get_env_config("ELASTICSEARCH_BULK_THREAD_COUNT")
+    )
+    ELASTICSEARCH_TEXT_PROCESS_COUNT = int(
+        get_env_config("ELASTICSEARCH_TEXT_PROCESS_COUNT")
+    )
+    ELASTICSEARCH_SEARCH_CACHE_TTL = int(
+        get_env_config("ELASTICSEARCH_SEARCH_CACHE_TTL")
+    )
 
     # Lineage
     DATA_LINEAGE_BACKEND = get_env_config("DATA_LINEAGE_BACKEND")
@@ -86,7 +96,16 @@ class QuerybookSettings(object):
 
     DB_MAX_UPLOAD_SIZE = int(get_env_config("DB_MAX_UPLOAD_SIZE"))
 
+    # Cache Store
+    CACHE_STORE_TYPE = get_env_config("CACHE_STORE_TYPE")
+
     GOOGLE_CREDS = json.loads(get_env_config("GOOGLE_CREDS") or "null")
 
     # Logging
     LOG_LOCATION = get_env_config("LOG_LOCATION")
+
+    # Stats
+    STATS_LOGGER_NAME = get_env_config("STATS_LOGGER_NAME")
+
+    # Impressions
+    IMPRESSION_DEDUP_WINDOW = int(get_env_config("IMPRESSION_DEDUP_WINDOW"))
@@ -0,0 +1,12 @@
+from .all_cache_stores import ALL_CACHE_STORES
+from .stores.base_store import BaseCacheStore
+from env import QuerybookSettings
+
+_cache_store = None
+
+
+def get_cache_store() -> BaseCacheStore:
+    global _cache_store
+    if _cache_store is None:
+        _cache_store = ALL_CACHE_STORES[QuerybookSettings.CACHE_STORE_TYPE]()
+    return _cache_store
@@ -0,0 +1,19 @@
+from lib.utils.plugin import import_plugin
+from .stores.db_store import DBCacheStore
+from .stores.redis_store import RedisCacheStore
+from .stores.tiered_store import TieredCacheStore
+
+ALL_PLUGIN_CACHE_STORES = import_plugin(
+    "cache_store_plugin", "ALL_PLUGIN_CACHE_STORES", {}
+)
+
+# Store type to a function that creates the store
+ALL_CACHE_STORES = {
+    "redis": RedisCacheStore,
+    "db": DBCacheStore,
+    # Redis with the DB as a persistent tier
+    "redis_db": lambda: TieredCacheStore(
+        [RedisCacheStore(), DBCacheStore(schedule_expiry=False)]
+    ),
+    **ALL_PLUGIN_CACHE_STORES,
+}
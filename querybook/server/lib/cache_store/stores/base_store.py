@@ -0,0 +1,36 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+
+class BaseCacheStore(ABC):
+    """Base interface for the stores behind lib.utils.mysql_cache
+
+       An entry is a dict with the key, the serialized value and the
+       created_at/updated_at timestamps (in seconds since epoch)
+    """
+
+    @abstractmethod
+    def get(self, key: str, session=None) -> Optional[Dict]:
+        """Get the entry of the key
+
+        Returns:
+            Optional[Dict] -- None if the key is missing or expired
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, expires_after: int = None, session=None):
+        """Set the value of the key
+
+        Arguments:
+            value {str} -- Serialized value
+
+        Keyword Arguments:
+            expires_after {int} -- Seconds before the key expires,
+                                   the key never expires if None
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str, session=None):
+        pass
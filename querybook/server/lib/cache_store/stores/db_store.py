@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from lib.cache_store.stores.base_store import BaseCacheStore
+from logic.result_store import (
+    delete_key_value_store,
+    get_key_value_store,
+    upsert_key_value_store,
+)
+from tasks.delete_mysql_cache import delete_mysql_cache
+
+
+class DBCacheStore(BaseCacheStore):
+    """Keeps the entries in the KeyValueStore table
+
+       Entries set with expires_after record their expires_at, they are
+       not returned once expired and are pruned by the db clean up job.
+       When it is the only store, each set with expires_after also schedules
+       a celery task to delete the key.
+    """
+
+    def __init__(self, schedule_expiry: bool = True):
+        self._schedule_expiry = schedule_expiry
+
+    def get(self, key: str, session=None) -> Optional[Dict]:
+        kvs = get_key_value_store(key, session=session)
+        if kvs is None or (
+            kvs.expires_at is not None and kvs.expires_at <= datetime.utcnow()
+        ):
+            return None
+        return kvs.to_dict()
+
+    def set(self, key: str, value: str, expires_after: int = None, session=None):
+        expires_at = (
+            datetime.utcnow() + timedelta(seconds=expires_after)
+            if expires_after is not None
+            else None
+        )
+        upsert_key_value_store(key, value, expires_at=expires_at, session=session)
+        if self._schedule_expiry and expires_after is not None:
+            delete_mysql_cache.delay(key, countdown=expires_after)
+
+    def delete(self, key: str, session=None):
+        delete_key_value_store(key, session=session)
@@ -0,0 +1,69 @@
+from datetime import datetime
+import json
+from typing import Dict, Optional
+import zlib
+
+from clients.redis_client import with_redis
+from lib.cache_store.stores.base_store import BaseCacheStore
+from lib.utils.utils import DATETIME_TO_UTC
+
+
+class RedisCacheStore(BaseCacheStore):
+    """Keeps the entries in Redis, expired with native TTLs"""
+
+    KEY_PREFIX = "cache_store:"
+    # Entries larger than this (in bytes) are compressed
+    COMPRESS_MIN_SIZE = 1024
+
+    _JSON_MARKER = b"j"
+    _ZLIB_MARKER = b"z"
+
+    @with_redis
+    def get(self, key: str, session=None, redis_conn=None) -> Optional[Dict]:
+        raw_entry = redis_conn.get(self.KEY_PREFIX + key)
+        if raw_entry is None:
+            return None
+        return self._loads(raw_entry)
+
+    @with_redis
+    def set(
+        self,
+        key: str,
+        value: str,
+        expires_after: int = None,
+        session=None,
+        redis_conn=None,
+    ):
+        if expires_after is not None and expires_after <= 0:
+            self.delete(key, redis_conn=redis_conn)
+            return
+
+        now = DATETIME_TO_UTC(datetime.utcnow())
+        entry = {
+            "key": key,
+            "value": value,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if expires_after is not None:
+            # Lets in process caches of the entry expire with it
+            entry["expires_at"] = now + expires_after
+        redis_conn.set(self.KEY_PREFIX + key, self._dumps(entry), ex=expires_after)
+
+    @with_redis
+    def delete(self, key: str, session=None, redis_conn=None):
+        redis_conn.delete(self.KEY_PREFIX + key)
+
+    @classmethod
+    def _dumps(cls, entry: Dict) -> bytes:
+        raw_entry = json.dumps(entry).encode("utf-8")
+        if len(raw_entry) < cls.COMPRESS_MIN_SIZE:
+            return cls._JSON_MARKER + raw_entry
+        return cls._ZLIB_MARKER + zlib.compress(raw_entry)
+
+    @classmethod
+    def _loads(cls, raw_entry: bytes) -> Dict:
+        marker, raw_entry = raw_entry[:1], raw_entry[1:]
+        if marker == cls._ZLIB_MARKER:
+            raw_entry = zlib.decompress(raw_entry)
+        return json.loads(raw_entry)
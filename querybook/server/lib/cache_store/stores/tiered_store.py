@@ -0,0 +1,28 @@
+from typing import Dict, List, Optional
+
+from lib.cache_store.stores.base_store import BaseCacheStore
+
+
+class TieredCacheStore(BaseCacheStore):
+    """Writes to all the stores and reads from the first one that has the key
+
+       e.g Redis in front of the DB keeps the entries when Redis is flushed
+    """
+
+    def __init__(self, stores: List[BaseCacheStore]):
+        self._stores = stores
+
+    def get(self, key: str, session=None) -> Optional[Dict]:
+        for store in self._stores:
+            entry = store.get(key, session=session)
+            if entry is not None:
+                return entry
+        return None
+
+    def set(self, key: str, value: str, expires_after: int = None, session=None):
+        for store in self._stores:
+            store.set(key, value, expires_after=expires_after, session=session)
+
+    def delete(self, key: str, session=None):
+        for store in self._stores:
+            store.delete(key, session=session)
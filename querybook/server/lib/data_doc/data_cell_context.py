@@ -0,0 +1,244 @@
+"""Live context of the data cells being edited
+
+Deltas are applied to a copy of the cell context kept in Redis, which is
+written back to the database once the edits pause. Each cell has:
+    data_cell/<id>/context -- Hash of the context, its version and the
+                              time of the first change not yet persisted
+    data_cell/<id>/deltas -- The last deltas applied, so deltas made on
+                             an older version can be rebased
+    data_cell/<id>/persist_scheduled -- Set while a task to persist the
+                                        context is scheduled
+"""
+import json
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from clients.redis_client import with_redis
+from lib.data_doc.text_delta import apply_delta, Delta, transform_delta
+
+# Refreshed on every change
+DATA_CELL_CONTEXT_TTL = 60 * 60 * 24
+MAX_DELTA_HISTORY = 100
+
+
+class DataCellContextConflict(Exception):
+    """The delta is made on a version that is too old or unknown"""
+
+    pass
+
+
+class DataCellContext(NamedTuple):
+    context: str
+    version: int
+    # Time of the first change that is not persisted yet
+    dirty_since: Optional[float]
+    # Time of the last change
+    changed_at: Optional[float] = None
+
+
+def _get_context_key(cell_id: int) -> str:
+    return f"data_cell/{cell_id}/context"
+
+
+def _get_deltas_key(cell_id: int) -> str:
+    return f"data_cell/{cell_id}/deltas"
+
+
+def _get_persist_scheduled_key(cell_id: int) -> str:
+    return f"data_cell/{cell_id}/persist_scheduled"
+
+
+def _parse_data_cell_context(raw_context) -> Optional[DataCellContext]:
+    if not raw_context:
+        return None
+    dirty_since = raw_context.get(b"dirty_since")
+    changed_at = raw_context.get(b"changed_at")
+    return DataCellContext(
+        context=raw_context[b"context"].decode("utf-8"),
+        version=int(raw_context[b"version"]),
+        dirty_since=float(dirty_since) if dirty_since else None,
+        changed_at=float(changed_at) if changed_at else None,
+    )
+
+
+@with_redis
+def get_data_cell_context(cell_id: int, redis_conn=None) -> Optional[DataCellContext]:
+    return _parse_data_cell_context(redis_conn.hgetall(_get_context_key(cell_id)))
+
+
+@with_redis
+def get_data_cell_contexts(
+    cell_ids: List[int], redis_conn=None
+) -> Dict[int, DataCellContext]:
+    """Live contexts of the cells that have one, read with one round trip"""
+    with redis_conn.pipeline(transaction=False) as pipe:
+        for cell_id in cell_ids:
+            pipe.hgetall(_get_context_key(cell_id))
+        raw_contexts = pipe.execute()
+    return {
+        cell_id: _parse_data_cell_context(raw_context)
+        for cell_id, raw_context in zip(cell_ids, raw_contexts)
+        if raw_context
+    }
+
+
+@with_redis
+def apply_data_cell_delta(
+    cell_id: int,
+    base_version: int,
+    delta: Delta,
+    load_context: Callable[[], Tuple[str, int]],
+    redis_conn=None,
+) -> Tuple[DataCellContext, Delta]:
+    """Apply delta made on base_version of the context, it is rebased over
+       the deltas applied since then
+
+    Arguments:
+        cell_id {int}
+        base_version {int}
+        delta {Delta}
+        load_context {Callable} -- Returns the persisted context and version,
+                                   called if the cell is not in Redis
+
+    Raises:
+        DataCellContextConflict: If base_version is not in the history
+        InvalidDeltaException: If the delta does not match the text
+
+    Returns:
+        Tuple[DataCellContext, Delta] -- The new context and the delta
+                                         that got applied to the previous one
+    """
+    context_key = _get_context_key(cell_id)
+    deltas_key = _get_deltas_key(cell_id)
+
+    def apply(pipe):
+        current = _parse_data_cell_context(pipe.hgetall(context_key))
+        is_loaded = current is None
+        if is_loaded:
+            context, version = load_context()
+            current = DataCellContext(context, version, None)
+
+        num_missed = current.version - base_version
+        if num_missed < 0:
+            raise DataCellContextConflict(f"Unknown version {base_version}")
+
+        rebased_delta = delta
+        if num_missed > 0:
+            missed_deltas = (
+                [json.loads(raw) for raw in pipe.lrange(deltas_key, -num_missed, -1)]
+                if not is_loaded and num_missed <= MAX_DELTA_HISTORY
+                else []
+            )
+            if len(missed_deltas) < num_missed or (
+                missed_deltas[0][0] != base_version + 1
+            ):
+                raise DataCellContextConflict(f"Version {base_version} is too old")
+            for _, missed_delta in missed_deltas:
+                rebased_delta = transform_delta(rebased_delta, missed_delta)
+
+        now = time.time()
+        new_context = DataCellContext(
+            context=apply_delta(current.context, rebased_delta),
+            version=current.version + 1,
+            dirty_since=current.dirty_since or now,
+            changed_at=now,
+        )
+
+        pipe.multi()
+        if is_loaded:
+            # Deltas kept are of versions that are gone
+            pipe.delete(deltas_key)
+        pipe.hset(
+            context_key,
+            mapping={
+                "context": new_context.context,
+                "version": new_context.version,
+                "dirty_since": new_context.dirty_since,
+                "changed_at": new_context.changed_at,
+            },
+        )
+        pipe.rpush(deltas_key, json.dumps([new_context.version, rebased_delta]))
+        pipe.ltrim(deltas_key, -MAX_DELTA_HISTORY, -1)
+        pipe.expire(context_key, DATA_CELL_CONTEXT_TTL)
+        pipe.expire(deltas_key, DATA_CELL_CONTEXT_TTL)
+        return new_context, rebased_delta
+
+    return redis_conn.transaction(
+        apply, context_key, deltas_key, value_from_callable=True
+    )
+
+
+@with_redis
+def replace_data_cell_context(
+    cell_id: int, context: str, persisted_version: int, redis_conn=None
+) -> int:
+    """Replace the whole context, deltas made on earlier versions
+       can no longer be applied. The caller persists the context
+       and then calls mark_data_cell_context_persisted.
+
+    Returns:
+        int -- The new version, after both the live and persisted ones
+    """
+    context_key = _get_context_key(cell_id)
+    deltas_key = _get_deltas_key(cell_id)
+
+    def replace(pipe):
+        current = _parse_data_cell_context(pipe.hgetall(context_key))
+        version = max(current.version if current else 0, persisted_version) + 1
+
+        now = time.time()
+        pipe.multi()
+        pipe.hset(
+            context_key,
+            mapping={
+                "context": context,
+                "version": version,
+                "dirty_since": now,
+                "changed_at": now,
+            },
+        )
+        pipe.delete(deltas_key)
+        pipe.expire(context_key, DATA_CELL_CONTEXT_TTL)
+        return version
+
+    return redis_conn.transaction(
+        replace, context_key, deltas_key, value_from_callable=True
+    )
+
+
+@with_redis
+def mark_data_cell_context_persisted(cell_id: int, version: int, redis_conn=None):
+    """The context of version is in the database, if there
+       were no changes since then it is no longer dirty
+    """
+    context_key = _get_context_key(cell_id)
+
+    def mark(pipe):
+        current = _parse_data_cell_context(pipe.hgetall(context_key))
+        if current is not None and current.version == version:
+            pipe.multi()
+            pipe.hdel(context_key, "dirty_since")
+
+    redis_conn.transaction(mark, context_key)
+
+
+@with_redis
+def mark_data_cell_context_persist_scheduled(
+    cell_id: int, expires_after: int, redis_conn=None
+) -> bool:
+    """Returns False if a persist of the context is already scheduled
+
+    Arguments:
+        expires_after {int} -- Seconds after which another persist can be
+                               scheduled, in case the scheduled one is lost
+    """
+    return bool(
+        redis_conn.set(
+            _get_persist_scheduled_key(cell_id), 1, nx=True, ex=expires_after
+        )
+    )
+
+
+@with_redis
+def clear_data_cell_context_persist_scheduled(cell_id: int, redis_conn=None):
+    redis_conn.delete(_get_persist_scheduled_key(cell_id))
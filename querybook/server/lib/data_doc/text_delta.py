@@ -0,0 +1,125 @@
+"""Deltas of text, in the JSON format of ot.js text operations
+
+A delta is a list of operations which go over the text from its start:
+    positive int: keep that many characters
+    negative int: delete that many characters
+    str: insert the string
+
+Lengths count UTF-16 code units, which is how the browser counts them.
+"""
+from typing import List, Union
+
+Delta = List[Union[int, str]]
+
+
+class InvalidDeltaException(Exception):
+    pass
+
+
+def _is_insert(op) -> bool:
+    return isinstance(op, str)
+
+
+def _is_retain(op) -> bool:
+    return isinstance(op, int) and op > 0
+
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le", "surrogatepass")) // 2
+
+
+def validate_delta(delta: Delta):
+    if not isinstance(delta, list):
+        raise InvalidDeltaException("Delta must be a list")
+    for op in delta:
+        if isinstance(op, bool) or not isinstance(op, (int, str)) or not op:
+            raise InvalidDeltaException(f"Invalid delta operation {op!r}")
+
+
+def apply_delta(text: str, delta: Delta) -> str:
+    validate_delta(delta)
+
+    code_units = text.encode("utf-16-le", "surrogatepass")
+    length = len(code_units) // 2
+    position = 0
+    parts = []
+    for op in delta:
+        if _is_insert(op):
+            parts.append(op.encode("utf-16-le", "surrogatepass"))
+            continue
+
+        next_position = position + abs(op)
+        if next_position > length:
+            raise InvalidDeltaException("Delta is longer than the text")
+        if _is_retain(op):
+            parts.append(code_units[position * 2 : next_position * 2])
+        position = next_position
+
+    if position != length:
+        raise InvalidDeltaException("Delta is shorter than the text")
+
+    try:
+        return b"".join(parts).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise InvalidDeltaException("Delta splits a character")
+
+
+def _append_op(delta: Delta, op):
+    """Append op to delta, merged with the last operation if they are alike"""
+    if delta:
+        last_op = delta[-1]
+        if _is_insert(op) and _is_insert(last_op):
+            delta[-1] = last_op + op
+            return
+        if not _is_insert(op) and not _is_insert(last_op) and (op > 0) == (last_op > 0):
+            delta[-1] = last_op + op
+            return
+    delta.append(op)
+
+
+def transform_delta(delta: Delta, applied_delta: Delta) -> Delta:
+    """Rebase delta, made on the same text as applied_delta, so it can be
+       applied after applied_delta. When both insert at the same place the
+       text of applied_delta comes first.
+
+    Arguments:
+        delta {Delta}
+        applied_delta {Delta} -- Delta applied to the text before delta
+
+    Returns:
+        Delta -- The delta to apply to the text after applied_delta
+    """
+    validate_delta(delta)
+    validate_delta(applied_delta)
+
+    result = []
+    ops = iter(delta)
+    applied_ops = iter(applied_delta)
+    op = next(ops, None)
+    applied_op = next(applied_ops, None)
+    while op is not None or applied_op is not None:
+        if applied_op is not None and _is_insert(applied_op):
+            _append_op(result, _utf16_length(applied_op))
+            applied_op = next(applied_ops, None)
+            continue
+        if op is not None and _is_insert(op):
+            _append_op(result, op)
+            op = next(ops, None)
+            continue
+        if op is None or applied_op is None:
+            raise InvalidDeltaException("Deltas are not made on the same text")
+
+        # Both keep or delete, go over the shorter of the two
+        length = min(abs(op), abs(applied_op))
+        if _is_retain(op) and _is_retain(applied_op):
+            _append_op(result, length)
+        elif not _is_retain(op) and _is_retain(applied_op):
+            _append_op(result, -length)
+        # Otherwise the text is already deleted by applied_delta
+
+        op = op - length if op > 0 else op + length
+        applied_op = applied_op - length if applied_op > 0 else applied_op + length
+        op = op or next(ops, None)
+        applied_op = applied_op or next(applied_ops, None)
+
+    return result
@@ -0,0 +1,100 @@
+"""Cache of search and suggest responses
+
+Responses are cached in process and in Redis, keyed by the index, its
+generation and the normalized query body. Every write to an index bumps
+its generation, so the responses cached before the write are never used
+again and expire on their own.
+"""
+import hashlib
+import json
+from typing import Callable, Dict, Union
+
+from clients.redis_client import with_redis
+from env import QuerybookSettings
+from lib.logger import get_logger
+from lib.stats_logger import stats_logger
+from lib.utils.cache import LRUCache
+
+LOG = get_logger(__file__)
+
+SEARCH_CACHE_TTL = QuerybookSettings.ELASTICSEARCH_SEARCH_CACHE_TTL
+LOCAL_SEARCH_CACHE_SIZE = 1000
+
+# The generation is always read from Redis, so the in process
+# cache never returns responses from before the last write
+_local_search_cache = LRUCache(
+    max_size=LOCAL_SEARCH_CACHE_SIZE, ttl_secs=SEARCH_CACHE_TTL
+)
+
+
+def _get_generation_key(index_name: str) -> str:
+    return "elasticsearch_generation:{}".format(index_name)
+
+
+def _get_response_key(index_name: str, generation: int, query: Union[Dict, str]):
+    if isinstance(query, str):
+        query = json.loads(query)
+    normalized_query = json.dumps(query, sort_keys=True, separators=(",", ":"))
+    return "elasticsearch_search:{}:{}:{}".format(
+        index_name, generation, hashlib.md5(normalized_query.encode()).hexdigest()
+    )
+
+
+@with_redis
+def bump_index_generation(index_name: str, redis_conn=None):
+    """Invalidate the cached responses of the index, call it after every write"""
+    redis_conn.incr(_get_generation_key(index_name))
+
+
+@with_redis
+def cached_search(
+    index_name: str, query: Union[Dict, str], search: Callable, redis_conn=None
+):
+    """Return the cached response of the query or run the search
+
+    Arguments:
+        index_name {str} -- Index or alias searched, must be the one
+                            passed to bump_index_generation on writes
+        query {Union[Dict, str]} -- ES query body. It must contain everything
+                                    the response depends on, including the
+                                    caller's permission scope (e.g user id)
+        search {Callable} -- Runs the query and returns the ES response, or
+                             None if the search failed, which is not cached
+
+    Returns:
+        Dict -- The ES response, do not mutate it since it is shared
+    """
+    if SEARCH_CACHE_TTL <= 0:
+        return search()
+
+    tags = {"index": index_name}
+    try:
+        generation = int(redis_conn.get(_get_generation_key(index_name)) or 0)
+        response_key = _get_response_key(index_name, generation, query)
+
+        response = _local_search_cache.get(response_key)
+        if response is not None:
+            stats_logger.incr("elasticsearch.search_cache.hit", tags=tags)
+            return response
+
+        raw_response = redis_conn.get(response_key)
+    except Exception as e:
+        # Search keeps working without the cache if Redis is down
+        LOG.warning("Cannot read search cache: {}".format(e))
+        return search()
+
+    if raw_response is not None:
+        response = json.loads(raw_response)
+        _local_search_cache.set(response_key, response)
+        stats_logger.incr("elasticsearch.search_cache.hit", tags=tags)
+        return response
+
+    stats_logger.incr("elasticsearch.search_cache.miss", tags=tags)
+    response = search()
+    if response is not None:
+        _local_search_cache.set(response_key, response)
+        try:
+            redis_conn.set(response_key, json.dumps(response), ex=SEARCH_CACHE_TTL)
+        except Exception as e:
+            LOG.warning("Cannot write search cache: {}".format(e))
+    return response
@@ -0,0 +1,70 @@
+"""Queue of items whose search documents are out of date
+
+Each item type has a Redis sorted set of dirty ids scored by the time they
+were first queued. Queueing an id that is already dirty is a no-op, so any
+number of updates of an item before the queue is drained result in a single
+document update.
+"""
+import time
+from typing import Dict, List, Tuple
+
+from clients.redis_client import with_redis
+
+
+def _get_queue_key(item_type: str) -> str:
+    return "elasticsearch_sync_queue:{}".format(item_type)
+
+
+@with_redis
+def queue_item_sync(item_type: str, item_id: int, redis_conn=None):
+    # nx keeps the time the item was first queued to measure the lag
+    redis_conn.zadd(_get_queue_key(item_type), {item_id: time.time()}, nx=True)
+
+
+@with_redis
+def queue_items_sync(item_type: str, item_ids: List[int], redis_conn=None):
+    if item_ids:
+        now = time.time()
+        redis_conn.zadd(
+            _get_queue_key(item_type), {item_id: now for item_id in item_ids}, nx=True
+        )
+
+
+@with_redis
+def pop_queued_items(
+    item_type: str, batch_size: int, redis_conn=None
+) -> List[Tuple[int, float]]:
+    """Remove and return the batch_size oldest queued items
+
+    Returns:
+        List[Tuple[int, float]] -- (item id, time queued) pairs
+    """
+    queue_key = _get_queue_key(item_type)
+    with redis_conn.pipeline() as pipe:
+        pipe.zrange(queue_key, 0, batch_size - 1, withscores=True)
+        pipe.zremrangebyrank(queue_key, 0, batch_size - 1)
+        queued_items, _ = pipe.execute()
+    return [(int(item_id), queued_at) for item_id, queued_at in queued_items]
+
+
+@with_redis
+def requeue_items(item_type: str, queued_at_by_id: Dict[int, float], redis_conn=None):
+    """Put back items that failed to sync, with their original queue time"""
+    if queued_at_by_id:
+        redis_conn.zadd(_get_queue_key(item_type), queued_at_by_id, nx=True)
+
+
+@with_redis
+def get_queue_size_and_lag(item_type: str, redis_conn=None) -> Tuple[int, float]:
+    """
+    Returns:
+        Tuple[int, float] -- Number of queued items and seconds
+                             since the oldest one was queued
+    """
+    queue_key = _get_queue_key(item_type)
+    with redis_conn.pipeline() as pipe:
+        pipe.zcard(queue_key)
+        pipe.zrange(queue_key, 0, 0, withscores=True)
+        size, oldest_items = pipe.execute()
+    lag = time.time() - oldest_items[0][1] if oldest_items else 0
+    return size, lag
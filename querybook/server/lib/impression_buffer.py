@@ -0,0 +1,102 @@
+"""Buffer of impressions waiting to be written to the database
+
+Viewing an item appends the impression to a Redis list, which is flushed
+into the impression table with bulk inserts by a periodic task. Views of
+an item by the same user can be recorded once per dedup window.
+"""
+import json
+import time
+from typing import List, Tuple
+
+from clients.redis_client import with_redis
+
+IMPRESSION_BUFFER_KEY = "impression_buffer"
+# Impressions that could not be written, kept for inspection
+IMPRESSION_DEAD_LETTER_KEY = "impression_buffer:dead_letter"
+
+# KEYS: dedup key of the view, the buffer
+# ARGV: dedup window in seconds, the impression
+BUFFER_DEDUPED_IMPRESSION_SCRIPT = """
+if redis.call("SET", KEYS[1], 1, "NX", "EX", ARGV[1]) then
+    redis.call("RPUSH", KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# item id, item type value, uid, time viewed and, once requeued,
+# the number of failed attempts to write it
+BufferedImpression = Tuple
+
+
+@with_redis
+def buffer_impression(
+    item_id: int, item_type: int, uid: int, dedup_window: int = 0, redis_conn=None
+) -> bool:
+    """Add the impression to the buffer
+
+    Arguments:
+        item_id {int}
+        item_type {int} -- Value of ImpressionItemType
+        uid {int}
+        dedup_window {int} -- If not 0, only the first view of the item by
+                              the user in each window of that many seconds
+                              is recorded
+
+    Returns:
+        bool -- False if it is deduped
+    """
+    now = time.time()
+    impression = json.dumps([item_id, item_type, uid, now])
+    if not dedup_window:
+        redis_conn.rpush(IMPRESSION_BUFFER_KEY, impression)
+        return True
+
+    window = int(now // dedup_window)
+    dedup_key = f"impression_dedup:{item_type}:{item_id}:{uid}:{window}"
+    buffer_deduped_impression = redis_conn.register_script(
+        BUFFER_DEDUPED_IMPRESSION_SCRIPT
+    )
+    return (
+        buffer_deduped_impression(
+            keys=[dedup_key, IMPRESSION_BUFFER_KEY], args=[dedup_window, impression],
+        )
+        == 1
+    )
+
+
+@with_redis
+def pop_buffered_impressions(
+    batch_size: int, redis_conn=None
+) -> List[BufferedImpression]:
+    """Remove and return the batch_size oldest impressions"""
+    with redis_conn.pipeline() as pipe:
+        pipe.lrange(IMPRESSION_BUFFER_KEY, 0, batch_size - 1)
+        pipe.ltrim(IMPRESSION_BUFFER_KEY, batch_size, -1)
+        raw_impressions, _ = pipe.execute()
+    return [tuple(json.loads(raw)) for raw in raw_impressions]
+
+
+@with_redis
+def requeue_impressions(impressions: List[BufferedImpression], redis_conn=None):
+    """Put back impressions that failed to be written, at the head of the buffer"""
+    if impressions:
+        redis_conn.lpush(
+            IMPRESSION_BUFFER_KEY,
+            *[json.dumps(impression) for impression in reversed(impressions)],
+        )
+
+
+@with_redis
+def dead_letter_impressions(impressions: List[BufferedImpression], redis_conn=None):
+    """Move impressions that cannot be written out of the buffer"""
+    if impressions:
+        redis_conn.rpush(
+            IMPRESSION_DEAD_LETTER_KEY,
+            *[json.dumps(impression) for impression in impressions],
+        )
+
+
+@with_redis
+def get_impression_buffer_size(redis_conn=None) -> int:
+    return redis_conn.llen(IMPRESSION_BUFFER_KEY)
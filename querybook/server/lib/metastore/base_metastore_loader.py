@@ -1,7 +1,7 @@
 from abc import ABCMeta, abstractmethod, abstractclassmethod
 import gevent
 import math
-from typing import NamedTuple, List, Dict, Tuple
+from typing import NamedTuple, List, Dict, Optional, Tuple
 import traceback
 
 from app.db import DBSession, with_session
@@ -119,6 +119,7 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
 
     def load(self):
         schema_tables = []
+        loaded_schema_tables = []
         schema_names = set(self._get_all_filtered_schema_names())
 
         with DBSession() as session:
@@ -126,7 +127,17 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
                 self.metastore_id, schema_names, session=session
             )
             for schema_name in schema_names:
-                table_names = self._get_all_filtered_table_names(schema_name)
+                # Loaders that support batched reads return every table
+                # of the schema at once, otherwise (or if the batched read
+                # failed) tables are loaded one by one
+                tables_and_columns = self._get_all_filtered_tables_and_columns_in_schema(
+                    schema_name
+                )
+                if tables_and_columns is None:
+                    table_names = self._get_all_filtered_table_names(schema_name)
+                else:
+                    table_names = [table.name for table, _ in tables_and_columns]
+
                 schema_id = create_schema(
                     name=schema_name,
                     table_count=len(table_names),
@@ -134,22 +145,38 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
                     session=session,
                 ).id
                 delete_table_not_in_metastore(schema_id, table_names, session=session)
-                schema_tables += [
-                    (schema_id, schema_name, table_name) for table_name in table_names
-                ]
+
+                if tables_and_columns is None:
+                    schema_tables += [
+                        (schema_id, schema_name, table_name)
+                        for table_name in table_names
+                    ]
+                else:
+                    loaded_schema_tables += [
+                        (schema_id, table, columns)
+                        for table, columns in tables_and_columns
+                    ]
         self._create_tables_batched(schema_tables)
+        self._create_tables_batched(
+            loaded_schema_tables, create_tables=self._create_loaded_tables
+        )
 
     def get_latest_partition(self, schema_name, table_name):
         partitions = self.get_partitions(schema_name, table_name)
         latest_partition = partitions[-1] if partitions and len(partitions) else None
         return latest_partition
 
-    def _create_tables_batched(self, schema_tables):
+    def _create_tables_batched(self, schema_tables, create_tables=None):
         """Create greenlets for create table batches
 
         Arguments:
             schema_tables {List[schema_id, schema_name, table_name]} -- List of configs to load table
+
+        Keyword Arguments:
+            create_tables {Callable} -- Function that creates a batch of schema_tables,
+                                        defaults to self._create_tables
         """
+        create_tables = create_tables or self._create_tables
         batch_size = self._get_batch_size(len(schema_tables))
         greenlets = []
         thread_num = 0
@@ -160,7 +187,7 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
             thread_num += 1
 
             if len(table_batch):
-                greenlets.append(gevent.spawn(self._create_tables, table_batch))
+                greenlets.append(gevent.spawn(create_tables, table_batch))
             else:
                 break
         gevent.joinall(greenlets)
@@ -170,6 +197,13 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
             for (schema_id, schema_name, table) in schema_tables:
                 self._create_table_table(schema_id, schema_name, table, session=session)
 
+    def _create_loaded_tables(self, loaded_schema_tables):
+        with DBSession() as session:
+            for (schema_id, table, columns) in loaded_schema_tables:
+                self._create_table_and_columns(
+                    schema_id, table, columns, session=session
+                )
+
     @with_session
     def _create_table_table(self, schema_id, schema_name, table_name, session=None):
         table = None
@@ -183,6 +217,12 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         if not table:
             return
 
+        return self._create_table_and_columns(
+            schema_id, table, columns, session=session
+        )
+
+    @with_session
+    def _create_table_and_columns(self, schema_id, table, columns, session=None):
         try:
             table_id = create_table(
                 name=table.name,
@@ -240,6 +280,20 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
             if self.acl_checker.is_table_valid(schema_name, table_name)
         ]
 
+    @with_exception
+    def _get_all_filtered_tables_and_columns_in_schema(
+        self, schema_name: str
+    ) -> Optional[List[Tuple[DataTable, List[DataColumn]]]]:
+        tables_and_columns = self.get_all_tables_and_columns_in_schema(schema_name)
+        if tables_and_columns is None:
+            return None
+
+        return [
+            (table, columns)
+            for table, columns in tables_and_columns
+            if self.acl_checker.is_table_valid(schema_name, table.name)
+        ]
+
     def _get_batch_size(self, num_tables: int):
         parallelization_setting = self._get_parallelization_setting()
         num_threads = parallelization_setting["num_threads"]
@@ -293,6 +347,22 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         """
         pass
 
+    def get_all_tables_and_columns_in_schema(
+        self, schema_name: str
+    ) -> Optional[List[Tuple[DataTable, List[DataColumn]]]]:
+        """Override this to load all tables (and their columns) under given schema
+           in batch, which is much faster if the metastore supports batched reads.
+           Returns None by default, so tables are loaded one by one
+           with get_table_and_columns.
+
+        Arguments:
+            schema_name {str}
+
+        Returns:
+            Optional[List[Tuple[DataTable, List[DataColumn]]]] -- [A list of tables with their columns]
+        """
+        return None
+
     @abstractclassmethod
     def get_metastore_params_template(self) -> AllFormField:
         """Override this to get the form field required for the metastore
@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Dict, List, Tuple
 
+from gevent.pool import Pool
+
 from clients.glue_client import GlueDataCatalogClient
 from lib.form import StructFormField, FormField, FormFieldType
 from lib.metastore.base_metastore_loader import (
@@ -46,16 +48,59 @@ class GlueDataCatalogLoader(BaseMetastoreLoader):
     def get_all_table_names_in_schema(self, schema_name: str) -> List[str]:
         return self.glue_client.get_all_table_names(schema_name)
 
+    def get_all_tables_and_columns_in_schema(
+        self, schema_name: str
+    ) -> List[Tuple[DataTable, List[DataColumn]]]:
+        # GetTables already returns the full table definitions,
+        # so the whole schema is loaded with a few paginated calls
+        glue_tables = self.glue_client.get_all_tables(schema_name).get("TableList")
+
+        if self.load_partitions:
+            # Partitions are not part of GetTables, fetch them with
+            # a bounded pool to stay within the Glue API rate limit
+            pool = Pool(self._get_parallelization_setting()["num_threads"])
+            tables_partitions = pool.map(
+                lambda glue_table: self._get_glue_table_partitions(
+                    schema_name, glue_table
+                ),
+                glue_tables,
+            )
+        else:
+            tables_partitions = [[]] * len(glue_tables)
+
+        return [
+            self._glue_table_to_table_and_columns(glue_table, partitions)
+            for glue_table, partitions in zip(glue_tables, tables_partitions)
+        ]
+
     def get_table_and_columns(
         self, schema_name: str, table_name: str
     ) -> Tuple[DataTable, List[DataColumn]]:
         glue_table = self.glue_client.get_table(schema_name, table_name).get("Table")
 
         if self.load_partitions:
-            partitions = self.get_partitions(schema_name, table_name)
+            partitions = self._get_glue_table_partitions(schema_name, glue_table)
         else:
             partitions = []
 
+        return self._glue_table_to_table_and_columns(glue_table, partitions)
+
+    def get_partitions(self, schema_name: str, table_name: str) -> List[str]:
+        return self.glue_client.get_hms_style_partitions(schema_name, table_name)
+
+    def _get_glue_table_partitions(
+        self, schema_name: str, glue_table: Dict
+    ) -> List[str]:
+        return self.glue_client.get_hms_style_partitions(
+            schema_name,
+            glue_table.get("Name"),
+            partition_keys=glue_table.get("PartitionKeys", []),
+        )
+
+    @staticmethod
+    def _glue_table_to_table_and_columns(
+        glue_table: Dict, partitions: List[str]
+    ) -> Tuple[DataTable, List[DataColumn]]:
         table = DataTable(
             name=glue_table.get("Name"),
             type=glue_table.get("TableType"),
@@ -85,9 +130,6 @@ class GlueDataCatalogLoader(BaseMetastoreLoader):
 
         return table, columns
 
-    def get_partitions(self, schema_name: str, table_name: str) -> List[str]:
-        return self.glue_client.get_hms_style_partitions(schema_name, table_name)
-
     @staticmethod
     def _get_glue_data_catalog_client(catalog_id, region):
         return GlueDataCatalogClient(catalog_id, region)
@@ -1,12 +1,53 @@
 from typing import List, Tuple
 
+from sqlalchemy import text
+
 from lib.utils.utils import DATETIME_TO_UTC
 from lib.utils import json as ujson
 from lib.metastore.base_metastore_loader import DataTable, DataColumn
-from .sqlalchemy_metastore_loader import SqlAlchemyMetastoreLoader
+from .sqlalchemy_metastore_loader import (
+    SqlAlchemyMetastoreLoader,
+    _column_info_to_data_column,
+)
 
 
 class MysqlMetastoreLoader(SqlAlchemyMetastoreLoader):
+    def get_all_tables_and_columns_in_schema(
+        self, schema_name: str
+    ) -> List[Tuple[DataTable, List[DataColumn]]]:
+        """The tables of the schema are read with a single query. Their
+           columns come from the inspector like in get_table_and_columns,
+           since information_schema does not give the types and defaults
+           of SHOW CREATE TABLE (e.g INT(11) for INTEGER(11), quoted
+           defaults and CHARACTER SET/COLLATE).
+        """
+        rows = self._conn.execute(
+            text(
+                """
+            SELECT
+                TABLE_NAME,
+                TABLE_TYPE,
+                CREATE_TIME,
+                UPDATE_TIME,
+                data_length + index_length
+            FROM
+                INFORMATION_SCHEMA.TABLES
+            WHERE
+                TABLE_SCHEMA = :schema_name AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_NAME
+        """
+            ),
+            schema_name=schema_name,
+        ).fetchall()
+
+        return [
+            (
+                self._raw_table_info_to_table(row[0], row[1:]),
+                self._get_columns(schema_name, row[0]),
+            )
+            for row in rows
+        ]
+
     def get_table_and_columns(
         self, schema_name, table_name
     ) -> Tuple[DataTable, List[DataColumn]]:
@@ -32,7 +73,24 @@ class MysqlMetastoreLoader(SqlAlchemyMetastoreLoader):
         if not raw_table_info:
             return None, []
 
-        table = DataTable(
+        table = self._raw_table_info_to_table(table_name, raw_table_info)
+        columns = self._get_columns(schema_name, table_name)
+
+        return table, columns
+
+    def _get_columns(self, schema_name: str, table_name: str) -> List[DataColumn]:
+        raw_columns = self._inspect.get_columns(
+            table_name=table_name, schema=schema_name
+        )
+        return list(map(_column_info_to_data_column, raw_columns))
+
+    @staticmethod
+    def _raw_table_info_to_table(table_name: str, raw_table_info) -> DataTable:
+        """
+        Arguments:
+            raw_table_info -- (TABLE_TYPE, CREATE_TIME, UPDATE_TIME, data size)
+        """
+        return DataTable(
             name=table_name,
             type=raw_table_info[0],
             owner=None,
@@ -48,19 +106,3 @@ class MysqlMetastoreLoader(SqlAlchemyMetastoreLoader):
             partitions=None,
             raw_description=ujson.pdumps(list(raw_table_info)),
         )
-
-        raw_columns = self._inspect.get_columns(
-            table_name=table_name, schema=schema_name
-        )
-        columns = list(
-            map(
-                lambda col: DataColumn(
-                    name=col["name"],
-                    type=str(col["type"]),
-                    comment=f"Default:{col['default']} Nullable:{col['nullable']}",
-                ),
-                raw_columns,
-            )
-        )
-
-        return table, columns
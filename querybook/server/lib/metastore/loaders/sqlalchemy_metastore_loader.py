@@ -1,5 +1,8 @@
+from itertools import groupby
 from typing import Dict, List, Tuple
 
+from sqlalchemy import text
+
 from lib.metastore.base_metastore_loader import (
     BaseMetastoreLoader,
     DataTable,
@@ -9,6 +12,11 @@ from lib.query_executor.executor_template.templates import sqlalchemy_template
 from lib.query_executor.connection_string.sqlalchemy import create_sqlalchemy_engine
 
 
+# Dialects whose columns of a whole schema are read with a single query,
+# parsed the same way the inspector does so both give the same columns
+BULK_REFLECTION_DIALECTS = {"postgresql", "sqlite"}
+
+
 class SqlAlchemyMetastoreLoader(BaseMetastoreLoader):
     def __init__(self, metastore_dict: Dict):
         self._engine, self._inspect, self._conn = self._get_sqlalchemy(metastore_dict)
@@ -29,6 +37,25 @@ class SqlAlchemyMetastoreLoader(BaseMetastoreLoader):
     def get_all_table_names_in_schema(self, schema_name: str) -> List[str]:
         return self._inspect.get_table_names(schema=schema_name)
 
+    def get_all_tables_and_columns_in_schema(
+        self, schema_name: str
+    ) -> List[Tuple[DataTable, List[DataColumn]]]:
+        dialect_name = self._engine.dialect.name
+        if dialect_name not in BULK_REFLECTION_DIALECTS:
+            # Fallback to reflect the tables one by one with the inspector
+            return None
+
+        if dialect_name == "sqlite":
+            raw_columns = self._get_sqlite_raw_columns(schema_name)
+        else:
+            raw_columns = self._get_postgresql_raw_columns(schema_name)
+        return [
+            self._raw_columns_to_table_and_columns(table_name, list(table_raw_columns))
+            for table_name, table_raw_columns in groupby(
+                raw_columns, key=lambda raw_column: raw_column[0]
+            )
+        ]
+
     def get_table_and_columns(
         self, schema_name, table_name
     ) -> Tuple[DataTable, List[DataColumn]]:
@@ -53,17 +80,144 @@ class SqlAlchemyMetastoreLoader(BaseMetastoreLoader):
         raw_columns = self._inspect.get_columns(
             table_name=table_name, schema=schema_name
         )
-        columns = list(
-            map(
-                lambda col: DataColumn(
-                    name=col["name"],
-                    type=str(col["type"]),
-                    comment=f"Default:{col['default']} Nullable:{col['nullable']}",
+        columns = list(map(_column_info_to_data_column, raw_columns))
+
+        return table, columns
+
+    def _get_postgresql_raw_columns(self, schema_name: str) -> List[Tuple]:
+        """Same columns as PGDialect.get_columns, for all the tables of
+           the schema (the ones of PGDialect.get_table_names)
+
+        Returns:
+            List[Tuple] -- (table name, column info) ordered by table name,
+                           column info is None for tables without columns
+        """
+        dialect = self._engine.dialect
+        rows = self._conn.execute(
+            text(
+                """
+            SELECT
+                c.relname,
+                a.attname,
+                pg_catalog.format_type(a.atttypid, a.atttypmod),
+                (
+                    SELECT pg_catalog.pg_get_expr(d.adbin, d.adrelid)
+                    FROM pg_catalog.pg_attrdef d
+                    WHERE d.adrelid = a.attrelid AND d.adnum = a.attnum
+                    AND a.atthasdef
+                ),
+                a.attnotnull
+            FROM
+                pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_catalog.pg_attribute a
+                ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+            WHERE
+                n.nspname = :schema_name AND c.relkind IN ('r', 'p')
+            ORDER BY c.relname, a.attnum
+        """
+            ),
+            schema_name=schema_name,
+        ).fetchall()
+
+        # Loaded the same way as in PGDialect.get_columns
+        domains = dialect._load_domains(self._conn)
+        enums = dict(
+            ((enum["name"],), enum)
+            if enum["visible"]
+            else ((enum["schema"], enum["name"]), enum)
+            for enum in dialect._load_enums(self._conn, schema="*")
+        )
+        return [
+            (
+                table_name,
+                None
+                if column_name is None
+                else dialect._get_column_info(
+                    column_name,
+                    format_type,
+                    default,
+                    not_null,
+                    domains,
+                    enums,
+                    schema_name,
+                    None,  # comment
+                    None,  # generated
                 ),
-                raw_columns,
             )
+            for (table_name, column_name, format_type, default, not_null) in rows
+        ]
+
+    def _get_sqlite_raw_columns(self, schema_name: str) -> List[Tuple]:
+        """SQLite has no information_schema, but the table valued
+           pragma_table_info can be joined with sqlite_master instead.
+           Columns are parsed like in SQLiteDialect.get_columns.
+
+        Returns:
+            List[Tuple] -- (table name, column info) ordered by table name,
+                           column info is None for tables without columns
+        """
+        dialect = self._engine.dialect
+        quoted_schema_name = dialect.identifier_preparer.quote_identifier(schema_name)
+        rows = self._conn.execute(
+            text(
+                f"""
+            SELECT
+                m.name,
+                p.name,
+                p.type,
+                p.dflt_value,
+                p."notnull"
+            FROM
+                {quoted_schema_name}.sqlite_master m
+            LEFT JOIN pragma_table_info(m.name, :schema_name) p
+            WHERE
+                m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~'
+            ORDER BY m.name, p.cid
+        """
+            ),
+            schema_name=schema_name,
+        )
+
+        return [
+            (
+                table_name,
+                None
+                if column_name is None
+                else {
+                    "name": column_name,
+                    "type": dialect._resolve_type_affinity(column_type.upper()),
+                    "nullable": not not_null,
+                    "default": None if column_default is None else str(column_default),
+                },
+            )
+            for (table_name, column_name, column_type, column_default, not_null) in rows
+        ]
+
+    def _raw_columns_to_table_and_columns(
+        self, table_name: str, raw_columns: List[Tuple]
+    ) -> Tuple[DataTable, List[DataColumn]]:
+        # Same as get_table_and_columns
+        table = DataTable(
+            name=table_name,
+            type=None,
+            owner=None,
+            table_created_at=None,
+            table_updated_by=None,
+            table_updated_at=None,
+            data_size_bytes=None,
+            location=None,
+            partitions=None,
+            raw_description="",
         )
 
+        columns = [
+            _column_info_to_data_column(column_info)
+            for _, column_info in raw_columns
+            # Tables without any column are joined with a row of nulls
+            if column_info is not None
+        ]
+
         return table, columns
 
     def _get_sqlalchemy(self, metastore_dict):
@@ -74,3 +228,15 @@ class SqlAlchemyMetastoreLoader(BaseMetastoreLoader):
         conn = engine.connect()
 
         return engine, inspect, conn
+
+
+def _column_info_to_data_column(column_info: Dict) -> DataColumn:
+    """
+    Arguments:
+        column_info {Dict} -- A column as returned by Inspector.get_columns
+    """
+    return DataColumn(
+        name=column_info["name"],
+        type=str(column_info["type"]),
+        comment=f"Default:{column_info['default']} Nullable:{column_info['nullable']}",
+    )
@@ -1,8 +1,12 @@
-from typing import List
+from collections import defaultdict
+from typing import List, Tuple
 
 from .all_result_stores import ALL_RESULT_STORES
 from .stores.base_store import BaseReader, BaseUploader
 from env import QuerybookSettings
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
 
 
 class GenericUploader(BaseUploader):
@@ -61,3 +65,43 @@ class GenericReader(BaseReader):
     def end(self):
         self._reader.end()
         self._reader = None
+
+
+def has_result_store_deleter(uri: str) -> bool:
+    """Whether the object of uri can be deleted, the logs
+       streamed to the database (stream://) have no object
+    """
+    store = ALL_RESULT_STORES.get(uri.split("://")[0])
+    return store is not None and store.deleter is not None
+
+
+def delete_result_store_objects(uris: List[str]) -> Tuple[int, List[str]]:
+    """Delete the objects with the deleters of their stores,
+       each is called with at most its max_batch_size uris
+
+    Arguments:
+        uris {List[str]} -- Uris with their store type, such as s3://...
+
+    Returns:
+        Tuple[int, List[str]] -- Bytes reclaimed and the uris that failed
+    """
+    uris_by_store_type = defaultdict(list)
+    for uri in uris:
+        if has_result_store_deleter(uri):
+            uris_by_store_type[uri.split("://")[0]].append(uri)
+
+    bytes_reclaimed = 0
+    failed_uris = []
+    for store_type, store_uris in uris_by_store_type.items():
+        deleter = ALL_RESULT_STORES[store_type].deleter()
+        batch_size = deleter.max_batch_size
+        for i in range(0, len(store_uris), batch_size):
+            batch = store_uris[i : i + batch_size]
+            try:
+                bytes_reclaimed += deleter.delete(
+                    [uri.split("://")[1] for uri in batch]
+                )
+            except Exception:
+                LOG.exception(f"Failed to delete {len(batch)} {store_type} objects")
+                failed_uris.extend(batch)
+    return bytes_reclaimed, failed_uris
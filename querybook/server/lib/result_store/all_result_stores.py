@@ -1,20 +1,24 @@
 from collections import namedtuple
 
 from lib.utils.plugin import import_plugin
-from .stores.db_store import DBReader, DBUploader
-from .stores.s3_store import S3Reader, S3Uploader
-from .stores.google_store import GoogleReader, GoogleUploader
-from .stores.file_store import FileReader, FileUploader
+from .stores.db_store import DBReader, DBUploader, DBDeleter
+from .stores.s3_store import S3Reader, S3Uploader, S3Deleter
+from .stores.google_store import GoogleReader, GoogleUploader, GoogleDeleter
+from .stores.file_store import FileReader, FileUploader, FileDeleter
 
 ALL_PLUGIN_RESULT_STORES = import_plugin(
     "result_store_plugin", "ALL_PLUGIN_RESULT_STORES", {}
 )
 
-ResultStore = namedtuple("ResultStore", ["reader", "uploader"])
+# Stores without a deleter keep their objects when the executions are deleted
+ResultStore = namedtuple(
+    "ResultStore", ["reader", "uploader", "deleter"], defaults=[None]
+)
 ALL_RESULT_STORES = {
-    "db": ResultStore(DBReader, DBUploader),
-    "s3": ResultStore(S3Reader, S3Uploader),
-    "gcs": ResultStore(GoogleReader, GoogleUploader),  # Google Cloud Storage
-    "file": ResultStore(FileReader, FileUploader),
+    "db": ResultStore(DBReader, DBUploader, DBDeleter),
+    "s3": ResultStore(S3Reader, S3Uploader, S3Deleter),
+    # Google Cloud Storage
+    "gcs": ResultStore(GoogleReader, GoogleUploader, GoogleDeleter),
+    "file": ResultStore(FileReader, FileUploader, FileDeleter),
     **ALL_PLUGIN_RESULT_STORES,
 }
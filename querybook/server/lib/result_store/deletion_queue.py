@@ -0,0 +1,40 @@
+"""Queue of result store objects waiting to be deleted
+
+The retention jobs add the result and log uris of the executions they
+delete, once the rows are gone, to a Redis list which is drained with the
+bulk deleters of the result stores. Uris that fail to be deleted are put
+back to be retried on the next run.
+"""
+from typing import List
+
+from clients.redis_client import with_redis
+
+RESULT_STORE_DELETION_QUEUE_KEY = "result_store_deletion_queue"
+
+
+@with_redis
+def enqueue_result_store_objects(uris: List[str], redis_conn=None):
+    if uris:
+        redis_conn.rpush(RESULT_STORE_DELETION_QUEUE_KEY, *uris)
+
+
+@with_redis
+def pop_result_store_objects(batch_size: int, redis_conn=None) -> List[str]:
+    """Remove and return the batch_size oldest uris"""
+    with redis_conn.pipeline() as pipe:
+        pipe.lrange(RESULT_STORE_DELETION_QUEUE_KEY, 0, batch_size - 1)
+        pipe.ltrim(RESULT_STORE_DELETION_QUEUE_KEY, batch_size, -1)
+        raw_uris, _ = pipe.execute()
+    return [raw_uri.decode("utf-8") for raw_uri in raw_uris]
+
+
+@with_redis
+def requeue_result_store_objects(uris: List[str], redis_conn=None):
+    """Put back uris that failed to be deleted"""
+    if uris:
+        redis_conn.lpush(RESULT_STORE_DELETION_QUEUE_KEY, *reversed(uris))
+
+
+@with_redis
+def get_result_store_deletion_queue_size(redis_conn=None) -> int:
+    return redis_conn.llen(RESULT_STORE_DELETION_QUEUE_KEY)
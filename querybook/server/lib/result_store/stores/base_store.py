@@ -127,3 +127,24 @@ class BaseReader(ABC):
             str: the downloadable url
         """
         pass
+
+
+class BaseDeleter(ABC):
+    """Base interface for result deleter, which removes many
+       stored objects at once
+    """
+
+    # The most uris that can be passed to delete
+    max_batch_size = 1000
+
+    @abstractmethod
+    def delete(self, uris: List[str]) -> int:
+        """Delete the objects of the uris, missing ones are ignored
+
+        Arguments:
+            uris {List[str]} -- At most max_batch_size uris
+
+        Returns:
+            int -- Number of bytes reclaimed, 0 if the store cannot tell
+        """
+        pass
@@ -1,10 +1,11 @@
 from typing import List
 
 from env import QuerybookSettings
-from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.stores.base_store import BaseDeleter, BaseReader, BaseUploader
 from logic.result_store import (
     get_key_value_store,
     create_key_value_store,
+    delete_key_value_stores,
     string_to_csv,
 )
 
@@ -80,3 +81,8 @@ class DBUploader(BaseUploader):
     def end(self):
         create_key_value_store(key=self._uri, value="".join(self._chunks))
         self._reset_variables()
+
+
+class DBDeleter(BaseDeleter):
+    def delete(self, uris: List[str]) -> int:
+        return delete_key_value_stores(uris)
@@ -1,6 +1,8 @@
 import csv
 import os
-from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from typing import List
+
+from lib.result_store.stores.base_store import BaseDeleter, BaseReader, BaseUploader
 from env import QuerybookSettings
 
 # to use, enable docker volume inside docker-compose.yml
@@ -88,3 +90,14 @@ class FileReader(BaseReader):
 
     def get_download_url(self, custom_name=None):
         return None
+
+
+class FileDeleter(BaseDeleter):
+    def delete(self, uris: List[str]) -> int:
+        bytes_reclaimed = 0
+        for uri in uris:
+            path = get_file_uri(uri)
+            if os.path.exists(path):
+                bytes_reclaimed += os.path.getsize(path)
+                os.remove(path)
+        return bytes_reclaimed
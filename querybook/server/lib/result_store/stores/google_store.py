@@ -4,8 +4,9 @@ from clients.google_client import (
     GoogleUploadClient,
     GoogleDownloadClient,
     GoogleKeySigner,
+    GoogleBlobDeleter,
 )
-from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.stores.base_store import BaseDeleter, BaseReader, BaseUploader
 from env import QuerybookSettings
 
 
@@ -79,3 +80,15 @@ class GoogleReader(BaseReader):
     @property
     def uri(self):
         return f"{QuerybookSettings.STORE_PATH_PREFIX}{self._uri}"
+
+
+class GoogleDeleter(BaseDeleter):
+    max_batch_size = GoogleBlobDeleter.MAX_BLOBS
+
+    def delete(self, uris: List[str]) -> int:
+        deleter = GoogleBlobDeleter(QuerybookSettings.STORE_BUCKET_NAME)
+        deleter.delete_blobs(
+            [f"{QuerybookSettings.STORE_PATH_PREFIX}{uri}" for uri in uris]
+        )
+        # Sizes are unknown without requesting each blob
+        return 0
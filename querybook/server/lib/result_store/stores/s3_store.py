@@ -1,8 +1,13 @@
 from typing import List
 
-from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.stores.base_store import BaseDeleter, BaseReader, BaseUploader
 from env import QuerybookSettings
-from clients.s3_client import MultiPartUploader, S3FileReader, S3KeySigner
+from clients.s3_client import (
+    MultiPartUploader,
+    S3FileReader,
+    S3KeyDeleter,
+    S3KeySigner,
+)
 
 
 class S3Uploader(BaseUploader):
@@ -70,3 +75,17 @@ class S3Reader(BaseReader):
     @property
     def uri(self):
         return f"{QuerybookSettings.STORE_PATH_PREFIX}{self._uri}"
+
+
+class S3Deleter(BaseDeleter):
+    max_batch_size = S3KeyDeleter.MAX_KEYS
+
+    def delete(self, uris: List[str]) -> int:
+        deleter = S3KeyDeleter(QuerybookSettings.STORE_BUCKET_NAME)
+        failed_keys = deleter.delete_keys(
+            [f"{QuerybookSettings.STORE_PATH_PREFIX}{uri}" for uri in uris]
+        )
+        if failed_keys:
+            raise Exception(f"Failed to delete {len(failed_keys)} keys from s3")
+        # Sizes are unknown without requesting each object
+        return 0
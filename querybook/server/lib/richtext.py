@@ -1,6 +1,6 @@
 from html import escape as htmlescape
+from html.parser import HTMLParser
 import json
-from bs4 import BeautifulSoup
 
 
 def richtext_to_plaintext(text, default="", escape=False) -> str:
@@ -15,13 +15,20 @@ def richtext_to_plaintext(text, default="", escape=False) -> str:
 
 
 def try_parse_draftjs(text) -> str:
+    # DraftJS content states are JSON objects, skip parsing anything else
+    if not text.lstrip().startswith("{"):
+        return False, text
+
     try:
         content_state = json.loads(text)
-        return True, draftjs_content_state_to_plaintext(content_state)
     except json.decoder.JSONDecodeError:
         # For old text cells the value was plain text
         return False, text
 
+    if not isinstance(content_state, dict):
+        return False, text
+    return True, draftjs_content_state_to_plaintext(content_state)
+
 
 def draftjs_content_state_to_plaintext(content_state) -> str:
     blocks = content_state.get("blocks", [])
@@ -30,6 +37,39 @@ def draftjs_content_state_to_plaintext(content_state) -> str:
     return joined_blocks
 
 
+class _TextExtractor(HTMLParser):
+    """Collects the text of an html document without building a tree"""
+
+    NON_TEXT_TAGS = ("script", "style")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.texts = []
+        self._non_text_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.NON_TEXT_TAGS:
+            self._non_text_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.NON_TEXT_TAGS and self._non_text_depth > 0:
+            self._non_text_depth -= 1
+
+    def handle_data(self, data):
+        if not self._non_text_depth:
+            self.texts.append(data)
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self.handle_data(data[len("CDATA[") :])
+
+
 def html_to_plaintext(html) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    return soup.getText()
+    if "<" not in html and "&" not in html:
+        # Nothing to strip or unescape
+        return html
+
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return "".join(extractor.texts)
@@ -2,4 +2,23 @@ from lib.utils.plugin import import_plugin
 
 ALL_PLUGIN_JOBS = import_plugin("job_plugin", "ALL_PLUGIN_JOBS", {})
 
-ALL_JOBS = {**{}, **ALL_PLUGIN_JOBS}
+DEFAULT_JOBS = {
+    # Pushes the queued data doc, table and user changes to the search indices
+    "sync_elasticsearch_queue": {
+        "task": "tasks.sync_elasticsearch.sync_elasticsearch_queue",
+        "schedule": "* * * * *",
+    },
+    # Recomputes the query example stats of tables, which drift when
+    # sample query executions are removed by the db clean up jobs
+    "rebuild_table_query_stats": {
+        "task": "tasks.rebuild_table_query_stats.rebuild_table_query_stats",
+        "schedule": "0 4 * * *",
+    },
+    # Writes the buffered data doc and table impressions
+    "flush_impressions": {
+        "task": "tasks.flush_impressions.flush_impressions",
+        "schedule": "* * * * *",
+    },
+}
+
+ALL_JOBS = {**DEFAULT_JOBS, **ALL_PLUGIN_JOBS}
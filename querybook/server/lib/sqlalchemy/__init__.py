@@ -1,5 +1,7 @@
 from datetime import datetime
-from typing import List
+from typing import Dict, List
+from sqlalchemy import and_, case
+from sqlalchemy.dialects import mysql, postgresql
 from sqlalchemy.orm import validates
 
 from app.db import with_session
@@ -41,6 +43,66 @@ def update_model_fields(
     return model_updated
 
 
+def upsert_counts(
+    table,
+    key_names: List[str],
+    rows: List[Dict],
+    count_names: List[str],
+    max_names: List[str] = [],
+    session=None,
+):
+    """Insert the rows, or add their counts to the rows with the same keys
+       with an atomic statement, so concurrent upserts of a new key do not
+       insert it twice. Callers should sort the rows by their keys so that
+       transactions lock them in the same order.
+
+    Arguments:
+        key_names {List[str]} -- Columns of a unique constraint of the table
+        count_names {List[str]} -- Columns added to the existing values
+        max_names {List[str]} -- Columns that keep the greatest value
+    """
+
+    def get_merged_values(get_new_value):
+        values = {name: table.c[name] + get_new_value(name) for name in count_names}
+        for name in max_names:
+            new_value = get_new_value(name)
+            values[name] = case(
+                [(table.c[name] < new_value, new_value)], else_=table.c[name]
+            )
+        return values
+
+    if not rows:
+        return
+
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "mysql":
+        insert = mysql.insert(table).values(rows)
+        session.execute(
+            insert.on_duplicate_key_update(
+                **get_merged_values(lambda name: insert.inserted[name])
+            )
+        )
+    elif dialect_name == "postgresql":
+        insert = postgresql.insert(table).values(rows)
+        session.execute(
+            insert.on_conflict_do_update(
+                index_elements=key_names,
+                set_=get_merged_values(lambda name: insert.excluded[name]),
+            )
+        )
+    else:
+        # Not atomic, only for databases such as SQLite that serialize writes
+        for row in rows:
+            key_filter = and_(*[table.c[name] == row[name] for name in key_names])
+            result = session.execute(
+                table.update()
+                .where(key_filter)
+                .values(**get_merged_values(lambda name: row[name]))
+            )
+            if result.rowcount == 0:
+                session.execute(table.insert(), row)
+
+
 class SerializeMixin:
     def to_dict(self, skip_columns=[], extra_fields=[]):
         result = {
@@ -0,0 +1,5 @@
+from env import QuerybookSettings
+from .all_stats_loggers import get_stats_logger_class
+
+# Use this to record metrics, for example stats_logger.incr("some.key")
+stats_logger = get_stats_logger_class(QuerybookSettings.STATS_LOGGER_NAME)
@@ -0,0 +1,16 @@
+from lib.utils.plugin import import_plugin
+from .loggers.null_stats_logger import NullStatsLogger
+from .loggers.logger_stats_logger import LoggerStatsLogger
+
+ALL_PLUGIN_STATS_LOGGERS = import_plugin(
+    "stats_logger_plugin", "ALL_PLUGIN_STATS_LOGGERS", []
+)
+
+ALL_STATS_LOGGERS = [NullStatsLogger(), LoggerStatsLogger(),] + ALL_PLUGIN_STATS_LOGGERS
+
+
+def get_stats_logger_class(name: str):
+    for stats_logger in ALL_STATS_LOGGERS:
+        if stats_logger.logger_name == name:
+            return stats_logger
+    raise ValueError(f"Unknown stats logger name {name}")
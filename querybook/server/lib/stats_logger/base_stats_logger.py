@@ -0,0 +1,29 @@
+from abc import ABCMeta, abstractmethod
+from typing import Dict
+
+
+class BaseStatsLogger(metaclass=ABCMeta):
+    @property
+    @abstractmethod
+    def logger_name(self) -> str:
+        """Name of the stats logger, used in STATS_LOGGER_NAME to select it
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def incr(self, key: str, value: int = 1, tags: Dict[str, str] = None) -> None:
+        """Increment the counter of key by value
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def timing(self, key: str, value: float, tags: Dict[str, str] = None) -> None:
+        """Record a duration in milliseconds for key
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def gauge(self, key: str, value: float, tags: Dict[str, str] = None) -> None:
+        """Record the current value of key
+        """
+        raise NotImplementedError()
@@ -0,0 +1,22 @@
+from lib.logger import get_logger
+from lib.stats_logger.base_stats_logger import BaseStatsLogger
+
+LOG = get_logger(__file__)
+
+
+class LoggerStatsLogger(BaseStatsLogger):
+    """Writes every stat to the server log
+    """
+
+    @property
+    def logger_name(self) -> str:
+        return "logger"
+
+    def incr(self, key, value=1, tags=None):
+        LOG.info(f"[stats] incr {key} {value} {tags or {}}")
+
+    def timing(self, key, value, tags=None):
+        LOG.info(f"[stats] timing {key} {value:.2f}ms {tags or {}}")
+
+    def gauge(self, key, value, tags=None):
+        LOG.info(f"[stats] gauge {key} {value} {tags or {}}")
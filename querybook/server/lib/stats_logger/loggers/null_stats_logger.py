@@ -0,0 +1,19 @@
+from lib.stats_logger.base_stats_logger import BaseStatsLogger
+
+
+class NullStatsLogger(BaseStatsLogger):
+    """Drops every stat, used when no stats logger is configured
+    """
+
+    @property
+    def logger_name(self) -> str:
+        return "null"
+
+    def incr(self, key, value=1, tags=None):
+        pass
+
+    def timing(self, key, value, tags=None):
+        pass
+
+    def gauge(self, key, value, tags=None):
+        pass
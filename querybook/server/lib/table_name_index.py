@@ -0,0 +1,434 @@
+from array import array
+from bisect import bisect_left
+import heapq
+from typing import Dict, Iterable, List, Tuple
+
+from clients.redis_client import with_redis
+
+# Sorts after any character, so prefix + _MAX_CHAR is greater
+# than all the strings that start with prefix
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class TableNamePrefixIndex:
+    """Prefix index of the table names of a metastore used for autocomplete.
+
+       Like the completion suggester of the tables search index, a prefix
+       matches both "schema.table" and "table" and the tables with the
+       highest weight are returned first.
+
+       Each full name is stored once in a slot. Slots are kept in two arrays
+       ordered by full name and by table name, the tables matching a prefix
+       are a range of these arrays found with binary search. The heaviest
+       tables of prefixes that match many tables are memoized until a table
+       matching the prefix changes.
+    """
+
+    # Prefixes matching more tables than this have their top tables memoized
+    MEMOIZE_MIN_MATCHES = 1000
+    MAX_LIMIT = 100
+
+    def __init__(self):
+        # By slot, a free slot has a full name of None
+        self._full_names = []
+        self._name_offsets = array("l")
+        self._weights = array("q")
+        self._free_slots = []
+
+        # Slots ordered by full name and by (table name, full name)
+        self._full_name_order = array("l")
+        self._table_name_order = array("l")
+
+        # Table ids in ascending order with their slot
+        self._sorted_table_ids = array("q")
+        self._sorted_table_id_slots = array("l")
+
+        self._top_slots_by_prefix = {}
+
+    @classmethod
+    def from_tables(cls, tables: Iterable[Tuple[int, str, str, int]]):
+        """
+        Arguments:
+            tables {Iterable[Tuple[int, str, str, int]]} -- (table id, schema name,
+                                                            table name, weight)
+        """
+        index = cls()
+        for table_id, schema_name, table_name, weight in sorted(tables):
+            index._full_names.append("{}.{}".format(schema_name, table_name))
+            index._name_offsets.append(len(schema_name) + 1)
+            index._weights.append(weight)
+            index._sorted_table_ids.append(table_id)
+
+        num_slots = len(index._full_names)
+        index._sorted_table_id_slots = array("l", range(num_slots))
+        index._full_name_order = array(
+            "l", sorted(range(num_slots), key=index._get_full_name_key)
+        )
+        index._table_name_order = array(
+            "l", sorted(range(num_slots), key=index._get_table_name_key)
+        )
+        return index
+
+    def __len__(self):
+        return len(self._sorted_table_ids)
+
+    _ARRAY_FIELDS = (
+        "_name_offsets",
+        "_weights",
+        "_full_name_order",
+        "_table_name_order",
+        "_sorted_table_ids",
+        "_sorted_table_id_slots",
+    )
+
+    def to_fields(self) -> Dict[str, bytes]:
+        """Serialize the index, loading it back only copies buffers
+           and splits the names so it is much cheaper than building it
+        """
+        fields = {
+            # Free slots have an empty name, full names always contain a "."
+            "full_names": "\n".join(
+                full_name or "" for full_name in self._full_names
+            ).encode("utf-8"),
+            "free_slots": array("l", self._free_slots).tobytes(),
+        }
+        for field in self._ARRAY_FIELDS:
+            fields[field] = getattr(self, field).tobytes()
+        return fields
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, bytes]):
+        index = cls()
+        full_names = fields["full_names"].decode("utf-8")
+        index._full_names = (
+            [full_name or None for full_name in full_names.split("\n")]
+            if full_names
+            else []
+        )
+        free_slots = array("l")
+        free_slots.frombytes(fields["free_slots"])
+        index._free_slots = free_slots.tolist()
+        for field in cls._ARRAY_FIELDS:
+            getattr(index, field).frombytes(fields[field])
+        return index
+
+    def upsert(self, table_id: int, schema_name: str, table_name: str, weight: int):
+        full_name = "{}.{}".format(schema_name, table_name)
+        slot = self._get_slot(table_id)
+        if slot is not None and self._full_names[slot] == full_name:
+            self._invalidate_prefixes(slot)
+            self._weights[slot] = weight
+            return
+
+        if slot is not None:
+            self.remove(table_id)
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._full_names[slot] = full_name
+            self._name_offsets[slot] = len(schema_name) + 1
+            self._weights[slot] = weight
+        else:
+            slot = len(self._full_names)
+            self._full_names.append(full_name)
+            self._name_offsets.append(len(schema_name) + 1)
+            self._weights.append(weight)
+
+        id_position = bisect_left(self._sorted_table_ids, table_id)
+        self._sorted_table_ids.insert(id_position, table_id)
+        self._sorted_table_id_slots.insert(id_position, slot)
+
+        for _, order, get_key, _ in self._get_orders():
+            order.insert(self._bisect(order, get_key, get_key(slot)), slot)
+        self._invalidate_prefixes(slot)
+
+    def remove(self, table_id: int):
+        id_position = self._get_table_id_position(table_id)
+        if id_position is None:
+            return
+        slot = self._sorted_table_id_slots[id_position]
+        self._invalidate_prefixes(slot)
+
+        for _, order, get_key, _ in self._get_orders():
+            # Keys are unique since full names are
+            del order[self._bisect(order, get_key, get_key(slot))]
+
+        del self._sorted_table_ids[id_position]
+        del self._sorted_table_id_slots[id_position]
+        self._full_names[slot] = None
+        self._free_slots.append(slot)
+
+    def search(self, prefix: str, limit: int = 10) -> List[str]:
+        """Full names of the limit heaviest tables whose full
+           name or table name starts with the prefix
+        """
+        limit = min(limit, self.MAX_LIMIT)
+        candidate_slots = set()
+        for order_name, order, get_key, get_prefix_key in self._get_orders():
+            start = self._bisect(order, get_key, get_prefix_key(prefix))
+            end = self._bisect(order, get_key, get_prefix_key(prefix + _MAX_CHAR))
+            candidate_slots.update(
+                self._get_top_slots(order_name, order, start, end, prefix, limit)
+            )
+
+        top_slots = heapq.nsmallest(limit, candidate_slots, key=self._get_rank_key)
+        return [self._full_names[slot] for slot in top_slots]
+
+    def _get_top_slots(self, order_name, order, start, end, prefix: str, limit: int):
+        if end - start <= self.MEMOIZE_MIN_MATCHES:
+            return heapq.nsmallest(limit, order[start:end], key=self._get_rank_key)
+
+        memo_key = (order_name, prefix)
+        if memo_key not in self._top_slots_by_prefix:
+            self._top_slots_by_prefix[memo_key] = heapq.nsmallest(
+                self.MAX_LIMIT, order[start:end], key=self._get_rank_key
+            )
+        return self._top_slots_by_prefix[memo_key][:limit]
+
+    def _invalidate_prefixes(self, slot: int):
+        if not self._top_slots_by_prefix:
+            return
+        full_name = self._full_names[slot]
+        table_name = full_name[self._name_offsets[slot] :]
+        for order_name, name in (("full_name", full_name), ("table_name", table_name)):
+            for length in range(len(name) + 1):
+                self._top_slots_by_prefix.pop((order_name, name[:length]), None)
+
+    def _get_orders(self):
+        """
+        Returns:
+            Tuple -- (order name, slots in order, key of a slot, key of a prefix)
+        """
+        return (
+            (
+                "full_name",
+                self._full_name_order,
+                self._get_full_name_key,
+                lambda prefix: prefix,
+            ),
+            (
+                "table_name",
+                self._table_name_order,
+                self._get_table_name_key,
+                lambda prefix: (prefix, ""),
+            ),
+        )
+
+    def _get_rank_key(self, slot: int):
+        # Heaviest first, then by name
+        return (-self._weights[slot], self._full_names[slot])
+
+    def _get_full_name_key(self, slot: int):
+        return self._full_names[slot]
+
+    def _get_table_name_key(self, slot: int):
+        full_name = self._full_names[slot]
+        return (full_name[self._name_offsets[slot] :], full_name)
+
+    @staticmethod
+    def _bisect(order, get_key, key) -> int:
+        # bisect_left on the keys of the slots in order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if get_key(order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _get_table_id_position(self, table_id: int):
+        position = bisect_left(self._sorted_table_ids, table_id)
+        if (
+            position < len(self._sorted_table_ids)
+            and self._sorted_table_ids[position] == table_id
+        ):
+            return position
+        return None
+
+    def _get_slot(self, table_id: int):
+        position = self._get_table_id_position(table_id)
+        return None if position is None else self._sorted_table_id_slots[position]
+
+
+"""
+    Stored indices
+
+    Indices are built by a celery task and stored in Redis, where the
+    processes serving autocomplete load them from
+"""
+
+TABLE_NAME_INDEX_KEY = "table_name_index:{}"
+TABLE_NAME_INDEX_BUILD_LOCK_KEY = "table_name_index_build:{}"
+# Expires in case the build task dies without releasing it
+TABLE_NAME_INDEX_BUILD_LOCK_SECONDS = 60 * 60
+
+
+@with_redis
+def save_table_name_index(
+    metastore_id: int,
+    index: TableNamePrefixIndex,
+    change_id: str,
+    built_at: float,
+    redis_conn=None,
+):
+    """
+    Arguments:
+        change_id {str} -- Id of the last change of the feed in the index
+        built_at {float} -- Time the index was built
+    """
+    fields = index.to_fields()
+    fields["change_id"] = change_id
+    fields["built_at"] = repr(built_at)
+    redis_conn.hset(TABLE_NAME_INDEX_KEY.format(metastore_id), mapping=fields)
+
+
+@with_redis
+def get_table_name_index_built_at(metastore_id: int, redis_conn=None) -> float:
+    """Time the stored index was built, None if there is none"""
+    built_at = redis_conn.hget(TABLE_NAME_INDEX_KEY.format(metastore_id), "built_at")
+    return None if built_at is None else float(built_at)
+
+
+@with_redis
+def load_table_name_index(metastore_id: int, redis_conn=None):
+    """
+    Returns:
+        Tuple[TableNamePrefixIndex, str, float] -- The index, the id of the last
+            change of the feed in it and the time it was built. None if there
+            is no stored index
+    """
+    fields = redis_conn.hgetall(TABLE_NAME_INDEX_KEY.format(metastore_id))
+    if not fields:
+        return None
+    fields = {key.decode("utf-8"): value for key, value in fields.items()}
+    return (
+        TableNamePrefixIndex.from_fields(fields),
+        fields["change_id"].decode("utf-8"),
+        float(fields["built_at"]),
+    )
+
+
+@with_redis
+def acquire_table_name_index_build_lock(metastore_id: int, redis_conn=None) -> bool:
+    """False if the index of the metastore is already being built"""
+    return bool(
+        redis_conn.set(
+            TABLE_NAME_INDEX_BUILD_LOCK_KEY.format(metastore_id),
+            1,
+            nx=True,
+            ex=TABLE_NAME_INDEX_BUILD_LOCK_SECONDS,
+        )
+    )
+
+
+@with_redis
+def release_table_name_index_build_lock(metastore_id: int, redis_conn=None):
+    redis_conn.delete(TABLE_NAME_INDEX_BUILD_LOCK_KEY.format(metastore_id))
+
+
+"""
+    Change feed
+
+    A Redis stream of the changes of table names and weights, written by the
+    table sync and read by the processes that keep a TableNamePrefixIndex
+"""
+
+TABLE_NAME_CHANGES_KEY = "table_name_index_changes"
+# Older changes are trimmed, readers that are further behind rebuild their index
+TABLE_NAME_CHANGES_MAX_LEN = 100000
+TABLE_NAME_CHANGES_READ_COUNT = 1000
+
+
+@with_redis
+def publish_table_name_changes(
+    table_docs: List[Dict], deleted_ids: List[int], redis_conn=None
+):
+    """
+    Arguments:
+        table_docs {List[Dict]} -- Updated documents of the tables search index
+        deleted_ids {List[int]} -- ids of deleted tables
+    """
+    with redis_conn.pipeline(transaction=False) as pipe:
+        for doc in table_docs:
+            pipe.xadd(
+                TABLE_NAME_CHANGES_KEY,
+                {
+                    "id": doc["id"],
+                    "metastore_id": doc["metastore_id"],
+                    "schema": doc["schema"],
+                    "name": doc["name"],
+                    "weight": doc["importance_score"],
+                },
+                maxlen=TABLE_NAME_CHANGES_MAX_LEN,
+            )
+        for table_id in deleted_ids:
+            pipe.xadd(
+                TABLE_NAME_CHANGES_KEY,
+                {"id": table_id, "deleted": 1},
+                maxlen=TABLE_NAME_CHANGES_MAX_LEN,
+            )
+        pipe.execute()
+
+
+@with_redis
+def get_last_table_name_change_id(redis_conn=None) -> str:
+    last_changes = redis_conn.xrevrange(TABLE_NAME_CHANGES_KEY, count=1)
+    return last_changes[0][0].decode("utf-8") if last_changes else "0-0"
+
+
+@with_redis
+def get_table_name_changes(after_change_id: str, redis_conn=None):
+    """Changes published after after_change_id, oldest first
+
+    Returns:
+        Tuple[List[Tuple[str, Dict]], bool] -- (change id, change) pairs and
+            False if changes after after_change_id may have been trimmed
+    """
+    oldest_changes = redis_conn.xrange(TABLE_NAME_CHANGES_KEY, count=1)
+    # Approximate trimming keeps at least max len changes, so none
+    # were trimmed if the stream is shorter than that
+    is_complete = (
+        not oldest_changes
+        or parse_change_id(oldest_changes[0][0]) <= parse_change_id(after_change_id)
+        or redis_conn.xlen(TABLE_NAME_CHANGES_KEY) < TABLE_NAME_CHANGES_MAX_LEN
+    )
+
+    changes = []
+    min_change_id = after_change_id
+    while True:
+        raw_changes = redis_conn.xrange(
+            TABLE_NAME_CHANGES_KEY,
+            min=min_change_id,
+            count=TABLE_NAME_CHANGES_READ_COUNT,
+        )
+        for raw_change_id, raw_change in raw_changes:
+            change_id = raw_change_id.decode("utf-8")
+            # The min of xrange is inclusive
+            if change_id != min_change_id:
+                changes.append((change_id, _parse_change(raw_change)))
+        if len(raw_changes) < TABLE_NAME_CHANGES_READ_COUNT:
+            break
+        min_change_id = raw_changes[-1][0].decode("utf-8")
+    return changes, is_complete
+
+
+def parse_change_id(change_id) -> Tuple[int, int]:
+    """Stream ids are "milliseconds-sequence", parsed to be compared"""
+    if isinstance(change_id, bytes):
+        change_id = change_id.decode("utf-8")
+    milliseconds, sequence = change_id.split("-")
+    return int(milliseconds), int(sequence)
+
+
+def _parse_change(raw_change) -> Dict:
+    change = {
+        key.decode("utf-8"): value.decode("utf-8") for key, value in raw_change.items()
+    }
+    change["id"] = int(change["id"])
+    if "deleted" in change:
+        change["deleted"] = True
+    else:
+        change["metastore_id"] = int(change["metastore_id"])
+        change["weight"] = int(change["weight"])
+    return change
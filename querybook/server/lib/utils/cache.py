@@ -1,4 +1,7 @@
+from collections import OrderedDict
 import hashlib
+import threading
+import time
 from urllib.parse import quote
 
 
@@ -13,3 +16,56 @@ def make_template_fragment_key(fragment_name, vary_on=None):
     key = ":".join(quote(str(var)) for var in vary_on)
     args = hashlib.md5(key.encode())
     return TEMPLATE_FRAGMENT_KEY_TEMPLATE % (fragment_name, args.hexdigest())
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread safe in memory cache that keeps the max_size most recently used
+       keys. If ttl_secs is set, entries also expire ttl_secs after being set.
+    """
+
+    def __init__(self, max_size=1000, ttl_secs=None):
+        self.max_size = max_size
+        self.ttl_secs = ttl_secs
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = (
+            time.monotonic() + self.ttl_secs if self.ttl_secs is not None else None
+        )
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,65 +1,242 @@
+from functools import partial, wraps
+import inspect
+import json
+import os
+import threading
 import time
-import datetime
-from functools import wraps
+
+from clients.redis_client import get_redis
+from lib.logger import get_logger
+from lib.stats_logger import stats_logger
+from lib.utils.cache import LRUCache
+
+LOG = get_logger(__file__)
+
+_MISSING = object()
+
+MEMOIZED_INVALIDATION_CHANNEL = "in_mem_memoized_invalidation"
+# Memoized functions that are invalidated across processes, by name
+_memoized_by_name = {}
+_invalidation_listener_pid = None
+_invalidation_listener_lock = threading.Lock()
 
 
 class InMemoryMemoized:
-    """Class which will memoize a function, but expires the result after a given period.
+    """Class which will memoize the results of a function by its arguments,
+       up to max_size results that expire after ttl_secs.
 
-    Parameters are ignored for this simple memoize class.
+    The least recently used results are evicted first. Results are memoized
+    by the arguments bound to the signature, so f(1) and f(uid=1) share
+    the same result. Calls with unhashable arguments are not memoized and
+    the session argument is ignored.
+    Results are shared between callers, so they must not be mutated.
 
-    Flow:
-    1) The first result is memoized regardless of the arguments provided.
-    2) Subsequent calls will return the same result even if different areguments are provided.
-    N) The next call that occurs after the Time To Live (TTL) period resets the state back to (1)
+    If invalidate_across_processes is set, invalidate() and invalidate_all()
+    also clear the results memoized by the other processes through Redis
+    pub/sub. The results are then memoized by the arguments as they are
+    received from JSON (e.g tuples as lists), calls with arguments that
+    are not JSON serializable are not memoized.
     """
 
-    def __init__(self, func, ttl_secs=None):
+    IGNORED_KWARGS = ("session",)
+
+    def __init__(
+        self, func, ttl_secs=None, max_size=1000, invalidate_across_processes=False
+    ):
         self.func = func
-        self.ttl_secs = ttl_secs
-        self.last_call_time = None
-        self.result = None
+        self._signature = inspect.signature(func)
+        self.name = "{}.{}".format(func.__module__, func.__qualname__)
+        self.invalidate_across_processes = invalidate_across_processes
+        self._results = LRUCache(max_size=max_size, ttl_secs=ttl_secs)
+        # Incremented on invalidation so that results computed
+        # before an invalidation are not memoized
+        self._generation = 0
+
+        if invalidate_across_processes:
+            _memoized_by_name[self.name] = self
 
     def __call__(self, *args, **kwargs):
-        if self.expired:
-            self.result = self.func(*args, **kwargs)
-            self.last_call_time = datetime.datetime.now()
+        key = self._get_key(args, kwargs)
+        if key is None:
+            return self.func(*args, **kwargs)
+
+        if self.invalidate_across_processes:
+            _start_invalidation_listener()
+
+        result = self._results.get(key, _MISSING)
+        if result is not _MISSING:
+            stats_logger.incr("memoized.hit", tags={"name": self.name})
+            return result
+
+        stats_logger.incr("memoized.miss", tags={"name": self.name})
+        generation = self._generation
+        result = self.func(*args, **kwargs)
+        if generation == self._generation:
+            self._results.set(key, result)
+        return result
+
+    def __get__(self, instance, owner):
+        # Bind self when decorating methods
+        if instance is None:
+            return self
+        return partial(self.__call__, instance)
+
+    def invalidate(self, *args, **kwargs):
+        """Forget the result memoized for these arguments"""
+        self._invalidate_local(args, kwargs)
+        call_arguments = self._get_call_arguments(args, kwargs)
+        if self.invalidate_across_processes and call_arguments is not None:
+            args, kwargs = call_arguments
+            self._publish_invalidation({"args": args, "kwargs": kwargs})
+
+    def invalidate_all(self):
+        """Forget all the memoized results"""
+        self._invalidate_all_local()
+        if self.invalidate_across_processes:
+            self._publish_invalidation({})
+
+    def _invalidate_local(self, args, kwargs):
+        self._generation += 1
+        key = self._get_key(args, kwargs)
+        if key is not None:
+            self._results.delete(key)
+
+    def _invalidate_all_local(self):
+        self._generation += 1
+        self._results.clear()
+
+    def _publish_invalidation(self, message):
+        try:
+            get_redis().publish(
+                MEMOIZED_INVALIDATION_CHANNEL,
+                json.dumps({"name": self.name, **message}),
+            )
+        except Exception as e:
+            LOG.error("Cannot publish invalidation of {}: {}".format(self.name, e))
 
-        return self.result
+    def _get_key(self, args, kwargs):
+        call_arguments = self._get_call_arguments(args, kwargs)
+        if call_arguments is None:
+            return None
+        args, kwargs = call_arguments
+        if self.invalidate_across_processes:
+            # Same key as the other processes get from the invalidation
+            try:
+                args, kwargs = json.loads(json.dumps([args, kwargs]))
+            except (TypeError, ValueError):
+                return None
+            args = _to_hashable(args)
+            kwargs = {name: _to_hashable(value) for name, value in kwargs.items()}
 
-    @property
-    def expired(self):
-        if self.last_call_time is None:
-            return True
-        if (
-            self.ttl_secs is not None
-            and self.last_call_time + datetime.timedelta(seconds=self.ttl_secs)
-            < datetime.datetime.now()
-        ):
-            return True
-        return False
+        key = (tuple(args), tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
 
+    def _get_call_arguments(self, args, kwargs):
+        """The arguments of the call as passed by position or by name
+           the same way for every call, with the defaults applied and
+           without the ignored ones
 
-def in_mem_memoized(ttl_secs=None):
-    """Memoizes the results of the function.
-       Note params change are ignored in memo.
+        Returns:
+            Tuple[Tuple, Dict] -- None if they do not match the signature
+        """
+        try:
+            bound_arguments = self._signature.bind(*args, **kwargs)
+        except TypeError:
+            return None
+        bound_arguments.apply_defaults()
+        for name in self.IGNORED_KWARGS:
+            bound_arguments.arguments.pop(name, None)
+        return bound_arguments.args, bound_arguments.kwargs
+
+
+def _to_hashable(value):
+    """Converts the lists of a value decoded from JSON to tuples,
+       and its dicts to sorted tuples of their items
+    """
+    if isinstance(value, list):
+        return tuple(_to_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((name, _to_hashable(item)) for name, item in value.items()))
+    return value
+
+
+def in_mem_memoized(ttl_secs=None, max_size=1000, invalidate_across_processes=False):
+    """Memoizes the results of the function by its arguments.
 
     Args:
         func: A function that will have its results memoized.
         ttl_secs: Time To Live (in seconds) for the result data
-                  If ttl_secs, result will never expire
+                  If ttl_secs is None, result will never expire
+        max_size: Max number of memoized results, the least recently
+                  used ones are evicted first
+        invalidate_across_processes: If true, invalidations are sent to all
+                                     the processes through Redis pub/sub
 
     Returns:
-        Memoized function which expires after ttl_secs
+        Memoized function which expires after ttl_secs, call
+        .invalidate(*args, **kwargs) or .invalidate_all() on it
+        when the memoized results change
 
     """
 
     def inner_dec(func):
-        return wraps(func)(InMemoryMemoized(func, ttl_secs))
+        return wraps(func)(
+            InMemoryMemoized(
+                func,
+                ttl_secs=ttl_secs,
+                max_size=max_size,
+                invalidate_across_processes=invalidate_across_processes,
+            )
+        )
 
     return inner_dec
 
 
+def _start_invalidation_listener():
+    global _invalidation_listener_pid
+
+    # Checked by pid since the listener thread does not survive a fork
+    if _invalidation_listener_pid == os.getpid():
+        return
+    with _invalidation_listener_lock:
+        if _invalidation_listener_pid == os.getpid():
+            return
+        _invalidation_listener_pid = os.getpid()
+        threading.Thread(target=_listen_to_invalidations, daemon=True).start()
+
+
+def _listen_to_invalidations():
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(MEMOIZED_INVALIDATION_CHANNEL)
+            for message in pubsub.listen():
+                _handle_invalidation(message["data"])
+        except Exception as e:
+            LOG.error("Memoized invalidation listener failed: {}".format(e))
+
+        # Invalidations may have been missed while disconnected
+        for memoized in list(_memoized_by_name.values()):
+            memoized._invalidate_all_local()
+        time.sleep(5)
+
+
+def _handle_invalidation(raw_message):
+    message = json.loads(raw_message)
+    memoized = _memoized_by_name.get(message["name"])
+    if memoized is None:
+        return
+
+    if "args" in message:
+        memoized._invalidate_local(message["args"], message["kwargs"])
+    else:
+        memoized._invalidate_all_local()
+
+
 def with_exception_retry(
     max_retry=5, get_retry_delay=lambda x: x, exception_cls=Exception
 ):
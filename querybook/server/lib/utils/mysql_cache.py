@@ -1,9 +1,23 @@
+"""Key value cache used for table samples, engine status checks
+and with_mysql_cache
+
+Entries are kept in the store configured by CACHE_STORE_TYPE (see
+lib.cache_store) with a short lived in process LRU cache in front of it.
+"""
 from functools import wraps
 from datetime import datetime
 from app.db import with_session
+from lib.cache_store import get_cache_store
 from lib.utils import json
-from logic.result_store import get_key_value_store, upsert_key_value_store
-from tasks.delete_mysql_cache import delete_mysql_cache
+from lib.utils.cache import LRUCache
+from lib.utils.utils import DATETIME_TO_UTC
+
+LOCAL_CACHE_SIZE = 1000
+# Other processes may update the store, so entries are only
+# kept in process for a few seconds
+LOCAL_CACHE_TTL = 5
+
+_local_cache = LRUCache(max_size=LOCAL_CACHE_SIZE, ttl_secs=LOCAL_CACHE_TTL)
 
 
 @with_session
@@ -13,23 +27,37 @@ def set_key(
     if serialize:
         value = json.dumps(value)
 
-    upsert_key_value_store(key, value, session=session)
-    if expires_after is not None:
-        delete_mysql_cache.delay(key, countdown=expires_after)
+    _local_cache.delete(key)
+    get_cache_store().set(key, value, expires_after=expires_after, session=session)
+
+
+@with_session
+def delete_key(key, session=None):
+    _local_cache.delete(key)
+    get_cache_store().delete(key, session=session)
 
 
 @with_session
 def get_raw_key(key, expires_after=None, serialize=True, session=None):
-    kvs = get_key_value_store(key, session=session)
-    if not kvs:
+    entry = _local_cache.get(key)
+    if entry is None:
+        entry = get_cache_store().get(key, session=session)
+        if entry is None:
+            raise LookupError(f"Invalid key {key}")
+        _local_cache.set(key, entry)
+
+    now = DATETIME_TO_UTC(datetime.utcnow())
+    if entry.get("expires_at") is not None and entry["expires_at"] <= now:
         raise LookupError(f"Invalid key {key}")
     if expires_after is not None:
-        if (datetime.utcnow() - kvs.updated_at).total_seconds() > expires_after:
+        if now - entry["updated_at"] > expires_after:
             raise LookupError(f"Invalid key {key}")
-    kvs_dict = kvs.to_dict()
+
+    # Copied since the entry is shared with the local cache
+    entry = dict(entry)
     if serialize:
-        kvs_dict["value"] = json.loads(kvs_dict["value"])
-    return kvs_dict
+        entry["value"] = json.loads(entry["value"])
+    return entry
 
 
 @with_session
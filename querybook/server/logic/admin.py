@@ -4,6 +4,7 @@ import uuid
 from sqlalchemy import func
 
 from app.db import with_session
+from lib.utils.decorators import in_mem_memoized
 
 from models.admin import (
     QueryEngine,
@@ -30,6 +31,19 @@ def get_query_engine_by_id(id, session=None):
     return session.query(QueryEngine).get(id)
 
 
+# Environment ids are used in every permission check, admin changes
+# invalidate them and the ttl bounds the staleness of missed changes
+@in_mem_memoized(ttl_secs=300, max_size=10000, invalidate_across_processes=True)
+@with_session
+def get_query_engine_environment_ids(query_engine_id, session=None):
+    return [
+        eid
+        for eid, in session.query(QueryEngineEnvironment.environment_id).filter(
+            QueryEngineEnvironment.query_engine_id == query_engine_id
+        )
+    ]
+
+
 @with_session
 def get_all_query_engines(session=None):
     return session.query(QueryEngine).all()
@@ -65,7 +79,7 @@ def add_query_engine_to_environment(
         )
         or 0
     )
-    return QueryEngineEnvironment.create(
+    query_engine_environment = QueryEngineEnvironment.create(
         fields={
             "query_engine_id": query_engine_id,
             "environment_id": environment_id,
@@ -74,6 +88,8 @@ def add_query_engine_to_environment(
         commit=commit,
         session=session,
     )
+    invalidate_query_engine_environment_ids(query_engine_id)
+    return query_engine_environment
 
 
 @with_session
@@ -82,6 +98,13 @@ def remove_query_engine_from_environment(environment_id, query_engine_id, sessio
         query_engine_id=query_engine_id, environment_id=environment_id,
     ).delete()
     session.commit()
+    invalidate_query_engine_environment_ids(query_engine_id)
+
+
+def invalidate_query_engine_environment_ids(query_engine_id):
+    get_query_engine_environment_ids.invalidate(query_engine_id)
+    # Metastores get their environments from their query engines
+    get_query_metastore_environment_ids.invalidate_all()
 
 
 @with_session
@@ -188,6 +211,17 @@ def get_query_metastore_by_id(id, session=None):
     return session.query(QueryMetastore).get(id)
 
 
+@in_mem_memoized(ttl_secs=300, max_size=10000, invalidate_across_processes=True)
+@with_session
+def get_query_metastore_environment_ids(metastore_id, session=None):
+    return [
+        eid
+        for eid, in session.query(QueryEngineEnvironment.environment_id)
+        .join(QueryEngine)
+        .filter(QueryEngine.metastore_id == metastore_id)
+    ]
+
+
 @with_session
 def get_query_metastore_by_name(name, session=None):
     return session.query(QueryMetastore).filter(QueryMetastore.name == name).first()
@@ -1,11 +1,17 @@
 import datetime
+import hashlib
 from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 from app.db import with_session
+from const.data_doc import DataCellType
 from const.elasticsearch import ElasticsearchItem
 from const.impression import ImpressionItemType
 from lib.sqlalchemy import update_model_fields
 from lib.data_doc.data_cell import cell_types, sanitize_data_cell_meta
+from lib.elasticsearch.sync_queue import queue_item_sync
+from lib.richtext import richtext_to_plaintext
+from lib.utils import mysql_cache
 from models.datadoc import (
     DataDoc,
     DataDocDataCell,
@@ -18,8 +24,11 @@ from models.datadoc import (
 )
 from models.access_request import AccessRequest
 from models.impression import Impression
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.normalize_data_doc_cell_order import normalize_data_doc_cell_order_task
 
+# Old versions are not read again once the doc changes,
+# so their serialized docs only need to outlive a busy day
+SERIALIZED_DATA_DOC_EXPIRES_AFTER = 60 * 60 * 24
 
 """
     ----------------------------------------------------------------------------------------------------------
@@ -136,6 +145,7 @@ def update_data_doc(id, commit=True, session=None, **fields):
 
     if updated:
         data_doc.updated_at = datetime.datetime.now()
+        bump_data_doc_version(data_doc)
 
         if commit:
             session.commit()
@@ -146,11 +156,67 @@ def update_data_doc(id, commit=True, session=None, **fields):
     return data_doc
 
 
+def bump_data_doc_version(data_doc):
+    """Mark the doc as changed so its cached serialized doc is not used,
+       the caller needs to commit it. Incremented in SQL so concurrent
+       changes are all counted.
+    """
+    data_doc.version = DataDoc.version + 1
+
+
 @with_session
 def get_data_doc_by_id(id, session=None):
     return session.query(DataDoc).get(id)
 
 
+@with_session
+def get_data_doc_version(id, session=None):
+    return session.query(DataDoc.version).filter(DataDoc.id == id).scalar()
+
+
+@with_session
+def get_serialized_data_doc(id, version, session=None):
+    """Get data_doc.to_dict(with_cells=True), which is cached by
+       the version of the doc
+
+    Arguments:
+        id {int} -- Data doc id
+        version {int} -- Current version of the doc, see get_data_doc_version
+
+    Returns:
+        Dict -- The serialized doc, None if it does not exist
+    """
+    try:
+        return mysql_cache.get_key(
+            get_serialized_data_doc_key(id, version), session=session
+        )
+    except LookupError:
+        pass
+
+    data_doc = (
+        session.query(DataDoc)
+        .options(selectinload(DataDoc.cells))
+        .filter(DataDoc.id == id)
+        .first()
+    )
+    if not data_doc:
+        return None
+
+    data_doc_dict = data_doc.to_dict(with_cells=True)
+    # Cached by the version loaded since the doc may have changed since
+    mysql_cache.set_key(
+        get_serialized_data_doc_key(id, data_doc.version),
+        data_doc_dict,
+        expires_after=SERIALIZED_DATA_DOC_EXPIRES_AFTER,
+        session=session,
+    )
+    return data_doc_dict
+
+
+def get_serialized_data_doc_key(id, version):
+    return f"data_doc:{id}:{version}"
+
+
 @with_session
 def get_data_doc_by_user(uid, environment_id, offset, limit, session=None):
     return (
@@ -164,17 +230,38 @@ def get_data_doc_by_user(uid, environment_id, offset, limit, session=None):
 
 
 @with_session
-def get_all_data_docs(offset=0, limit=100, session=None):
+def get_all_data_docs(after_id=0, limit=100, session=None):
+    """Get a page of unarchived data docs along with their cells and editors
+
+    Keyword Arguments:
+        after_id {int} -- Only return data docs with a greater id, pass the
+                          last id of the previous page to get the next one (default: {0})
+        limit {int} -- Max number of data docs returned (default: {100})
+
+    Returns:
+        List[DataDoc] -- Data docs ordered by id
+    """
     return (
         session.query(DataDoc)
+        .options(selectinload(DataDoc.cells), selectinload(DataDoc.editors))
         .filter_by(archived=False)
-        .order_by(DataDoc.id.desc())
-        .offset(offset)
+        .filter(DataDoc.id > after_id)
+        .order_by(DataDoc.id)
         .limit(limit)
         .all()
     )
 
 
+@with_session
+def get_data_docs_by_ids(ids, session=None):
+    return (
+        session.query(DataDoc)
+        .options(selectinload(DataDoc.cells), selectinload(DataDoc.editors))
+        .filter(DataDoc.id.in_(ids))
+        .all()
+    )
+
+
 # You cannot delete data doc
 @with_session
 def delete_data_doc(session=None):
@@ -268,11 +355,15 @@ def update_data_cell(
         )
 
     updated = update_model_fields(
-        data_cell, skip_if_value_none=True, field_names=["meta", "context"], **fields
+        data_cell,
+        skip_if_value_none=True,
+        field_names=["meta", "context", "context_version"],
+        **fields,
     )
     if updated:
         data_cell.updated_at = datetime.datetime.now()
         data_cell.doc.updated_at = datetime.datetime.now()
+        bump_data_doc_version(data_cell.doc)
 
         if commit:
             session.commit()
@@ -281,6 +372,43 @@ def update_data_cell(
     return data_cell
 
 
+@with_session
+def update_data_cell_context(id, context, context_version, commit=True, session=None):
+    """Update the context to context_version unless a later version is stored
+
+    Returns:
+        bool -- Whether the context got updated
+    """
+    now = datetime.datetime.now()
+    updated = (
+        session.query(DataCell)
+        .filter(DataCell.id == id)
+        .filter(DataCell.context_version < context_version)
+        .update(
+            {
+                DataCell.context: context,
+                DataCell.context_version: context_version,
+                DataCell.updated_at: now,
+            }
+        )
+    )
+    if not updated:
+        return False
+
+    data_doc = get_data_doc_by_data_cell_id(id, session=session)
+    if data_doc:
+        data_doc.updated_at = now
+        bump_data_doc_version(data_doc)
+
+    if commit:
+        session.commit()
+        if data_doc:
+            update_es_data_doc_by_id(data_doc.id)
+    else:
+        session.flush()
+    return True
+
+
 @with_session
 def copy_cell_history(from_cell_id, to_cell_id, commit=True, session=None):
     # Remove all old execution for to_cell_id just for precaution
@@ -315,6 +443,40 @@ def delete_data_cell(session=None):
     pass
 
 
+def get_data_cell_context_hash(context):
+    return hashlib.md5((context or "").encode("utf-8")).hexdigest()
+
+
+def update_data_cells_plaintext(cells, map_fn=map):
+    """Extract the plaintext of the text cells whose context changed
+       since the last extraction, the caller needs to commit it
+
+    Arguments:
+        cells {List[DataCell]}
+
+    Keyword Arguments:
+        map_fn {Callable} -- Runs richtext_to_plaintext over the contexts,
+                             e.g the map of a process pool (default: {map})
+    """
+    stale_cells = []
+    for cell in cells:
+        if cell.cell_type != DataCellType.text:
+            continue
+        context_hash = get_data_cell_context_hash(cell.context)
+        if cell.plaintext_hash != context_hash:
+            stale_cells.append((cell, context_hash))
+
+    if not stale_cells:
+        return
+
+    plaintexts = map_fn(
+        richtext_to_plaintext, [cell.context for cell, _ in stale_cells]
+    )
+    for (cell, context_hash), plaintext in zip(stale_cells, plaintexts):
+        cell.plaintext = plaintext
+        cell.plaintext_hash = context_hash
+
+
 """
     ----------------------------------------------------------------------------------------------------------
     DATA DOC DATA CELL
@@ -322,31 +484,142 @@ def delete_data_cell(session=None):
 """
 
 
+"""
+    Cells are ordered by DataDocDataCell.cell_order, which leaves gaps between
+    cells. A cell inserted or moved gets an order between its new neighbours
+    so only its own row is written. Once the gap between two cells gets small
+    the orders of the doc are spread out again in the background.
+"""
+CELL_ORDER_GAP = 2 ** 16
+CELL_ORDER_MIN_GAP = 2 ** 4
+
+
 @with_session
 def get_data_doc_data_cell(cell_id, session=None):
     return session.query(DataDocDataCell).filter_by(data_cell_id=cell_id).first()
 
 
 @with_session
-def insert_data_doc_cell(data_doc_id, cell_id, index, commit=True, session=None):
-    data_doc = get_data_doc_by_id(data_doc_id, session=session)
-    data_cell = get_data_cell_by_id(cell_id, session=session)
+def get_data_doc_cell_index(cell_id, session=None):
+    """Index of the cell in its doc, None if it is not in a doc"""
+    data_doc_cell = get_data_doc_data_cell(cell_id, session=session)
+    if data_doc_cell is None:
+        return None
+    return (
+        session.query(DataDocDataCell)
+        .filter(DataDocDataCell.data_doc_id == data_doc_cell.data_doc_id)
+        .filter(DataDocDataCell.cell_order < data_doc_cell.cell_order)
+        .count()
+    )
+
+
+def _lock_data_doc_cell_order(data_doc_id, session):
+    """Changes of the cell order of a doc are made one at a time
+       so the neighbours an order is picked between stay in place
+    """
+    session.query(DataDoc.id).filter(
+        DataDoc.id == data_doc_id
+    ).with_for_update().first()
 
-    assert index >= 0 and index <= len(data_doc.cells), "Invalid insert cell index"
-    session.query(DataDocDataCell).filter(
+
+def _query_data_doc_cells(data_doc_id, session, exclude_cell_id=None):
+    query = session.query(DataDocDataCell).filter(
         DataDocDataCell.data_doc_id == data_doc_id
-    ).filter(DataDocDataCell.cell_order >= index).update(
-        {DataDocDataCell.cell_order: DataDocDataCell.cell_order + 1}
     )
+    if exclude_cell_id is not None:
+        query = query.filter(DataDocDataCell.data_cell_id != exclude_cell_id)
+    return query.order_by(DataDocDataCell.cell_order)
 
-    data_doc.cells.append(data_cell)
-    session.query(DataDocDataCell).filter(
-        DataDocDataCell.data_doc_id == data_doc_id
-    ).filter(DataDocDataCell.data_cell_id == cell_id).update(
-        {DataDocDataCell.cell_order: index}
+
+def _get_cell_order_at(data_doc_id, index, session, exclude_cell_id=None):
+    """Pick the order of a cell inserted at index. The doc needs to be
+       locked by _lock_data_doc_cell_order.
+
+    Arguments:
+        data_doc_id {int}
+        index {int} -- The cell is inserted before the cell at index
+        session
+
+    Keyword Arguments:
+        exclude_cell_id {int} -- Cell to ignore, e.g the cell that is moved
+                                 (default: {None})
+
+    Returns:
+        int -- The cell order
+    """
+    assert index >= 0, "Invalid cell index"
+    # Locking read so the orders are current
+    neighbour_orders = [
+        cell_order
+        for (cell_order,) in _query_data_doc_cells(
+            data_doc_id, session, exclude_cell_id=exclude_cell_id
+        )
+        .with_entities(DataDocDataCell.cell_order)
+        .offset(max(index - 1, 0))
+        .limit(2 if index > 0 else 1)
+        .with_for_update(read=True)
+    ]
+    if index > 0:
+        assert len(neighbour_orders) > 0, "Invalid cell index"
+        prev_order = neighbour_orders[0]
+        next_order = neighbour_orders[1] if len(neighbour_orders) > 1 else None
+    else:
+        prev_order = None
+        next_order = neighbour_orders[0] if len(neighbour_orders) > 0 else None
+
+    if prev_order is None:
+        return 0 if next_order is None else next_order - CELL_ORDER_GAP
+    if next_order is None:
+        return prev_order + CELL_ORDER_GAP
+
+    gap = next_order - prev_order
+    if gap < 2:
+        # Ran out of room before the doc got normalized
+        normalize_data_doc_cell_order(data_doc_id, commit=False, session=session)
+        return _get_cell_order_at(
+            data_doc_id, index, session, exclude_cell_id=exclude_cell_id
+        )
+    if gap <= CELL_ORDER_MIN_GAP:
+        normalize_data_doc_cell_order_task.delay(data_doc_id)
+    return prev_order + gap // 2
+
+
+@with_session
+def normalize_data_doc_cell_order(data_doc_id, commit=True, session=None):
+    """Spread the cell orders of the doc CELL_ORDER_GAP apart"""
+    _lock_data_doc_cell_order(data_doc_id, session)
+    for index, data_doc_cell in enumerate(
+        _query_data_doc_cells(data_doc_id, session).with_for_update()
+    ):
+        cell_order = index * CELL_ORDER_GAP
+        if data_doc_cell.cell_order != cell_order:
+            data_doc_cell.cell_order = cell_order
+
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
+@with_session
+def insert_data_doc_cell(data_doc_id, cell_id, index, commit=True, session=None):
+    data_doc = get_data_doc_by_id(data_doc_id, session=session)
+    data_cell = get_data_cell_by_id(cell_id, session=session)
+
+    _lock_data_doc_cell_order(data_doc_id, session)
+    session.add(
+        DataDocDataCell(
+            data_doc_id=data_doc_id,
+            data_cell_id=cell_id,
+            cell_order=_get_cell_order_at(data_doc_id, index, session),
+        )
     )
+    # The relationships are loaded again with the new cell
+    session.expire(data_doc, ["cells"])
+    session.expire(data_cell, ["doc"])
 
     data_doc.updated_at = datetime.datetime.now()
+    bump_data_doc_version(data_doc)
 
     if commit:
         session.commit()
@@ -367,18 +640,11 @@ def delete_data_doc_cell(data_doc_id, data_cell_id, commit=True, session=None):
 
     assert data_doc_data_cell is not None, "Invalid cell to delete"
 
-    index = data_doc_data_cell.cell_order
-    # Remove the cell from the doc
+    # The cells below keep their order
     session.delete(data_doc_data_cell)
 
-    # Shift cells below up by 1
-    session.query(DataDocDataCell).filter(
-        DataDocDataCell.data_doc_id == data_doc_id
-    ).filter(DataDocDataCell.cell_order > index).update(
-        {DataDocDataCell.cell_order: DataDocDataCell.cell_order - 1}
-    )
-
     data_doc.updated_at = datetime.datetime.now()
+    bump_data_doc_version(data_doc)
 
     if commit:
         session.commit()
@@ -390,47 +656,23 @@ def move_data_doc_cell(data_doc_id, from_index, to_index, commit=True, session=N
     data_doc = get_data_doc_by_id(data_doc_id, session=session)
 
     assert from_index != to_index, "Can't move same cell"
-    assert from_index >= 0 and from_index < len(
-        data_doc.cells
-    ), "Invalid move from index"
-    assert to_index >= 0 and to_index < len(data_doc.cells), "Invalid move to index"
+    assert from_index >= 0, "Invalid move from index"
+    assert to_index >= 0, "Invalid move to index"
 
-    is_move_down = from_index < to_index
-
-    # We will swap from_index to -from_index since this allows parallel
-    # swapping of any other cells in this data doc but makes sure
-    # cell at from_index is locked in place
-    session.query(DataDocDataCell).filter(
-        DataDocDataCell.data_doc_id == data_doc_id
-    ).filter(DataDocDataCell.cell_order == from_index).update(
-        {DataDocDataCell.cell_order: -1}
+    _lock_data_doc_cell_order(data_doc_id, session)
+    data_doc_cell = (
+        _query_data_doc_cells(data_doc_id, session).offset(from_index).first()
     )
+    assert data_doc_cell is not None, "Invalid move from index"
 
-    if is_move_down:
-        session.query(DataDocDataCell).filter(
-            DataDocDataCell.data_doc_id == data_doc_id
-        ).filter(DataDocDataCell.cell_order <= to_index).filter(
-            DataDocDataCell.cell_order > from_index
-        ).update(
-            {DataDocDataCell.cell_order: DataDocDataCell.cell_order - 1}
-        )
-    else:
-        # moving up
-        session.query(DataDocDataCell).filter(
-            DataDocDataCell.data_doc_id == data_doc_id
-        ).filter(DataDocDataCell.cell_order >= to_index).filter(
-            DataDocDataCell.cell_order < from_index
-        ).update(
-            {DataDocDataCell.cell_order: DataDocDataCell.cell_order + 1}
-        )
-
-    session.query(DataDocDataCell).filter(
-        DataDocDataCell.data_doc_id == data_doc_id
-    ).filter(DataDocDataCell.cell_order == -1).update(
-        {DataDocDataCell.cell_order: to_index}
+    # Without the moved cell, the cell at to_index is the one it goes above
+    data_doc_cell.cell_order = _get_cell_order_at(
+        data_doc_id, to_index, session, exclude_cell_id=data_doc_cell.data_cell_id
     )
+    session.expire(data_doc, ["cells"])
 
     data_doc.updated_at = datetime.datetime.now()
+    bump_data_doc_version(data_doc)
 
     if commit:
         session.commit()
@@ -465,7 +707,7 @@ def move_data_doc_cell_to_doc(cell_id, data_doc_id, index, commit=True, session=
     old_data_doc = get_data_doc_by_id(old_doc_id, session=session)
     # If same doc, then reuse the move_data_doc_cell
     if old_doc_id == data_doc_id:
-        from_index = datadoc_datacell.cell_order
+        from_index = get_data_doc_cell_index(cell_id, session=session)
         to_index = index
 
         # The behavior of this function is to insert the cell to be
@@ -479,26 +721,19 @@ def move_data_doc_cell_to_doc(cell_id, data_doc_id, index, commit=True, session=
             data_doc_id, from_index, to_index, commit=commit, session=session,
         )
 
-    # Move every cell in old doc below up 1
-    session.query(DataDocDataCell).filter(
-        DataDocDataCell.data_doc_id == old_doc_id
-    ).filter(DataDocDataCell.cell_order > datadoc_datacell.cell_order).update(
-        {DataDocDataCell.cell_order: DataDocDataCell.cell_order - 1}
-    )
-
-    # Moving every cell in new doc below down 1
-    session.query(DataDocDataCell).filter(
-        DataDocDataCell.data_doc_id == data_doc_id
-    ).filter(DataDocDataCell.cell_order >= index).update(
-        {DataDocDataCell.cell_order: DataDocDataCell.cell_order + 1}
-    )
-
+    # The cells of both docs keep their order
+    _lock_data_doc_cell_order(data_doc_id, session)
+    datadoc_datacell.cell_order = _get_cell_order_at(data_doc_id, index, session)
     datadoc_datacell.data_doc_id = data_doc_id
-    datadoc_datacell.cell_order = index
+    session.expire(data_doc, ["cells"])
+    session.expire(old_data_doc, ["cells"])
+    session.expire(get_data_cell_by_id(cell_id, session=session), ["doc"])
 
     now = datetime.datetime.now()
     data_doc.updated_at = now
     old_data_doc.updated_at = now
+    bump_data_doc_version(data_doc)
+    bump_data_doc_version(old_data_doc)
 
     if commit:
         session.commit()
@@ -895,4 +1130,4 @@ def get_data_cells_executions(ids, session=None):
 
 
 def update_es_data_doc_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.datadocs.value, id])
+    queue_item_sync(ElasticsearchItem.datadocs.value, id)
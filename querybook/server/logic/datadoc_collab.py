@@ -1,21 +1,78 @@
+import time
+
 from app.auth.permission import (
     verify_environment_permission,
     verify_data_doc_permission,
 )
+from app.datasource import api_assert
 from app.flask_app import socketio
 from app.db import with_session
 from const.data_doc import DATA_DOC_NAMESPACE
+from lib.data_doc.data_cell_context import (
+    apply_data_cell_delta,
+    clear_data_cell_context_persist_scheduled,
+    DataCellContextConflict,
+    get_data_cell_context,
+    get_data_cell_contexts,
+    mark_data_cell_context_persist_scheduled,
+    mark_data_cell_context_persisted,
+    replace_data_cell_context,
+)
+from lib.data_doc.text_delta import InvalidDeltaException
 from logic import datadoc as logic
 from logic.datadoc_permission import assert_can_read, assert_can_write
+from tasks.persist_data_cell_context import persist_data_cell_context_task
+
+# Live contexts are persisted once the deltas pause for this long,
+# or at least every MAX_DATA_CELL_CONTEXT_PERSIST_DELAY seconds while
+# the cell keeps getting deltas
+DATA_CELL_CONTEXT_PERSIST_DELAY = 5
+MAX_DATA_CELL_CONTEXT_PERSIST_DELAY = 60
 
 
 @with_session
 def get_datadoc(doc_id, session=None):
+    version = get_datadoc_version(doc_id, session=session)
+    if version is not None:
+        doc = logic.get_serialized_data_doc(doc_id, version, session=session)
+        if doc:
+            return apply_live_data_cell_contexts(doc)
+
+
+def apply_live_data_cell_contexts(doc_dict):
+    """Replace the contexts of the serialized doc with the live ones
+       that are not persisted yet, the serialized doc is not modified
+    """
+    cells = doc_dict.get("cells") or []
+    live_contexts = get_data_cell_contexts([cell["id"] for cell in cells])
+    if not any(
+        cell["id"] in live_contexts
+        and live_contexts[cell["id"]].version > cell["context_version"]
+        for cell in cells
+    ):
+        return doc_dict
+
+    live_cells = []
+    for cell in cells:
+        live_context = live_contexts.get(cell["id"])
+        if live_context is not None and live_context.version > cell["context_version"]:
+            cell = {
+                **cell,
+                "context": live_context.context,
+                "context_version": live_context.version,
+            }
+        live_cells.append(cell)
+    return {**doc_dict, "cells": live_cells}
+
+
+@with_session
+def get_datadoc_version(doc_id, session=None):
+    """Version of the doc after checking the user can read it,
+       None if the doc does not exist
+    """
     assert_can_read(doc_id, session=session)
-    doc = logic.get_data_doc_by_id(id=doc_id, session=session)
-    if doc:
-        verify_environment_permission([doc.environment_id])
-        return doc.to_dict(with_cells=True)
+    verify_data_doc_permission(doc_id, session=session)
+    return logic.get_data_doc_version(doc_id, session=session)
 
 
 @with_session
@@ -112,9 +169,7 @@ def paste_data_cell(
             assert_can_read(old_data_doc.id, session=session)
 
     if cut:
-        old_cell_index = logic.get_data_doc_data_cell(
-            cell_id, session=session
-        ).cell_order
+        old_cell_index = logic.get_data_doc_cell_index(cell_id, session=session)
         logic.move_data_doc_cell_to_doc(cell_id, doc_id, index, session=session)
         if same_doc:
             # Account for shift in original index
@@ -145,6 +200,9 @@ def paste_data_cell(
                 broadcast=True,
             )
     else:  # Copy
+        # Copies the edits that are not persisted yet
+        persist_data_cell_context(cell_id, session=session)
+        session.refresh(data_cell)
         new_cell_dict = insert_data_cell(
             doc_id,
             index,
@@ -169,14 +227,31 @@ def paste_data_cell(
 
 @with_session
 def update_data_cell(cell_id, fields, sid="", session=None):
+    data_doc = logic.get_data_doc_by_data_cell_id(cell_id, session=session)
+    assert data_doc is not None, "A detached cell is read only"
+    assert_can_write(data_doc.id, session=session)
+    verify_environment_permission([data_doc.environment_id])
+
+    fields = dict(fields)
+    context_version = None
+    if fields.get("context") is not None:
+        # Deltas made on the previous versions can no longer be applied
+        context_version = replace_data_cell_context(
+            cell_id,
+            fields["context"],
+            logic.get_data_cell_by_id(cell_id, session=session).context_version,
+        )
+        fields["context_version"] = context_version
+    else:
+        # So the context sent along is the latest
+        persist_data_cell_context(cell_id, session=session)
+
     data_cell = logic.update_data_cell(
         id=cell_id, session=session, commit=False, **fields,
     )
-
-    data_doc = data_cell.doc
-    assert_can_write(data_doc.id, session=session)
-    verify_environment_permission([data_doc.environment_id])
     session.commit()
+    if context_version is not None:
+        mark_data_cell_context_persisted(cell_id, context_version)
 
     data_cell_dict = data_cell.to_dict()
     socketio.emit(
@@ -190,6 +265,129 @@ def update_data_cell(cell_id, fields, sid="", session=None):
     return data_cell_dict
 
 
+@with_session
+def patch_data_cell(cell_id, context_version, delta, sid="", session=None):
+    """Apply a delta to the context of the cell. It is applied to the live
+       context in Redis, which is persisted once the deltas pause.
+
+    Arguments:
+        cell_id {int}
+        context_version {int} -- Version of the context the delta is made on
+        delta {Delta} -- See lib.data_doc.text_delta
+
+    Returns:
+        Dict -- The new context_version and the delta applied to the previous
+                version. If there were other changes since context_version
+                the delta differs and the whole context is included.
+    """
+    data_doc = logic.get_data_doc_by_data_cell_id(cell_id, session=session)
+    assert data_doc is not None, "A detached cell is read only"
+    assert_can_write(data_doc.id, session=session)
+    verify_environment_permission([data_doc.environment_id])
+
+    def load_context():
+        data_cell = logic.get_data_cell_by_id(cell_id, session=session)
+        return data_cell.context or "", data_cell.context_version
+
+    try:
+        live_context, applied_delta = apply_data_cell_delta(
+            cell_id, context_version, delta, load_context
+        )
+    except (DataCellContextConflict, InvalidDeltaException) as e:
+        api_assert(False, str(e), 409)
+
+    if time.time() - live_context.dirty_since > MAX_DATA_CELL_CONTEXT_PERSIST_DELAY:
+        persist_data_cell_context(cell_id, session=session)
+    elif mark_data_cell_context_persist_scheduled(
+        cell_id, MAX_DATA_CELL_CONTEXT_PERSIST_DELAY + DATA_CELL_CONTEXT_PERSIST_DELAY
+    ):
+        # One task per cell until it persists, instead of one per delta
+        persist_data_cell_context_task.apply_async(
+            args=[cell_id], countdown=DATA_CELL_CONTEXT_PERSIST_DELAY
+        )
+
+    socketio.emit(
+        "data_cell_patched",
+        (sid, cell_id, live_context.version, applied_delta),
+        namespace=DATA_DOC_NAMESPACE,
+        room=data_doc.id,
+        broadcast=True,
+    )
+
+    result = {
+        "id": cell_id,
+        "context_version": live_context.version,
+        "delta": applied_delta,
+    }
+    if live_context.version != context_version + 1:
+        result["context"] = live_context.context
+    return result
+
+
+@with_session
+def get_data_cell_context_and_version(cell_id, session=None):
+    """The latest context of the cell, which may not be persisted yet"""
+    data_cell = logic.get_data_cell_by_id(cell_id, session=session)
+    live_context = get_data_cell_context(cell_id)
+    if live_context is not None and live_context.version > data_cell.context_version:
+        return {
+            "context": live_context.context,
+            "context_version": live_context.version,
+        }
+    return {
+        "context": data_cell.context,
+        "context_version": data_cell.context_version,
+    }
+
+
+@with_session
+def persist_data_cell_context(cell_id, session=None):
+    """Write the live context of the cell to the database if it changed"""
+    # Cleared before reading the context, so a delta applied after
+    # the read schedules another persist
+    clear_data_cell_context_persist_scheduled(cell_id)
+    live_context = get_data_cell_context(cell_id)
+    if live_context is None or live_context.dirty_since is None:
+        return
+
+    logic.update_data_cell_context(
+        cell_id, live_context.context, live_context.version, session=session
+    )
+    mark_data_cell_context_persisted(cell_id, live_context.version)
+
+
+@with_session
+def persist_data_cell_context_once_paused(cell_id, session=None):
+    """Called by persist_data_cell_context_task, which is scheduled again
+       if the cell got deltas during the last DATA_CELL_CONTEXT_PERSIST_DELAY
+    """
+    live_context = get_data_cell_context(cell_id)
+    if live_context is not None and live_context.dirty_since is not None:
+        now = time.time()
+        paused_for = now - (live_context.changed_at or 0)
+        if (
+            paused_for < DATA_CELL_CONTEXT_PERSIST_DELAY
+            and now - live_context.dirty_since < MAX_DATA_CELL_CONTEXT_PERSIST_DELAY
+        ):
+            persist_data_cell_context_task.apply_async(
+                args=[cell_id], countdown=DATA_CELL_CONTEXT_PERSIST_DELAY - paused_for
+            )
+            return
+    persist_data_cell_context(cell_id, session=session)
+
+
+@with_session
+def persist_data_doc_cell_contexts(doc_id, session=None):
+    """Write the live contexts of the cells of the doc that changed"""
+    doc = logic.get_data_doc_by_id(doc_id, session=session)
+    if doc is None:
+        return
+    cell_ids = [cell.id for cell in doc.cells]
+    for cell_id, live_context in get_data_cell_contexts(cell_ids).items():
+        if live_context.dirty_since is not None:
+            persist_data_cell_context(cell_id, session=session)
+
+
 @with_session
 def delete_data_cell(doc_id, cell_id, sid="", session=None):
     assert_can_write(doc_id, session=session)
@@ -1,9 +1,8 @@
 from flask_login import current_user
-from sqlalchemy import and_
 
+from app.auth.permission_resolver import get_permission_resolver
 from app.datasource import api_assert
 from app.db import with_session
-from models.datadoc import DataDoc, DataDocEditor
 
 
 class DocDoesNotExist(Exception):
@@ -12,34 +11,44 @@ class DocDoesNotExist(Exception):
 
 @with_session
 def user_can_write(doc_id, uid, session=None):
-    doc, editor = session.query(DataDoc, DataDocEditor).outerjoin(
-        DataDocEditor,
-        and_(DataDoc.id == DataDocEditor.data_doc_id, DataDocEditor.uid == uid),
-    ).filter(DataDoc.id == doc_id).first() or (None, None)
-
-    if doc is None:
+    permission_resolver = get_permission_resolver()
+    editors = permission_resolver.get_data_doc_editors([doc_id], uid, session=session)
+    if doc_id not in editors:
         raise DocDoesNotExist()
 
+    doc = permission_resolver.get_data_docs([doc_id], session=session)[doc_id]
     if doc.owner_uid == uid:
         return True
 
+    editor = editors[doc_id]
     return editor is not None and editor.write
 
 
 @with_session
 def user_can_read(doc_id, uid, session=None):
-    doc, editor = session.query(DataDoc, DataDocEditor).outerjoin(
-        DataDocEditor,
-        and_(DataDoc.id == DataDocEditor.data_doc_id, DataDocEditor.uid == uid),
-    ).filter(DataDoc.id == doc_id).first() or (None, None)
+    return doc_id in get_readable_data_doc_ids([doc_id], uid, session=session)
 
-    if doc is None:
-        raise DocDoesNotExist()
 
-    if doc.public or doc.owner_uid == uid:
-        return True
+@with_session
+def get_readable_data_doc_ids(doc_ids, uid, session=None):
+    """Ids of the docs uid can read
+
+    Raises:
+        DocDoesNotExist: If any of the docs does not exist
+    """
+    permission_resolver = get_permission_resolver()
+    editors = permission_resolver.get_data_doc_editors(doc_ids, uid, session=session)
+    if len(editors) < len(set(doc_ids)):
+        raise DocDoesNotExist()
 
-    return editor is not None and (editor.read or editor.write)
+    docs = permission_resolver.get_data_docs(doc_ids, session=session)
+    return [
+        doc_id
+        for doc_id, editor in editors.items()
+        if docs[doc_id].public
+        or docs[doc_id].owner_uid == uid
+        or (editor is not None and (editor.read or editor.write))
+    ]
 
 
 @with_session
@@ -69,7 +78,11 @@ def assert_can_write(doc_id, session=None):
 @with_session
 def assert_is_owner(doc_id, session=None):
     try:
-        doc = session.query(DataDoc).filter(DataDoc.id == doc_id).first()
+        doc = (
+            get_permission_resolver()
+            .get_data_docs([doc_id], session=session)
+            .get(doc_id)
+        )
         if doc is None:
             raise DocDoesNotExist
         api_assert(
@@ -1,10 +1,19 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from copy import deepcopy
+from functools import partial
 from html import escape
+from itertools import islice
 import math
+import multiprocessing
 import re
+import time
 
 from const.impression import ImpressionItemType
 from env import QuerybookSettings
-from elasticsearch import Elasticsearch, RequestsHttpConnection
+from elasticsearch import Elasticsearch, NotFoundError, RequestsHttpConnection
+from elasticsearch.helpers import streaming_bulk
 
 from lib.utils.utils import (
     DATETIME_TO_UTC,
@@ -13,29 +22,54 @@ from lib.utils.utils import (
 from lib.utils.decorators import in_mem_memoized
 from lib.logger import get_logger
 from lib.config import get_config_value
+from lib.stats_logger import stats_logger
 from lib.richtext import richtext_to_plaintext
+from lib.query_analysis.lineage import process_query
 from app.db import with_session
+from clients.redis_client import with_redis
+from lib.elasticsearch.search_cache import bump_index_generation
+from lib.table_name_index import publish_table_name_changes
+from lib.elasticsearch.sync_queue import (
+    get_queue_size_and_lag,
+    pop_queued_items,
+    requeue_items,
+)
 from logic.datadoc import (
     get_all_data_docs,
     get_data_doc_by_id,
-    get_data_doc_editors_by_doc_id,
+    get_data_docs_by_ids,
+    update_data_cells_plaintext,
 )
 from logic.metastore import (
+    get_all_column_names_by_table_ids,
     get_all_table,
     get_table_by_id,
-    get_table_query_samples_count,
+    get_tables_by_ids,
+    get_tables_query_samples_count,
 )
 
 from logic.impression import (
-    get_viewers_count_by_item_after_date,
+    get_viewers_count_by_items_after_date,
     get_last_impressions_date,
 )
+from logic.query_execution import (
+    get_all_query_executions,
+    get_query_execution_by_ids,
+    get_viewer_uids_by_query_execution_ids,
+)
+from logic.tag import get_tag_names_by_table_ids
+from logic.user import get_all_users, get_users_by_ids
 from models.user import User
 from models.datadoc import DataCellType
 
 
 LOG = get_logger(__file__)
 ES_CONFIG = get_config_value("elasticsearch")
+# Number of times a bulk request rejected with 429 (Too Many Requests)
+# is retried, with exponential backoff starting at 2 seconds
+ES_BULK_MAX_RETRIES = 5
+# Number of rich text cells sent to a process at a time
+ES_RICHTEXT_CHUNK_SIZE = 100
 
 
 @in_mem_memoized(3600)
@@ -67,31 +101,84 @@ def get_hosted_es():
 """
 
 
-@with_session
-def get_datadocs_iter(batch_size=5000, session=None):
-    offset = 0
+def get_pages_iter(get_page, batch_size, session, page_name):
+    """Iterate over all rows page by page, each page starts
+       after the id of the last row of the previous page
+
+    Arguments:
+        get_page {Callable} -- Called with (after_id, limit, session), returns rows ordered by id
+        batch_size {int} -- Number of rows per page
+        session -- Sqlalchemy session
+        page_name {str} -- Name of the rows for logging
+    """
+    after_id = 0
 
     while True:
-        data_docs = get_all_data_docs(limit=batch_size, offset=offset, session=session,)
-        LOG.info("\n--Datadocs count: {}, offset: {}".format(len(data_docs), offset))
+        rows = get_page(after_id=after_id, limit=batch_size, session=session)
+        LOG.info(
+            "\n--{} count: {}, after id: {}".format(page_name, len(rows), after_id)
+        )
 
-        for data_doc in data_docs:
-            expand_datadoc = datadocs_to_es(data_doc, session=session)
-            yield expand_datadoc
+        if rows:
+            yield rows
 
-        if len(data_docs) < batch_size:
+        if len(rows) < batch_size:
             break
-        offset += batch_size
+        after_id = rows[-1].id
+
+
+@with_session
+def get_datadocs_iter(batch_size=5000, session=None):
+    with _get_richtext_process_pool() as richtext_pool:
+        for data_docs in get_pages_iter(
+            get_all_data_docs, batch_size, session, "Datadocs"
+        ):
+            if richtext_pool is not None:
+                update_data_cells_plaintext(
+                    [cell for data_doc in data_docs for cell in data_doc.cells],
+                    map_fn=partial(richtext_pool.map, chunksize=ES_RICHTEXT_CHUNK_SIZE),
+                )
+
+            expand_datadocs = [
+                datadocs_to_es(data_doc, session=session) for data_doc in data_docs
+            ]
+            # Save the extracted cell texts for the next updates
+            session.commit()
+
+            for expand_datadoc in expand_datadocs:
+                yield expand_datadoc
+
+
+@contextmanager
+def _get_richtext_process_pool():
+    """Yields a process pool to convert rich text cells,
+       or None if they should be converted in this process
+    """
+    process_count = QuerybookSettings.ELASTICSEARCH_TEXT_PROCESS_COUNT
+    if process_count <= 0:
+        yield None
+    elif multiprocessing.current_process().daemon:
+        # e.g Celery prefork workers, daemonic processes cannot have children
+        LOG.warning("Cannot start processes from a daemon, rich text is converted here")
+        yield None
+    else:
+        with ProcessPoolExecutor(max_workers=process_count) as pool:
+            yield pool
 
 
 @with_session
 def datadocs_to_es(datadoc, session=None):
+    """Build the ES document of the data doc. The text of its text cells is
+       only extracted for the cells that changed since the last build, the
+       caller should commit the session to keep it.
+    """
     title = datadoc.title
+    update_data_cells_plaintext(datadoc.cells)
 
     cells_as_text = []
     for cell in datadoc.cells:
         if cell.cell_type == DataCellType.text:
-            cells_as_text.append(richtext_to_plaintext(cell.context))
+            cells_as_text.append(cell.plaintext)
         elif cell.cell_type == DataCellType.query:
             cell_title = cell.meta.get("title", "")
             cell_text = (
@@ -105,16 +192,7 @@ def datadocs_to_es(datadoc, session=None):
 
     # There is no need to compute the list of editors
     # for public datadoc since everyone is able to see it
-    editors = (
-        [
-            editor.uid
-            for editor in get_data_doc_editors_by_doc_id(
-                data_doc_id=datadoc.id, session=session
-            )
-        ]
-        if not datadoc.public
-        else []
-    )
+    editors = [editor.uid for editor in datadoc.editors] if not datadoc.public else []
     expand_datadoc = {
         "id": datadoc.id,
         "environment_id": datadoc.environment_id,
@@ -128,13 +206,11 @@ def datadocs_to_es(datadoc, session=None):
     return expand_datadoc
 
 
-@with_exception
-def _bulk_insert_datadocs():
+def _bulk_insert_datadocs(index_name=None, op_type="index"):
     type_name = ES_CONFIG["datadocs"]["type_name"]
-    index_name = ES_CONFIG["datadocs"]["index_name"]
+    index_name = index_name or ES_CONFIG["datadocs"]["index_name"]
 
-    for datadoc in get_datadocs_iter():
-        _insert(index_name, type_name, datadoc["id"], datadoc)
+    return _bulk_index(index_name, type_name, get_datadocs_iter(), op_type=op_type)
 
 
 @with_exception
@@ -151,6 +227,7 @@ def update_data_doc_by_id(doc_id, session=None):
             LOG.error("failed to delete {}. Will pass.".format(doc_id))
     else:
         formatted_object = datadocs_to_es(doc, session=session)
+        session.commit()
         try:
             # Try to update if present
             updated_body = {
@@ -169,94 +246,112 @@ def update_data_doc_by_id(doc_id, session=None):
 
 @with_session
 def get_tables_iter(batch_size=5000, session=None):
-    offset = 0
+    for tables in get_pages_iter(get_all_table, batch_size, session, "Table"):
+        for expand_table in tables_to_es(tables, session=session):
+            yield expand_table
 
-    while True:
-        tables = get_all_table(limit=batch_size, offset=offset, session=session,)
-        LOG.info("\n--Table count: {}, offset: {}".format(len(tables), offset))
 
-        for table in tables:
-            expand_table = table_to_es(table, session=session)
-            yield expand_table
+def get_table_weight(num_samples: int, num_impressions: int, boost_score) -> int:
+    """Calculate the weight of table. Used for ranking in auto completion
+       and sidebar table search. It produces a number >= 0
 
-        if len(tables) < batch_size:
-            break
-        offset += batch_size
+
+    Arguments:
+        num_samples {int} -- Number of query samples of the table
+        num_impressions {int} -- Number of unique viewers of the table
+        boost_score {Decimal} -- DataTable.boost_score
+
+    Returns:
+        int -- The integer weight
+    """
+    # Samples worth 10x as much as impression
+    # Log the score to flatten the score distrution (since its power law distribution)
+    return int(math.log2(((num_impressions + num_samples * 10) + 1) * boost_score))
 
 
 @with_session
-def get_table_weight(table_id: int, session=None) -> int:
-    """Calculate the weight of table. Used for ranking in auto completion
-       and sidebar table search. It produces a number >= 0
+def table_to_es(table, session=None):
+    return tables_to_es([table], session=session)[0]
+
 
+@with_session
+def tables_to_es(tables, session=None):
+    """Build the ES documents of a page of tables. The columns, tags,
+       samples count and impressions count of all the tables are fetched
+       with one grouped query each instead of several queries per table.
 
     Arguments:
-        table_id {int} -- Id of DataTable
+        tables {List[DataTable]}
 
     Keyword Arguments:
         session -- Sqlalchemy DB session (default: {None})
 
     Returns:
-        int -- The integer weight
+        List[Dict] -- ES table documents in the same order as tables
     """
-    num_samples = get_table_query_samples_count(table_id, session=session)
-    num_impressions = get_viewers_count_by_item_after_date(
+    table_ids = [table.id for table in tables]
+    column_names_by_table_id = get_all_column_names_by_table_ids(
+        table_ids, session=session
+    )
+    tag_names_by_table_id = get_tag_names_by_table_ids(table_ids, session=session)
+    samples_count_by_table_id = get_tables_query_samples_count(
+        table_ids, session=session
+    )
+    impressions_count_by_table_id = get_viewers_count_by_items_after_date(
         ImpressionItemType.DATA_TABLE,
-        table_id,
+        table_ids,
         get_last_impressions_date(),
         session=session,
     )
-    boost_score = get_table_by_id(table_id, session=session).boost_score
 
-    # Samples worth 10x as much as impression
-    # Log the score to flatten the score distrution (since its power law distribution)
-    return int(math.log2(((num_impressions + num_samples * 10) + 1) * boost_score))
+    expand_tables = []
+    for table in tables:
+        schema = table.data_schema
 
+        schema_name = schema.name
+        table_name = table.name
+        description = (
+            richtext_to_plaintext(table.information.description, escape=True)
+            if table.information
+            else ""
+        )
 
-@with_session
-def table_to_es(table, session=None):
-    schema = table.data_schema
-
-    column_names = [c.name for c in table.columns]
-    schema_name = schema.name
-    table_name = table.name
-    description = (
-        richtext_to_plaintext(table.information.description, escape=True)
-        if table.information
-        else ""
-    )
+        full_name = "{}.{}".format(schema_name, table_name)
+        weight = get_table_weight(
+            samples_count_by_table_id.get(table.id, 0),
+            impressions_count_by_table_id.get(table.id, 0),
+            table.boost_score,
+        )
 
-    full_name = "{}.{}".format(schema_name, table_name)
-    weight = get_table_weight(table.id, session=session)
-
-    expand_table = {
-        "id": table.id,
-        "metastore_id": schema.metastore_id,
-        "schema": schema_name,
-        "name": table_name,
-        "full_name": full_name,
-        "full_name_ngram": full_name,
-        "completion_name": {
-            "input": [full_name, table_name,],
-            "weight": weight,
-            "contexts": {"metastore_id": schema.metastore_id,},
-        },
-        "description": description,
-        "created_at": DATETIME_TO_UTC(table.created_at),
-        "columns": column_names,
-        "golden": table.golden,
-        "importance_score": weight,
-        "tags": [tag.tag_name for tag in table.tags],
-    }
-    return expand_table
+        expand_tables.append(
+            {
+                "id": table.id,
+                "metastore_id": schema.metastore_id,
+                "schema": schema_name,
+                "name": table_name,
+                "full_name": full_name,
+                "full_name_ngram": full_name,
+                "completion_name": {
+                    "input": [full_name, table_name,],
+                    "weight": weight,
+                    "contexts": {"metastore_id": schema.metastore_id,},
+                },
+                "description": description,
+                "created_at": DATETIME_TO_UTC(table.created_at),
+                "columns": column_names_by_table_id[table.id],
+                "golden": table.golden,
+                "importance_score": weight,
+                "tags": tag_names_by_table_id[table.id],
+            }
+        )
+    return expand_tables
 
 
-def _bulk_insert_tables():
+def _bulk_insert_tables(index_name=None, op_type="index"):
     type_name = ES_CONFIG["tables"]["type_name"]
-    index_name = ES_CONFIG["tables"]["index_name"]
+    index_name = index_name or ES_CONFIG["tables"]["index_name"]
 
-    for table in get_tables_iter():
-        _insert(index_name, type_name, table["id"], table)
+    return _bulk_index(index_name, type_name, get_tables_iter(), op_type=op_type)
 
 
 @with_exception
@@ -280,6 +375,7 @@ def update_table_by_id(table_id, session=None):
         except Exception:
             # Otherwise insert as new
             LOG.error("failed to upsert {}. Will pass.".format(table_id))
+        _publish_table_name_changes([formatted_object], [])
 
 
 def delete_es_table_by_id(table_id,):
@@ -289,6 +385,15 @@ def delete_es_table_by_id(table_id,):
         _delete(index_name, type_name, id=table_id)
     except Exception:
         LOG.error("failed to delete {}. Will pass.".format(table_id))
+    _publish_table_name_changes([], [table_id])
+
+
+def _publish_table_name_changes(table_docs, deleted_ids):
+    try:
+        publish_table_name_changes(table_docs, deleted_ids)
+    except Exception:
+        # The table name indices are rebuilt daily anyway
+        LOG.error("failed to publish table name changes. Will pass.")
 
 
 """
@@ -327,27 +432,17 @@ def user_to_es(user, session=None):
 
 @with_session
 def get_users_iter(batch_size=5000, session=None):
-    offset = 0
-
-    while True:
-        users = User.get_all(limit=batch_size, offset=offset, session=session,)
-        LOG.info("\n--User count: {}, offset: {}".format(len(users), offset))
-
+    for users in get_pages_iter(get_all_users, batch_size, session, "User"):
         for user in users:
             expanded_user = user_to_es(user, session=session)
             yield expanded_user
 
-        if len(users) < batch_size:
-            break
-        offset += batch_size
-
 
-def _bulk_insert_users():
+def _bulk_insert_users(index_name=None, op_type="index"):
     type_name = ES_CONFIG["users"]["type_name"]
-    index_name = ES_CONFIG["users"]["index_name"]
+    index_name = index_name or ES_CONFIG["users"]["index_name"]
 
-    for user in get_users_iter():
-        _insert(index_name, type_name, user["id"], user)
+    return _bulk_index(index_name, type_name, get_users_iter(), op_type=op_type)
 
 
 @with_exception
@@ -376,59 +471,422 @@ def update_user_by_id(uid, session=None):
 
 
 """
-    Elastic Search Utils
+    QUERY EXECUTIONS
 """
 
 
-def _insert(index_name, doc_type, id, content):
-    get_hosted_es().index(index=index_name, doc_type=doc_type, id=id, body=content)
+def _get_query_table_names(query, language):
+    try:
+        table_per_statement, _ = process_query(query, language)
+    except Exception:
+        # Queries that cannot be parsed are still searchable by their text
+        return []
+    return sorted(set(table for tables in table_per_statement for table in tables))
+
+
+@with_session
+def query_executions_to_es(query_executions, session=None):
+    """Build the ES documents of the query executions, their
+       viewers are fetched with one query
+    """
+    viewer_uids_by_id = get_viewer_uids_by_query_execution_ids(
+        [query_execution.id for query_execution in query_executions], session=session
+    )
+
+    return [
+        {
+            "id": query_execution.id,
+            "query": escape(query_execution.query or ""),
+            "tables": _get_query_table_names(
+                query_execution.query or "",
+                query_execution.engine.language if query_execution.engine else None,
+            ),
+            "engine_id": query_execution.engine_id,
+            "uid": query_execution.uid,
+            "readable_user_ids": viewer_uids_by_id[query_execution.id],
+            "status": query_execution.status.value,
+            "created_at": DATETIME_TO_UTC(query_execution.created_at),
+            "completed_at": DATETIME_TO_UTC(query_execution.completed_at)
+            if query_execution.completed_at
+            else None,
+        }
+        for query_execution in query_executions
+    ]
+
+
+@with_session
+def get_query_executions_iter(batch_size=5000, session=None):
+    for query_executions in get_pages_iter(
+        get_all_query_executions, batch_size, session, "Query executions"
+    ):
+        for expand_query_execution in query_executions_to_es(
+            query_executions, session=session
+        ):
+            yield expand_query_execution
+
+
+def _bulk_insert_query_executions(index_name=None, op_type="index"):
+    type_name = ES_CONFIG["query_executions"]["type_name"]
+    index_name = index_name or ES_CONFIG["query_executions"]["index_name"]
+
+    return _bulk_index(
+        index_name, type_name, get_query_executions_iter(), op_type=op_type
+    )
+
+
+@with_exception
+@with_session
+def update_query_execution_by_id(query_execution_id, session=None):
+    type_name = ES_CONFIG["query_executions"]["type_name"]
+    index_name = ES_CONFIG["query_executions"]["index_name"]
+
+    query_executions = get_query_execution_by_ids([query_execution_id], session=session)
+    if not query_executions:
+        try:
+            _delete(index_name, type_name, id=query_execution_id)
+        except Exception:
+            LOG.error("failed to delete {}. Will pass.".format(query_execution_id))
+    else:
+        formatted_object = query_executions_to_es(query_executions, session=session)[0]
+        try:
+            # Try to update if present
+            updated_body = {
+                "doc": formatted_object,
+                "doc_as_upsert": True,
+            }  # ES requires this format for updates
+            _update(index_name, type_name, query_execution_id, updated_body)
+        except Exception:
+            LOG.error("failed to upsert {}. Will pass.".format(query_execution_id))
+
+
+"""
+    SYNC QUEUE
+"""
+
+
+@with_session
+def _get_data_docs_to_sync(ids, session=None):
+    docs = [
+        datadocs_to_es(data_doc, session=session)
+        for data_doc in get_data_docs_by_ids(ids, session=session)
+        if not data_doc.archived
+    ]
+    session.commit()
+    return docs, _get_deleted_ids(ids, docs)
+
+
+@with_session
+def _get_tables_to_sync(ids, session=None):
+    tables = get_tables_by_ids(ids, session=session)
+    docs = tables_to_es(tables, session=session) if tables else []
+    deleted_ids = _get_deleted_ids(ids, docs)
+    _publish_table_name_changes(docs, deleted_ids)
+    return docs, deleted_ids
+
+
+@with_session
+def _get_users_to_sync(ids, session=None):
+    docs = [
+        user_to_es(user, session=session)
+        for user in get_users_by_ids(ids, session=session)
+        if not user.deleted
+    ]
+    return docs, _get_deleted_ids(ids, docs)
+
+
+@with_session
+def _get_query_executions_to_sync(ids, session=None):
+    query_executions = get_query_execution_by_ids(ids, session=session)
+    docs = query_executions_to_es(query_executions, session=session)
+    return docs, _get_deleted_ids(ids, docs)
+
+
+def _get_deleted_ids(ids, docs):
+    indexed_ids = set(doc["id"] for doc in docs)
+    return [item_id for item_id in ids if item_id not in indexed_ids]
+
+
+SYNC_DOCS_BY_TYPE_NAME = {
+    "datadocs": _get_data_docs_to_sync,
+    "tables": _get_tables_to_sync,
+    "users": _get_users_to_sync,
+    "query_executions": _get_query_executions_to_sync,
+}
+
+
+def sync_queued_items(
+    item_type, batch_size=QuerybookSettings.ELASTICSEARCH_BULK_CHUNK_SIZE
+):
+    """Update the documents of all the items in the sync queue of item_type,
+       with one bulk request per batch_size items. Items that failed to sync
+       are queued again once the queue is drained.
+
+    Arguments:
+        item_type {str} -- One of ElasticsearchItem
+
+    Returns:
+        Tuple[int, int] -- Number of synced items and number of failed items
+    """
+    es_config = ES_CONFIG[item_type]
+    tags = {"item_type": item_type}
+
+    queue_size, queue_lag = get_queue_size_and_lag(item_type)
+    stats_logger.gauge("elasticsearch.sync_queue.size", queue_size, tags=tags)
+    stats_logger.gauge("elasticsearch.sync_queue.lag_seconds", queue_lag, tags=tags)
+
+    num_synced = 0
+    failed_items = {}
+    try:
+        while True:
+            queued_items = pop_queued_items(item_type, batch_size)
+            if not queued_items:
+                break
+            queued_at_by_id = dict(queued_items)
+
+            try:
+                docs, deleted_ids = SYNC_DOCS_BY_TYPE_NAME[item_type](
+                    list(queued_at_by_id.keys())
+                )
+                failed_ids = _bulk_sync(
+                    es_config["index_name"], es_config["type_name"], docs, deleted_ids
+                )
+            except Exception:
+                failed_items.update(queued_at_by_id)
+                raise
+
+            failed_items.update(
+                (item_id, queued_at_by_id[item_id]) for item_id in failed_ids
+            )
+            num_synced += len(queued_items) - len(failed_ids)
+
+            if len(queued_items) < batch_size:
+                break
+    finally:
+        requeue_items(item_type, failed_items)
+        stats_logger.incr("elasticsearch.sync_queue.synced", num_synced, tags=tags)
+        stats_logger.incr(
+            "elasticsearch.sync_queue.failed", len(failed_items), tags=tags
+        )
+
+    LOG.info(
+        "Synced {} {}, {} failed, queue lag was {:.1f}s".format(
+            num_synced, item_type, len(failed_items), queue_lag
+        )
+    )
+    return num_synced, len(failed_items)
+
+
+"""
+    Elastic Search Utils
+"""
 
 
 def _delete(index_name, doc_type, id):
-    get_hosted_es().delete(index=index_name, doc_type=doc_type, id=id)
+    # Searches cached before the refresh would still see the deleted doc
+    get_hosted_es().delete(
+        index=index_name, doc_type=doc_type, id=id, refresh="wait_for"
+    )
+    bump_index_generation(index_name)
+
+    for rebuilding_index_name in _get_rebuilding_index_names(index_name):
+        try:
+            get_hosted_es().delete(
+                index=rebuilding_index_name, doc_type=doc_type, id=id
+            )
+        except NotFoundError:
+            pass
+        except Exception:
+            LOG.error("failed to dual delete {}. Will pass.".format(id))
 
 
 def _update(index_name, doc_type, id, content):
-    get_hosted_es().update(index=index_name, doc_type=doc_type, id=id, body=content)
+    # Searches cached before the refresh would still see the old doc
+    get_hosted_es().update(
+        index=index_name, doc_type=doc_type, id=id, body=content, refresh="wait_for"
+    )
+    bump_index_generation(index_name)
 
+    # Dual write to the index that is being rebuilt so
+    # changes made during the rebuild are not lost after the swap
+    for rebuilding_index_name in _get_rebuilding_index_names(index_name):
+        try:
+            get_hosted_es().update(
+                index=rebuilding_index_name, doc_type=doc_type, id=id, body=content
+            )
+        except Exception:
+            LOG.error("failed to dual write {}. Will pass.".format(id))
 
-def create_indices(*config_names):
-    es_configs = get_es_config_by_name(*config_names)
-    for es_config in es_configs:
-        get_hosted_es().indices.create(es_config["index_name"], es_config["mappings"])
 
-    LOG.info("Inserting datadocs")
-    _bulk_insert_datadocs()
+def _bulk_sync(index_name, doc_type, docs, deleted_ids):
+    """Index the docs and delete the deleted ids in one bulk request.
+       Like _update, it is dual written to the index being rebuilt.
 
-    LOG.info("Inserting tables")
-    _bulk_insert_tables()
+    Returns:
+        Set[int] -- ids that failed to sync
+    """
+    # Searches cached before the refresh would still see the old docs
+    failed_ids = _bulk_sync_index(
+        index_name, doc_type, docs, deleted_ids, refresh="wait_for"
+    )
+    bump_index_generation(index_name)
+
+    for rebuilding_index_name in _get_rebuilding_index_names(index_name):
+        try:
+            _bulk_sync_index(rebuilding_index_name, doc_type, docs, deleted_ids)
+        except Exception:
+            LOG.error(
+                "failed to dual write sync to {}. Will pass.".format(
+                    rebuilding_index_name
+                )
+            )
+    return failed_ids
+
+
+def _bulk_sync_index(index_name, doc_type, docs, deleted_ids, refresh=None):
+    actions = [
+        {
+            "_op_type": "index",
+            "_index": index_name,
+            "_type": doc_type,
+            "_id": doc["id"],
+            "_source": doc,
+        }
+        for doc in docs
+    ] + [
+        {"_op_type": "delete", "_index": index_name, "_type": doc_type, "_id": item_id}
+        for item_id in deleted_ids
+    ]
+    if not actions:
+        return set()
+
+    failed_ids = set()
+    for ok, item in streaming_bulk(
+        get_hosted_es(),
+        actions,
+        chunk_size=len(actions),
+        max_retries=ES_BULK_MAX_RETRIES,
+        raise_on_error=False,
+        refresh=refresh,
+    ):
+        if ok:
+            continue
+        op_type, result = next(iter(item.items()))
+        if op_type == "delete" and result.get("status") == 404:
+            # Already deleted or never indexed
+            continue
+        failed_ids.add(int(result["_id"]))
+        LOG.error("failed to sync {}. Will pass.".format(item))
+    return failed_ids
+
+
+def _bulk_index(
+    index_name,
+    doc_type,
+    docs,
+    op_type="index",
+    chunk_size=QuerybookSettings.ELASTICSEARCH_BULK_CHUNK_SIZE,
+    thread_count=QuerybookSettings.ELASTICSEARCH_BULK_THREAD_COUNT,
+):
+    """Index all docs with bulk requests of chunk_size documents.
+
+       Documents are built from the iterator in the calling thread (since it
+       holds the db session) and up to thread_count bulk requests are sent in
+       parallel. At most 2 * thread_count chunks are kept in memory.
 
-    LOG.info("Inserting users")
-    _bulk_insert_users()
+    Arguments:
+        index_name {str}
+        doc_type {str}
+        docs {Iterable[Dict]} -- ES documents, each must contain "id"
 
+    Keyword Arguments:
+        op_type {str} -- "index" overwrites existing documents, "create" keeps
+                         them (default: {"index"})
 
-def create_indices_if_not_exist(*config_names):
-    es_configs = get_es_config_by_name(*config_names)
-    for es_config in es_configs:
-        if not get_hosted_es().indices.exists(index=es_config["index_name"]):
-            get_hosted_es().indices.create(
-                es_config["index_name"], es_config["mappings"]
+    Returns:
+        Tuple[int, int] -- Number of indexed docs and number of failed docs
+    """
+    start_time = time.time()
+    num_indexed = 0
+    num_failed = 0
+    pending_chunks = deque()
+
+    def wait_for_oldest_chunk():
+        nonlocal num_indexed, num_failed
+        chunk_indexed, chunk_failed = pending_chunks.popleft().result()
+        num_indexed += chunk_indexed
+        num_failed += chunk_failed
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        docs_iter = iter(docs)
+        while True:
+            chunk = list(islice(docs_iter, chunk_size))
+            if not chunk:
+                break
+
+            pending_chunks.append(
+                executor.submit(_bulk_index_chunk, index_name, doc_type, chunk, op_type)
             )
-            if es_config["type_name"] == "datadocs":
-                LOG.info("Inserting datadocs")
-                _bulk_insert_datadocs()
-            elif es_config["type_name"] == "tables":
-                LOG.info("Inserting tables")
-                _bulk_insert_tables()
-            elif es_config["type_name"] == "users":
-                LOG.info("Inserting users")
-                _bulk_insert_users()
+            if len(pending_chunks) >= thread_count * 2:
+                wait_for_oldest_chunk()
+
+        while pending_chunks:
+            wait_for_oldest_chunk()
+
+    duration = time.time() - start_time
+    tags = {"index": index_name}
+    stats_logger.timing("elasticsearch.bulk_index.time", duration * 1000, tags=tags)
+    stats_logger.incr("elasticsearch.bulk_index.indexed", num_indexed, tags=tags)
+    stats_logger.incr("elasticsearch.bulk_index.failed", num_failed, tags=tags)
+    LOG.info(
+        "Bulk indexed {} docs into {} in {:.1f}s ({:.1f} docs/s), {} failed".format(
+            num_indexed,
+            index_name,
+            duration,
+            num_indexed / duration if duration else 0,
+            num_failed,
+        )
+    )
+    return num_indexed, num_failed
+
+
+def _bulk_index_chunk(index_name, doc_type, docs, op_type="index"):
+    actions = (
+        {
+            "_op_type": op_type,
+            "_index": index_name,
+            "_type": doc_type,
+            "_id": doc["id"],
+            "_source": doc,
+        }
+        for doc in docs
+    )
 
+    num_indexed = 0
+    num_failed = 0
+    try:
+        for ok, item in streaming_bulk(
+            get_hosted_es(),
+            actions,
+            chunk_size=len(docs),
+            max_retries=ES_BULK_MAX_RETRIES,
+            raise_on_error=False,
+        ):
+            if ok or (
+                # The document was already written by a newer update
+                op_type == "create"
+                and item.get("create", {}).get("status") == 409
+            ):
+                num_indexed += 1
+            else:
+                num_failed += 1
+                LOG.error("failed to index {}. Will pass.".format(item))
+    except Exception:
+        # Bulk request failed entirely, move on with the other chunks
+        import traceback
 
-def delete_indices(*config_names):
-    es_configs = get_es_config_by_name(*config_names)
-    for es_config in es_configs:
-        get_hosted_es().indices.delete(es_config["index_name"])
+        LOG.error(traceback.format_exc())
+        num_failed = len(docs) - num_indexed
+    return num_indexed, num_failed
 
 
 def get_es_config_by_name(*config_names):
@@ -437,6 +895,182 @@ def get_es_config_by_name(*config_names):
     return [ES_CONFIG[config_name] for config_name in config_names]
 
 
+"""
+    Index management
+
+    The index_name in elasticsearch.yaml is an alias, it points to a
+    versioned index ({index_name}_{timestamp}) which can be rebuilt
+    in the background and swapped without search downtime.
+"""
+
+
+def create_indices(*config_names):
+    for es_config in get_es_config_by_name(*config_names):
+        _rebuild_index(es_config)
+
+
+def create_indices_if_not_exist(*config_names):
+    """Create the missing indices empty so it does not block the startup,
+       they are populated in the background by a celery task
+    """
+    # Delaying this import to avoid circular dependency
+    from tasks.sync_elasticsearch import recreate_elasticsearch_indices
+
+    for config_name in config_names or ES_CONFIG.keys():
+        es_config = ES_CONFIG[config_name]
+        # exists is true for both aliases and (legacy) concrete indices
+        if not get_hosted_es().indices.exists(index=es_config["index_name"]):
+            _create_empty_index(es_config)
+            recreate_elasticsearch_indices.delay(config_name)
+
+
+def delete_indices(*config_names):
+    for es_config in get_es_config_by_name(*config_names):
+        alias_name = es_config["index_name"]
+        index_names = _get_aliased_index_names(alias_name) or [alias_name]
+        index_names += _get_rebuilding_index_names(alias_name)
+        _clear_rebuilding_index_name(alias_name)
+        get_hosted_es().indices.delete(",".join(index_names), ignore=404)
+        bump_index_generation(alias_name)
+
+
 def recreate_indices(*config_names):
-    delete_indices(*config_names)
-    create_indices_if_not_exist(*config_names)
+    """Rebuild the indices without downtime, search keeps using
+       the old index until the new one is fully populated
+    """
+    for es_config in get_es_config_by_name(*config_names):
+        _rebuild_index(es_config)
+
+
+BULK_INSERT_BY_TYPE_NAME = {
+    "datadocs": _bulk_insert_datadocs,
+    "tables": _bulk_insert_tables,
+    "users": _bulk_insert_users,
+    "query_executions": _bulk_insert_query_executions,
+}
+# Rebuild is aborted (and the old index kept) if more docs failed to index
+ES_REBUILD_MAX_FAILED_RATIO = 0.01
+# The dual write marker expires in case the rebuild process died
+ES_REBUILD_MARKER_EXPIRATION = 24 * 60 * 60
+
+
+def _rebuild_index(es_config):
+    es = get_hosted_es()
+    alias_name = es_config["index_name"]
+    new_index_name = "{}_{}".format(alias_name, int(time.time()))
+    old_index_names = _get_aliased_index_names(alias_name)
+
+    LOG.info("Building {} for {}".format(new_index_name, alias_name))
+    es.indices.create(new_index_name, _get_bulk_build_index_body(es_config))
+    _set_rebuilding_index_name(alias_name, new_index_name)
+    try:
+        # Use create so documents dual written during the rebuild
+        # are not overwritten by the older version in the bulk insert
+        num_indexed, num_failed = BULK_INSERT_BY_TYPE_NAME[es_config["type_name"]](
+            index_name=new_index_name, op_type="create"
+        )
+
+        # Restore the settings disabled for the bulk insert
+        settings = es_config["mappings"].get("settings", {})
+        es.indices.put_settings(
+            {
+                "index": {
+                    "refresh_interval": settings.get("refresh_interval"),
+                    "number_of_replicas": settings.get("number_of_replicas"),
+                }
+            },
+            index=new_index_name,
+        )
+        es.indices.refresh(index=new_index_name)
+
+        _verify_rebuilt_index(new_index_name, num_indexed, num_failed)
+        _swap_alias(alias_name, new_index_name, old_index_names)
+    except Exception:
+        LOG.error("Failed to build {}, removing it".format(new_index_name))
+        es.indices.delete(new_index_name, ignore=404)
+        raise
+    finally:
+        _clear_rebuilding_index_name(alias_name)
+
+    if old_index_names:
+        LOG.info("Deleting old indices {}".format(old_index_names))
+        es.indices.delete(",".join(old_index_names), ignore=404)
+
+
+def _create_empty_index(es_config):
+    alias_name = es_config["index_name"]
+    index_name = "{}_{}".format(alias_name, int(time.time()))
+    LOG.info("Creating empty {} for {}".format(index_name, alias_name))
+    get_hosted_es().indices.create(index_name, es_config["mappings"])
+    _swap_alias(alias_name, index_name, [])
+
+
+def _get_bulk_build_index_body(es_config):
+    """Disable refresh and replicas while the index is being bulk inserted"""
+    body = deepcopy(es_config["mappings"])
+    body.setdefault("settings", {}).update(
+        {"refresh_interval": -1, "number_of_replicas": 0}
+    )
+    return body
+
+
+def _verify_rebuilt_index(index_name, num_indexed, num_failed):
+    doc_count = get_hosted_es().count(index=index_name)["count"]
+    num_docs = num_indexed + num_failed
+
+    # The count can be higher since documents are dual written during rebuild
+    if doc_count < num_indexed:
+        raise Exception(
+            "{} has {} docs, expected {}".format(index_name, doc_count, num_indexed)
+        )
+    if num_docs and num_failed / num_docs > ES_REBUILD_MAX_FAILED_RATIO:
+        raise Exception(
+            "{} failed to index {} of {} docs".format(index_name, num_failed, num_docs)
+        )
+
+
+def _swap_alias(alias_name, new_index_name, old_index_names):
+    es = get_hosted_es()
+    if not old_index_names and es.indices.exists(index=alias_name):
+        # The index was created before aliases were used,
+        # it has to be removed before the alias can take its name
+        LOG.info("Replacing legacy index {} with alias".format(alias_name))
+        es.indices.delete(alias_name)
+
+    # Both actions are applied atomically
+    actions = [
+        {"remove": {"index": old_index_name, "alias": alias_name}}
+        for old_index_name in old_index_names
+    ] + [{"add": {"index": new_index_name, "alias": alias_name}}]
+    es.indices.update_aliases({"actions": actions})
+    bump_index_generation(alias_name)
+    LOG.info("Alias {} now points to {}".format(alias_name, new_index_name))
+
+
+def _get_aliased_index_names(alias_name):
+    es = get_hosted_es()
+    if not es.indices.exists_alias(name=alias_name):
+        return []
+    return list(es.indices.get_alias(name=alias_name).keys())
+
+
+def _get_rebuilding_key(alias_name):
+    return "elasticsearch_rebuilding_index:{}".format(alias_name)
+
+
+@with_redis
+def _set_rebuilding_index_name(alias_name, index_name, redis_conn=None):
+    redis_conn.set(
+        _get_rebuilding_key(alias_name), index_name, ex=ES_REBUILD_MARKER_EXPIRATION
+    )
+
+
+@with_redis
+def _clear_rebuilding_index_name(alias_name, redis_conn=None):
+    redis_conn.delete(_get_rebuilding_key(alias_name))
+
+
+@with_redis
+def _get_rebuilding_index_names(alias_name, redis_conn=None):
+    index_name = redis_conn.get(_get_rebuilding_key(alias_name))
+    return [index_name.decode("utf-8")] if index_name else []
@@ -1,6 +1,7 @@
 from datetime import datetime
 from sqlalchemy import or_
 from app.db import with_session
+from lib.utils.decorators import in_mem_memoized
 
 # from lib.config import get_config_value
 from logic.user import get_user_by_id
@@ -20,7 +21,7 @@ def create_environment(
     commit=True,
     session=None,
 ):
-    return Environment.create(
+    environment = Environment.create(
         {
             "name": name,
             "description": description,
@@ -33,6 +34,9 @@ def create_environment(
         commit=commit,
         session=session,
     )
+    if public:
+        get_all_accessible_environment_ids_by_uid.invalidate_all()
+    return environment
 
 
 @with_session
@@ -62,6 +66,9 @@ def get_all_visible_environments_by_uid(uid, session=None):
     )
 
 
+# Used by every environment permission check, invalidated on any change
+# of environment membership or visibility
+@in_mem_memoized(ttl_secs=300, max_size=10000, invalidate_across_processes=True)
 @with_session
 def get_all_accessible_environment_ids_by_uid(uid, session=None):
     return list(
@@ -95,13 +102,16 @@ def get_all_environment(include_deleted=False, session=None):
 
 @with_session
 def update_environment(id, commit=True, session=None, **field_to_update):
-    return Environment.update(
+    environment = Environment.update(
         id,
         fields=field_to_update,
         field_names=["name", "description", "image", "public", "hidden", "shareable"],
         commit=commit,
         session=session,
     )
+    if "public" in field_to_update:
+        get_all_accessible_environment_ids_by_uid.invalidate_all()
+    return environment
 
 
 @with_session
@@ -115,6 +125,7 @@ def delete_environment_by_id(id, commit=True, session=None):
         else:
             session.flush()
         session.refresh(environment)
+        get_all_accessible_environment_ids_by_uid.invalidate_all()
 
 
 @with_session
@@ -128,6 +139,7 @@ def recover_environment_by_id(id, commit=True, session=None):
         else:
             session.flush()
         session.refresh(environment)
+        get_all_accessible_environment_ids_by_uid.invalidate_all()
 
 
 @with_session
@@ -154,6 +166,7 @@ def add_user_to_environment(uid, environment_id, commit=True, session=None):
             session.commit()
         else:
             session.flush()
+        get_all_accessible_environment_ids_by_uid.invalidate(uid)
 
 
 @with_session
@@ -170,6 +183,7 @@ def remove_user_to_environment(uid, environment_id, commit=True, session=None):
             session.commit()
         else:
             session.flush()
+        get_all_accessible_environment_ids_by_uid.invalidate(uid)
 
 
 @with_session
@@ -180,3 +194,4 @@ def remove_user_from_all_environments(uid, commit=True, session=None):
         session.commit()
     else:
         session.flush()
+    get_all_accessible_environment_ids_by_uid.invalidate(uid)
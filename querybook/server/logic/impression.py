@@ -1,9 +1,27 @@
 from datetime import datetime, timedelta
-from sqlalchemy.sql import func
+from sqlalchemy.sql import distinct, func
 
 from app.db import with_session
-from const.impression import IMPRESSION_RETENTION_DELTA
-from models.impression import Impression
+from const.impression import IMPRESSION_RETENTION_DELTA, ImpressionItemType
+from env import QuerybookSettings
+from lib.impression_buffer import (
+    buffer_impression,
+    dead_letter_impressions,
+    get_impression_buffer_size,
+    pop_buffered_impressions,
+    requeue_impressions,
+)
+from lib.logger import get_logger
+from lib.sqlalchemy import upsert_counts
+from lib.stats_logger import stats_logger
+from models.impression import Impression, ImpressionDailyRollup
+
+LOG = get_logger(__file__)
+
+IMPRESSION_FLUSH_BATCH_SIZE = 1000
+# Failed flushes of a batch before its impressions are written one by one,
+# the ones that still fail are moved to the dead letter list
+IMPRESSION_FLUSH_MAX_ATTEMPTS = 5
 
 
 """
@@ -26,6 +44,147 @@ def create_impression(item_id, item_type, uid, commit=True, session=None):
     return impression
 
 
+def record_impression(item_id, item_type, uid):
+    """Buffer the impression, it is written by flush_buffered_impressions"""
+    buffer_impression(
+        item_id,
+        item_type.value,
+        uid,
+        dedup_window=QuerybookSettings.IMPRESSION_DEDUP_WINDOW,
+    )
+
+
+@with_session
+def flush_buffered_impressions(batch_size=IMPRESSION_FLUSH_BATCH_SIZE, session=None):
+    """Write the buffered impressions with one bulk insert per batch_size
+
+       A batch that fails is put back and retried by the next flush, up to
+       IMPRESSION_FLUSH_MAX_ATTEMPTS times. Then its impressions are written
+       one by one and the ones that fail are dead lettered, so a bad
+       impression cannot block the buffer.
+
+    Returns:
+        int -- Number of impressions written
+    """
+    stats_logger.gauge("impression.buffer.size", get_impression_buffer_size())
+
+    num_flushed = 0
+    while True:
+        impressions = pop_buffered_impressions(batch_size)
+        if not impressions:
+            break
+
+        try:
+            _write_impressions(impressions, session=session)
+        except Exception:
+            session.rollback()
+            attempts = 1 + max(
+                _get_flush_attempts(impression) for impression in impressions
+            )
+            if attempts < IMPRESSION_FLUSH_MAX_ATTEMPTS:
+                requeue_impressions(
+                    [impression[:4] + (attempts,) for impression in impressions]
+                )
+                raise
+
+            LOG.exception(
+                f"Failed to flush {len(impressions)} impressions {attempts} times"
+            )
+            num_flushed += _write_impressions_one_by_one(impressions, session=session)
+            continue
+        num_flushed += len(impressions)
+
+    stats_logger.incr("impression.flushed", num_flushed)
+    return num_flushed
+
+
+def _get_flush_attempts(impression):
+    return impression[4] if len(impression) > 4 else 0
+
+
+@with_session
+def _write_impressions(impressions, session=None):
+    rows = [
+        {
+            "item_id": item_id,
+            "item_type": ImpressionItemType(item_type),
+            "uid": uid,
+            "created_at": datetime.utcfromtimestamp(viewed_at),
+        }
+        for item_id, item_type, uid, viewed_at in (
+            impression[:4] for impression in impressions
+        )
+    ]
+    session.execute(Impression.__table__.insert(), rows)
+    roll_up_impressions(rows, session=session)
+    session.commit()
+
+
+@with_session
+def _write_impressions_one_by_one(impressions, session=None):
+    """Returns the number of impressions written, the others are dead lettered"""
+    failed_impressions = []
+    for impression in impressions:
+        try:
+            _write_impressions([impression], session=session)
+        except Exception:
+            session.rollback()
+            failed_impressions.append(impression)
+
+    dead_letter_impressions(failed_impressions)
+    stats_logger.incr("impression.dead_lettered", len(failed_impressions))
+    return len(impressions) - len(failed_impressions)
+
+
+@with_session
+def roll_up_impressions(impressions, commit=False, session=None):
+    """Add the impressions to the daily rollups, done in the same transaction
+       as the insert of the impressions so each one is counted exactly once
+
+    Arguments:
+        impressions {List[Dict]} -- item_id, item_type, uid and created_at
+    """
+    rollup_by_key = {}
+    for impression in impressions:
+        viewed_at = impression["created_at"]
+        key = (
+            impression["item_type"],
+            impression["item_id"],
+            viewed_at.date(),
+            impression["uid"],
+        )
+        count, last_viewed_at = rollup_by_key.get(key, (0, viewed_at))
+        rollup_by_key[key] = (count + 1, max(last_viewed_at, viewed_at))
+
+    upsert_counts(
+        ImpressionDailyRollup.__table__,
+        ["item_type", "item_id", "day", "uid"],
+        [
+            {
+                "item_type": item_type,
+                "item_id": item_id,
+                "day": day,
+                "uid": uid,
+                "count": count,
+                "last_viewed_at": last_viewed_at,
+            }
+            for (item_type, item_id, day, uid), (count, last_viewed_at) in sorted(
+                rollup_by_key.items(),
+                # Same order in every transaction to avoid deadlocks
+                key=lambda item: (item[0][0].value,) + item[0][1:],
+            )
+        ],
+        ["count"],
+        max_names=["last_viewed_at"],
+        session=session,
+    )
+
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
 @with_session
 def get_impressions_by_date(date, session=None):
     impressions = (
@@ -68,46 +227,55 @@ def get_impressions_by_item(item_type, item_id, limit, session=None):
 
 @with_session
 def get_viewers_by_item(item_type, item_id, limit=100, session=None):
-    latest_viewers = (
-        session.query(Impression.uid, func.max(Impression.created_at), func.count())
-        .filter(Impression.item_type == item_type)
-        .filter(Impression.item_id == item_id)
-        .group_by(Impression.uid)
-        .order_by(func.max(Impression.created_at).desc())
-        .limit(limit)
-        .all()
-    )
-
-    latest_viewers_objects = list(
-        map(
-            lambda x: {"uid": x[0], "latest_view_at": x[1], "views_count": x[2],},
-            latest_viewers,
-        )
-    )
-
-    return latest_viewers_objects
+    return _get_viewers_by_item(item_type, item_id, None, limit, session=session)
 
 
 @with_session
 def get_viewers_count_by_item_after_date(item_type, item_id, after_date, session=None):
     count = (
-        session.query(Impression.uid)
-        .distinct()
-        .filter_by(item_type=item_type, item_id=item_id)
-        .filter(Impression.created_at >= after_date)
-        .count()
+        session.query(func.count(distinct(ImpressionDailyRollup.uid)))
+        .filter(ImpressionDailyRollup.item_type == item_type)
+        .filter(ImpressionDailyRollup.item_id == item_id)
+        .filter(ImpressionDailyRollup.day >= after_date)
+        .scalar()
     )
     return count
 
 
+@with_session
+def get_viewers_count_by_items_after_date(
+    item_type, item_ids, after_date, session=None
+):
+    """Get the unique viewers count of multiple items with one query
+
+    Returns:
+        Dict[int, int] -- item id to its viewers count, items without views are omitted
+    """
+    if not item_ids:
+        return {}
+
+    return dict(
+        session.query(
+            ImpressionDailyRollup.item_id,
+            func.count(distinct(ImpressionDailyRollup.uid)),
+        )
+        .filter(ImpressionDailyRollup.item_type == item_type)
+        .filter(ImpressionDailyRollup.item_id.in_(item_ids))
+        .filter(ImpressionDailyRollup.day >= after_date)
+        .group_by(ImpressionDailyRollup.item_id)
+        .all()
+    )
+
+
 @with_session
 def get_item_timeseries_after_date(item_type, item_id, after_date, session=None):
+    # There is one rollup per viewer and day
     return (
-        session.query(func.count(Impression.uid), func.date(Impression.created_at))
-        .distinct(Impression.uid)
-        .filter_by(item_type=item_type, item_id=item_id)
-        .filter(Impression.created_at >= after_date)
-        .group_by(func.date(Impression.created_at))
+        session.query(func.count(ImpressionDailyRollup.uid), ImpressionDailyRollup.day)
+        .filter(ImpressionDailyRollup.item_type == item_type)
+        .filter(ImpressionDailyRollup.item_id == item_id)
+        .filter(ImpressionDailyRollup.day >= after_date)
+        .group_by(ImpressionDailyRollup.day)
         .all()
     )
 
@@ -116,20 +284,31 @@ def get_item_timeseries_after_date(item_type, item_id, after_date, session=None)
 def get_viewers_by_item_after_date(
     item_type, item_id, after_date, limit=10, session=None
 ):
+    return _get_viewers_by_item(item_type, item_id, after_date, limit, session=session)
+
+
+def _get_viewers_by_item(item_type, item_id, after_date, limit, session=None):
+    query = (
+        session.query(
+            ImpressionDailyRollup.uid,
+            func.max(ImpressionDailyRollup.last_viewed_at),
+            func.sum(ImpressionDailyRollup.count),
+        )
+        .filter(ImpressionDailyRollup.item_type == item_type)
+        .filter(ImpressionDailyRollup.item_id == item_id)
+    )
+    if after_date is not None:
+        query = query.filter(ImpressionDailyRollup.day >= after_date)
     latest_viewers = (
-        session.query(Impression.uid, func.max(Impression.created_at), func.count())
-        .filter(Impression.item_type == item_type)
-        .filter(Impression.item_id == item_id)
-        .filter(Impression.created_at >= after_date)
-        .group_by(Impression.uid)
-        .order_by(func.max(Impression.created_at).desc())
+        query.group_by(ImpressionDailyRollup.uid)
+        .order_by(func.max(ImpressionDailyRollup.last_viewed_at).desc())
         .limit(limit)
         .all()
     )
 
     latest_viewers_objects = list(
         map(
-            lambda x: {"uid": x[0], "latest_view_at": x[1], "views_count": x[2],},
+            lambda x: {"uid": x[0], "latest_view_at": x[1], "views_count": int(x[2])},
             latest_viewers,
         )
     )
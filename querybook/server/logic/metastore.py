@@ -1,11 +1,12 @@
 import datetime
 from models.admin import QueryEngineEnvironment
 from sqlalchemy import func, and_
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, joinedload
 
 from app.db import with_session
 from const.elasticsearch import ElasticsearchItem
-from lib.sqlalchemy import update_model_fields
+from lib.elasticsearch.sync_queue import queue_item_sync
+from lib.sqlalchemy import update_model_fields, upsert_counts
 from models.metastore import (
     DataSchema,
     DataTable,
@@ -14,11 +15,12 @@ from models.metastore import (
     DataTableOwnership,
     DataJobMetadata,
     DataTableQueryExecution,
+    DataTableQueryExecutionStat,
+    DataTableCoQueryStat,
     DataTableStatistics,
     DataTableColumnStatistics,
 )
 from models.query_execution import QueryExecution
-from tasks.sync_elasticsearch import sync_elasticsearch
 
 
 @with_session
@@ -108,9 +110,42 @@ def delete_schema(id=None, commit=True, session=None):
         session.flush()
 
 
-def get_all_table(offset=0, limit=100, session=None):
-    """Get all the tables."""
-    return session.query(DataTable).offset(offset).limit(limit).all()
+@with_session
+def get_all_table(after_id=0, limit=100, session=None):
+    """Get a page of tables ordered by id, pass the last id
+       of the previous page as after_id to get the next one."""
+    return (
+        session.query(DataTable)
+        .options(joinedload(DataTable.data_schema), joinedload(DataTable.information))
+        .filter(DataTable.id > after_id)
+        .order_by(DataTable.id)
+        .limit(limit)
+        .all()
+    )
+
+
+@with_session
+def get_all_table_names_by_metastore_id(metastore_id, session=None):
+    """Get (table id, schema name, table name, boost score) of all the tables
+       of the metastore, without loading the table models"""
+    return (
+        session.query(
+            DataTable.id, DataSchema.name, DataTable.name, DataTable.boost_score
+        )
+        .join(DataSchema)
+        .filter(DataSchema.metastore_id == metastore_id)
+        .all()
+    )
+
+
+@with_session
+def get_tables_by_ids(ids, session=None):
+    return (
+        session.query(DataTable)
+        .options(joinedload(DataTable.data_schema), joinedload(DataTable.information))
+        .filter(DataTable.id.in_(ids))
+        .all()
+    )
 
 
 @with_session
@@ -392,6 +427,28 @@ def get_all_column_name_by_table_id(table_id, session=None):
     )
 
 
+@with_session
+def get_all_column_names_by_table_ids(table_ids, session=None):
+    """Get the column names of multiple tables with one query
+
+    Returns:
+        Dict[int, List[str]] -- table id to its column names
+    """
+    column_names_by_table_id = {table_id: [] for table_id in table_ids}
+    if not table_ids:
+        return column_names_by_table_id
+
+    columns = (
+        session.query(DataTableColumn.table_id, DataTableColumn.name)
+        .filter(DataTableColumn.table_id.in_(table_ids))
+        .order_by(DataTableColumn.id)
+        .all()
+    )
+    for table_id, column_name in columns:
+        column_names_by_table_id[table_id].append(column_name)
+    return column_names_by_table_id
+
+
 @with_session
 def create_column(
     name=None, type=None, comment=None, table_id=None, commit=True, session=None
@@ -551,6 +608,26 @@ def create_table_query_execution_log(
 def delete_old_able_query_execution_log(
     cell_id, query_execution_id, commit=True, session=None
 ):
+    old_logs = (
+        session.query(
+            DataTableQueryExecution.query_execution_id,
+            DataTableQueryExecution.table_id,
+            QueryExecution.engine_id,
+            QueryExecution.uid,
+        )
+        .join(QueryExecution)
+        .filter(DataTableQueryExecution.cell_id == cell_id)
+        .filter(DataTableQueryExecution.query_execution_id < query_execution_id)
+        .all()
+    )
+    old_table_ids_by_execution = {}
+    for old_query_execution_id, table_id, engine_id, uid in old_logs:
+        old_table_ids_by_execution.setdefault(
+            (old_query_execution_id, engine_id, uid), []
+        ).append(table_id)
+    for (_, engine_id, uid), table_ids in old_table_ids_by_execution.items():
+        update_table_query_stats(table_ids, engine_id, uid, -1, session=session)
+
     session.query(DataTableQueryExecution).filter(
         DataTableQueryExecution.cell_id == cell_id
     ).filter(DataTableQueryExecution.query_execution_id < query_execution_id).delete()
@@ -599,61 +676,181 @@ def get_table_query_examples(
     return query.order_by(main_table_qe.id.desc()).limit(limit).offset(offset).all()
 
 
+@with_session
+def update_table_query_stats(table_ids, engine_id, uid, delta, session=None):
+    """Add delta to the query stats of the tables, for a query execution
+       that is logged (delta=1) or no longer logged (delta=-1) for each one
+
+    Arguments:
+        table_ids {List[int]} -- The tables logged for the query execution
+        engine_id {int}
+        uid {int}
+        delta {int}
+    """
+    _add_to_stat_counts(
+        DataTableQueryExecutionStat,
+        ("table_id", "engine_id", "uid"),
+        {(table_id, engine_id, uid): delta for table_id in table_ids},
+        session=session,
+    )
+    _add_to_stat_counts(
+        DataTableCoQueryStat,
+        ("table_id", "co_table_id"),
+        {
+            (table_id, co_table_id): delta
+            for table_id in table_ids
+            for co_table_id in table_ids
+            if table_id != co_table_id
+        },
+        session=session,
+    )
+
+
+def _add_to_stat_counts(model, key_names, delta_by_key, session=None):
+    """Add the deltas to the counts of the stats with atomic statements,
+       so concurrent updates of a new key do not insert it twice. Stats
+       whose count drops to 0 are deleted.
+    """
+    table = model.__table__
+    # Keys are written in the same order by every transaction to avoid deadlocks
+    rows = [
+        {**dict(zip(key_names, key)), "count": delta_by_key[key]}
+        for key in sorted(delta_by_key)
+        if delta_by_key[key] != 0
+    ]
+
+    increment_rows = [row for row in rows if row["count"] > 0]
+    if increment_rows:
+        upsert_counts(table, key_names, increment_rows, ["count"], session=session)
+
+    for row in rows:
+        if row["count"] > 0:
+            continue
+        key_filter = and_(*[table.c[name] == row[name] for name in key_names])
+        session.execute(
+            table.update().where(key_filter).values(count=table.c.count + row["count"])
+        )
+        session.execute(table.delete().where(key_filter).where(table.c.count <= 0))
+
+
+@with_session
+def rebuild_table_query_stats(batch_size=1000, session=None):
+    """Recompute the query stats of all tables from DataTableQueryExecution,
+       batch_size tables at a time. Corrects the stats of logs removed
+       along with their query executions or cells.
+    """
+    max_table_id = session.query(func.max(DataTable.id)).scalar() or 0
+    for start_table_id in range(0, max_table_id + 1, batch_size):
+        end_table_id = start_table_id + batch_size
+        rebuild_table_query_stats_in_range(
+            start_table_id, end_table_id, session=session
+        )
+
+
+@with_session
+def rebuild_table_query_stats_in_range(
+    start_table_id, end_table_id, commit=True, session=None
+):
+    """Recompute the query stats of tables with start_table_id <= id < end_table_id"""
+    for model in (DataTableQueryExecutionStat, DataTableCoQueryStat):
+        session.query(model).filter(model.table_id >= start_table_id).filter(
+            model.table_id < end_table_id
+        ).delete(synchronize_session=False)
+
+    count = func.count(DataTableQueryExecution.id)
+    session.execute(
+        DataTableQueryExecutionStat.__table__.insert().from_select(
+            ["table_id", "engine_id", "uid", "count"],
+            session.query(
+                DataTableQueryExecution.table_id,
+                QueryExecution.engine_id,
+                QueryExecution.uid,
+                count,
+            )
+            .join(QueryExecution)
+            .filter(DataTableQueryExecution.table_id >= start_table_id)
+            .filter(DataTableQueryExecution.table_id < end_table_id)
+            .group_by(
+                DataTableQueryExecution.table_id,
+                QueryExecution.engine_id,
+                QueryExecution.uid,
+            ),
+        )
+    )
+
+    main_table_qe = aliased(DataTableQueryExecution)
+    join_table_qe = aliased(DataTableQueryExecution)
+    session.execute(
+        DataTableCoQueryStat.__table__.insert().from_select(
+            ["table_id", "co_table_id", "count"],
+            session.query(
+                main_table_qe.table_id,
+                join_table_qe.table_id,
+                func.count(join_table_qe.id),
+            )
+            .select_from(main_table_qe)
+            .join(
+                join_table_qe,
+                and_(
+                    main_table_qe.id != join_table_qe.id,
+                    main_table_qe.query_execution_id
+                    == join_table_qe.query_execution_id,
+                ),
+            )
+            .filter(main_table_qe.table_id >= start_table_id)
+            .filter(main_table_qe.table_id < end_table_id)
+            .group_by(main_table_qe.table_id, join_table_qe.table_id),
+        )
+    )
+
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
 @with_session
 def get_query_example_users(table_id, engine_ids, limit=5, session=None):
+    count = func.sum(DataTableQueryExecutionStat.count)
     users = (
-        session.query(QueryExecution.uid, func.count(QueryExecution.id))
-        .select_from(DataTableQueryExecution)
-        .join(QueryExecution)
-        .filter(DataTableQueryExecution.table_id == table_id)
-        .filter(QueryExecution.engine_id.in_(engine_ids))
-        .group_by(QueryExecution.uid)
-        .order_by(func.count(QueryExecution.id).desc())
+        session.query(DataTableQueryExecutionStat.uid, count)
+        .filter(DataTableQueryExecutionStat.table_id == table_id)
+        .filter(DataTableQueryExecutionStat.engine_id.in_(engine_ids))
+        .group_by(DataTableQueryExecutionStat.uid)
+        .order_by(count.desc())
         .limit(limit)
         .all()
     )
 
-    return users
+    return [(uid, int(user_count)) for uid, user_count in users]
 
 
 @with_session
 def get_query_example_engines(table_id, environment_id, session=None):
+    count = func.sum(DataTableQueryExecutionStat.count)
     engines = (
-        session.query(QueryExecution.engine_id, func.count(QueryExecution.id))
-        .select_from(DataTableQueryExecution)
-        .join(QueryExecution)
+        session.query(DataTableQueryExecutionStat.engine_id, count)
         .join(
             QueryEngineEnvironment,
-            QueryExecution.engine_id == QueryEngineEnvironment.query_engine_id,
+            DataTableQueryExecutionStat.engine_id
+            == QueryEngineEnvironment.query_engine_id,
         )
-        .filter(DataTableQueryExecution.table_id == table_id)
+        .filter(DataTableQueryExecutionStat.table_id == table_id)
         .filter(QueryEngineEnvironment.environment_id == environment_id)
-        .group_by(QueryExecution.engine_id)
-        .order_by(func.count(QueryExecution.id).desc())
+        .group_by(DataTableQueryExecutionStat.engine_id)
+        .order_by(count.desc())
         .all()
     )
 
-    return engines
+    return [(engine_id, int(engine_count)) for engine_id, engine_count in engines]
 
 
 @with_session
 def get_query_example_concurrences(table_id, limit=5, session=None):
-    main_table_qe = aliased(DataTableQueryExecution)
-    join_table_qe = aliased(DataTableQueryExecution)
-
     concurrences = (
-        session.query(join_table_qe.table_id, func.count(join_table_qe.id))
-        .select_from(main_table_qe)
-        .join(
-            join_table_qe,
-            and_(
-                main_table_qe.id != join_table_qe.id,
-                main_table_qe.query_execution_id == join_table_qe.query_execution_id,
-            ),
-        )
-        .filter(main_table_qe.table_id == table_id)
-        .group_by(join_table_qe.table_id)
-        .order_by(func.count(join_table_qe.id).desc())
+        session.query(DataTableCoQueryStat.co_table_id, DataTableCoQueryStat.count)
+        .filter(DataTableCoQueryStat.table_id == table_id)
+        .order_by(DataTableCoQueryStat.count.desc())
         .limit(limit)
         .all()
     )
@@ -663,7 +860,29 @@ def get_query_example_concurrences(table_id, limit=5, session=None):
 
 @with_session
 def get_table_query_samples_count(table_id, session):
-    return session.query(DataTableQueryExecution).filter_by(table_id=table_id).count()
+    return get_tables_query_samples_count([table_id], session=session).get(table_id, 0)
+
+
+@with_session
+def get_tables_query_samples_count(table_ids, session=None):
+    """Get the query samples count of multiple tables with one query
+
+    Returns:
+        Dict[int, int] -- table id to its samples count, tables without samples are omitted
+    """
+    if not table_ids:
+        return {}
+
+    return {
+        table_id: int(samples_count)
+        for table_id, samples_count in session.query(
+            DataTableQueryExecutionStat.table_id,
+            func.sum(DataTableQueryExecutionStat.count),
+        )
+        .filter(DataTableQueryExecutionStat.table_id.in_(table_ids))
+        .group_by(DataTableQueryExecutionStat.table_id)
+        .all()
+    }
 
 
 """
@@ -674,7 +893,7 @@ def get_table_query_samples_count(table_id, session):
 
 
 def update_es_tables_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.tables.value, id])
+    queue_item_sync(ElasticsearchItem.tables.value, id)
 
 
 """
@@ -1,10 +1,14 @@
+from collections import defaultdict
 from datetime import datetime
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import joinedload
 from app.db import with_session
 from app.flask_app import celery
 
+from const.elasticsearch import ElasticsearchItem
 from const.query_execution import QueryExecutionStatus, StatementExecutionStatus
+from lib.elasticsearch.sync_queue import queue_item_sync
 from lib.logger import get_logger
 from models.query_execution import (
     QueryExecution,
@@ -12,6 +16,7 @@ from models.query_execution import (
     QueryExecutionNotification,
     QueryExecutionError,
     StatementExecutionStreamLog,
+    QueryExecutionViewer,
 )
 from models.datadoc import DataCellQueryExecution, DataDocDataCell
 from models.admin import QueryEngine, QueryEngineEnvironment
@@ -52,15 +57,35 @@ def get_last_query_execution_from_cell(cell_id, session=None):
     )
 
 
+@with_session
+def get_engine_ids_by_environment_id(environment_id, session=None):
+    """Ids of the engines of the environment, including the deleted ones
+       since their query executions are kept
+    """
+    return [
+        engine_id
+        for (engine_id,) in session.query(
+            QueryEngineEnvironment.query_engine_id
+        ).filter(QueryEngineEnvironment.environment_id == environment_id)
+    ]
+
+
 @with_session
 def search_query_execution(
-    environment_id, filters, orderBy, limit, offset, session=None
+    environment_id, filters, orderBy, limit, offset=0, cursor=None, session=None
 ):
-    query = (
-        session.query(QueryExecution)
-        .join(QueryEngine)
-        .join(QueryEngineEnvironment)
-        .filter(QueryEngineEnvironment.environment_id == environment_id)
+    """Search the query executions of the environment
+
+    Arguments:
+        cursor {int} -- Id of the last execution of the previous page, only
+                        used when ordered by created_at. The page starts
+                        after it by (created_at, id) instead of scanning
+                        offset rows
+    """
+    # Filter by the ids instead of joining, so the (uid, ...) indexes are used
+    engine_ids = get_engine_ids_by_environment_id(environment_id, session=session)
+    query = session.query(QueryExecution).filter(
+        QueryExecution.engine_id.in_(engine_ids)
     )
 
     for filter_key, filter_val in filters.items():
@@ -85,8 +110,31 @@ def search_query_execution(
                 )
 
     if orderBy == "created_at":
-        query = query.order_by(QueryExecution.created_at.desc())
-    query = query.offset(offset).limit(limit)
+        query = query.order_by(
+            QueryExecution.created_at.desc(), QueryExecution.id.desc()
+        )
+        if cursor is not None:
+            cursor_created_at = (
+                session.query(QueryExecution.created_at)
+                .filter(QueryExecution.id == cursor)
+                .scalar()
+            )
+            if cursor_created_at is None:
+                # The execution got deleted, ids follow the creation order
+                query = query.filter(QueryExecution.id < cursor)
+            else:
+                query = query.filter(
+                    or_(
+                        QueryExecution.created_at < cursor_created_at,
+                        and_(
+                            QueryExecution.created_at == cursor_created_at,
+                            QueryExecution.id < cursor,
+                        ),
+                    )
+                )
+    if offset:
+        query = query.offset(offset)
+    query = query.limit(limit)
 
     return query.all()
 
@@ -111,6 +159,7 @@ def create_query_execution(
         session.flush()
 
     query_execution.id
+    update_es_query_execution_by_id(query_execution.id)
     return query_execution
 
 
@@ -143,6 +192,8 @@ def update_query_execution(
         session.flush()
 
     query_execution.id
+    if status is not None or completed_at is not None:
+        update_es_query_execution_by_id(query_execution.id)
     return query_execution
 
 
@@ -168,6 +219,39 @@ def get_environments_by_execution_id(execution_id, session=None):
     )
 
 
+@with_session
+def get_all_query_executions(after_id=0, limit=100, session=None):
+    """Get a page of query executions along with their engines, pass
+       the last id of the previous page as after_id to get the next one."""
+    return (
+        session.query(QueryExecution)
+        .options(joinedload(QueryExecution.engine))
+        .filter(QueryExecution.id > after_id)
+        .order_by(QueryExecution.id)
+        .limit(limit)
+        .all()
+    )
+
+
+@with_session
+def get_viewer_uids_by_query_execution_ids(ids, session=None):
+    """
+    Returns:
+        Dict[int, List[int]] -- query execution id to the uids of its viewers
+    """
+    viewer_uids_by_id = defaultdict(list)
+    if ids:
+        for query_execution_id, uid in session.query(
+            QueryExecutionViewer.query_execution_id, QueryExecutionViewer.uid
+        ).filter(QueryExecutionViewer.query_execution_id.in_(ids)):
+            viewer_uids_by_id[query_execution_id].append(uid)
+    return viewer_uids_by_id
+
+
+def update_es_query_execution_by_id(id):
+    queue_item_sync(ElasticsearchItem.query_executions.value, id)
+
+
 """
     ----------------------------------------------------------------------------------------------------------
     STATEMENT EXECUTION
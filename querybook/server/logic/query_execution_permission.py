@@ -1,6 +1,6 @@
 from app.db import with_session
 from logic import query_execution as query_execution_logic
-from logic.datadoc_permission import user_can_read
+from logic.datadoc_permission import get_readable_data_doc_ids
 from logic.environment import get_all_accessible_environment_ids_by_uid
 from models.query_execution import QueryExecutionViewer
 
@@ -16,11 +16,10 @@ def user_can_access_query_execution(uid, execution_id, session=None):
     execution_data_doc_ids = query_execution_logic.get_datadoc_id_from_query_execution_id(
         execution_id, session=session
     )
-    if execution_data_doc_ids:
-        for data_doc_pair in execution_data_doc_ids:
-            doc_id, cell_id = data_doc_pair
-            if user_can_read(doc_id=doc_id, uid=uid, session=session):
-                return True
+    if execution_data_doc_ids and get_readable_data_doc_ids(
+        [doc_id for doc_id, _ in execution_data_doc_ids], uid, session=session
+    ):
+        return True
     return (
         QueryExecutionViewer.get(uid=uid, query_execution_id=execution_id) is not None
     )
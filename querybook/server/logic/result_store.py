@@ -5,6 +5,8 @@ from typing import List
 from datetime import datetime
 
 
+from sqlalchemy import func
+
 from app.db import with_session
 from models.result_store import KeyValueStore
 
@@ -13,18 +15,23 @@ csv.field_size_limit(sys.maxsize)
 
 
 @with_session
-def create_key_value_store(key, value, commit=True, session=None):
+def create_key_value_store(key, value, expires_at=None, commit=True, session=None):
     return KeyValueStore.create(
-        {"key": key, "value": value}, commit=commit, session=session
+        {"key": key, "value": value, "expires_at": expires_at},
+        commit=commit,
+        session=session,
     )
 
 
 @with_session
-def update_key_value_store(key, value, commit=True, session=None):  # csv
+def update_key_value_store(
+    key, value, expires_at=None, commit=True, session=None
+):  # csv
     kvs = get_key_value_store(key, session=session)
 
     kvs.value = value
     kvs.updated_at = datetime.utcnow()
+    kvs.expires_at = expires_at
 
     if commit:
         session.commit()
@@ -36,12 +43,16 @@ def update_key_value_store(key, value, commit=True, session=None):  # csv
 
 
 @with_session
-def upsert_key_value_store(key, value, commit=True, session=None):
+def upsert_key_value_store(key, value, expires_at=None, commit=True, session=None):
     kvp = get_key_value_store(key, session=session)
     if kvp:
-        return update_key_value_store(key, value, commit, session=session)
+        return update_key_value_store(
+            key, value, expires_at=expires_at, commit=commit, session=session
+        )
     else:
-        return create_key_value_store(key, value, commit, session=session)
+        return create_key_value_store(
+            key, value, expires_at=expires_at, commit=commit, session=session
+        )
 
 
 @with_session
@@ -58,6 +69,21 @@ def delete_key_value_store(key, commit=True, session=None):
             session.commit()
 
 
+@with_session
+def delete_key_value_stores(keys, commit=True, session=None) -> int:
+    """Delete the items of keys, returns the length of their values"""
+    if not keys:
+        return 0
+    query = session.query(KeyValueStore).filter(KeyValueStore.key.in_(keys))
+    total_length = (
+        query.with_entities(func.sum(func.length(KeyValueStore.value))).scalar() or 0
+    )
+    query.delete(synchronize_session=False)
+    if commit:
+        session.commit()
+    return total_length
+
+
 def string_to_csv(raw_csv_str: str) -> List[List[str]]:
     # Remove NULL byte to make sure csv conversion works
     raw_csv_str = raw_csv_str.replace("\x00", "")
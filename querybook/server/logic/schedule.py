@@ -1,12 +1,15 @@
 from datetime import datetime
 from functools import wraps
 
+from sqlalchemy import func
+
 from app.flask_app import celery
 from app.db import with_session
 from const.schedule import TaskRunStatus
 from lib.sqlalchemy import update_model_fields
 from models.schedule import (
     TaskSchedule,
+    TaskScheduleChange,
     TaskRunRecord,
 )
 
@@ -21,6 +24,11 @@ def get_all_active_task_schedules(session=None):
     return session.query(TaskSchedule).filter(TaskSchedule.enabled.is_(True)).all()
 
 
+@with_session
+def get_task_schedules_by_ids(ids, session=None):
+    return session.query(TaskSchedule).filter(TaskSchedule.id.in_(ids)).all()
+
+
 @with_session
 def get_task_schedule_by_id(id, session=None):
     return session.query(TaskSchedule).get(id)
@@ -98,6 +106,19 @@ def update_task_schedule(id, commit=True, session=None, no_changes=False, **kwar
     return task_schedule
 
 
+@with_session
+def update_task_schedules_run_info(run_infos, commit=True, session=None):
+    """Save the run records of many schedules at once, bulk updates
+       do not fire the event listeners so they are not logged as changes
+
+    Arguments:
+        run_infos {List[Dict]} -- id, last_run_at and total_run_count of each schedule
+    """
+    session.bulk_update_mappings(TaskSchedule, run_infos)
+    if commit:
+        session.commit()
+
+
 @with_session
 def delete_task_schedule(id, commit=True, session=None):
     task_schedule = get_task_schedule_by_id(id=id, session=session)
@@ -107,6 +128,21 @@ def delete_task_schedule(id, commit=True, session=None):
             session.commit()
 
 
+@with_session
+def get_last_task_schedule_change_id(session=None):
+    return session.query(func.max(TaskScheduleChange.id)).scalar() or 0
+
+
+@with_session
+def get_task_schedule_changes(after_id, session=None):
+    return (
+        session.query(TaskScheduleChange)
+        .filter(TaskScheduleChange.id > after_id)
+        .order_by(TaskScheduleChange.id)
+        .all()
+    )
+
+
 @with_session
 def get_task_run_records(
     name="",
@@ -0,0 +1,268 @@
+"""Per process table name prefix indices used for table autocomplete
+
+The index of a metastore is built by a celery task from the DataTable rows
+and stored in Redis. Processes serving autocomplete load it in the background
+the first time the metastore is autocompleted, then keep it up to date from
+the table name change feed. It does not depend on Elasticsearch, which is
+only used until the index is loaded.
+"""
+from itertools import islice
+import threading
+import time
+
+from const.impression import ImpressionItemType
+from app.db import with_session
+from lib.logger import get_logger
+from lib.stats_logger import stats_logger
+from lib.table_name_index import (
+    TableNamePrefixIndex,
+    acquire_table_name_index_build_lock,
+    get_last_table_name_change_id,
+    get_table_name_changes,
+    get_table_name_index_built_at,
+    load_table_name_index,
+    parse_change_id,
+    release_table_name_index_build_lock,
+    save_table_name_index,
+)
+from logic.impression import (
+    get_last_impressions_date,
+    get_viewers_count_by_items_after_date,
+)
+from logic.metastore import (
+    get_all_table_names_by_metastore_id,
+    get_tables_query_samples_count,
+)
+
+LOG = get_logger(__file__)
+
+# Seconds between two reads of the change feed, and between two
+# checks for a newer stored index of a metastore
+TABLE_NAME_INDEX_REFRESH_INTERVAL = 5
+# The index is rebuilt daily since weights also change with impressions,
+# which are not in the change feed
+TABLE_NAME_INDEX_REBUILD_INTERVAL = 24 * 60 * 60
+# Number of tables whose weight is computed with one query
+TABLE_WEIGHT_BATCH_SIZE = 10000
+
+
+class _MetastoreTableNames:
+    def __init__(self, index: TableNamePrefixIndex, change_id: str, built_at: float):
+        self.index = index
+        # Id of the last change of the feed applied to the index
+        self.change_id = change_id
+        self.built_at = built_at
+        # Set when the index fell behind the trimmed part of the feed
+        self.needs_rebuild = False
+
+    def is_stale(self):
+        return (
+            self.needs_rebuild
+            or self.built_at + TABLE_NAME_INDEX_REBUILD_INTERVAL < time.time()
+        )
+
+
+_table_names_by_metastore_id = {}
+_last_refreshed_at = 0
+_lock = threading.Lock()
+
+_loading_metastore_ids = set()
+_last_loaded_at_by_metastore_id = {}
+_loading_lock = threading.Lock()
+
+
+def suggest_table_names(metastore_id: int, prefix: str, limit: int = 10):
+    """Full names of the heaviest tables of the metastore matching the prefix
+
+    Returns:
+        List[str] -- None if the index of the metastore is not loaded yet
+    """
+    _refresh_table_names_in_background()
+
+    table_names = _table_names_by_metastore_id.get(metastore_id)
+    if table_names is None or table_names.is_stale():
+        _load_table_names_in_background(metastore_id)
+
+    if table_names is None:
+        return None
+    return table_names.index.search(prefix, limit)
+
+
+def _refresh_table_names_in_background():
+    """Apply the changes published since the last refresh, at most
+       every TABLE_NAME_INDEX_REFRESH_INTERVAL seconds
+    """
+    global _last_refreshed_at
+
+    if (
+        not _table_names_by_metastore_id
+        or _last_refreshed_at + TABLE_NAME_INDEX_REFRESH_INTERVAL > time.time()
+    ):
+        return
+    _last_refreshed_at = time.time()
+    threading.Thread(target=_refresh_table_names, daemon=True).start()
+
+
+def _refresh_table_names():
+    # Another thread is already refreshing
+    if not _lock.acquire(blocking=False):
+        return
+
+    try:
+        all_table_names = list(_table_names_by_metastore_id.items())
+        changes, is_complete = get_table_name_changes(
+            min(
+                (table_names.change_id for _, table_names in all_table_names),
+                key=parse_change_id,
+            )
+        )
+
+        applied_change_ids = [
+            parse_change_id(table_names.change_id) for _, table_names in all_table_names
+        ]
+        for change_id, change in changes:
+            parsed_change_id = parse_change_id(change_id)
+            for (metastore_id, table_names), applied_change_id in zip(
+                all_table_names, applied_change_ids
+            ):
+                if parsed_change_id <= applied_change_id:
+                    continue
+                if change.get("deleted"):
+                    table_names.index.remove(change["id"])
+                elif change["metastore_id"] == metastore_id:
+                    table_names.index.upsert(
+                        change["id"], change["schema"], change["name"], change["weight"]
+                    )
+
+        if changes:
+            for _, table_names in all_table_names:
+                table_names.change_id = changes[-1][0]
+
+        if not is_complete:
+            # Keep serving the stale index until it is rebuilt
+            for _, table_names in all_table_names:
+                table_names.needs_rebuild = True
+    except Exception as e:
+        # Keep serving the current index if Redis is unavailable
+        LOG.warning("Cannot refresh table name index: {}".format(e))
+    finally:
+        _lock.release()
+
+
+def _load_table_names_in_background(metastore_id: int):
+    with _loading_lock:
+        if (
+            metastore_id in _loading_metastore_ids
+            or _last_loaded_at_by_metastore_id.get(metastore_id, 0)
+            + TABLE_NAME_INDEX_REFRESH_INTERVAL
+            > time.time()
+        ):
+            return
+        _loading_metastore_ids.add(metastore_id)
+        _last_loaded_at_by_metastore_id[metastore_id] = time.time()
+
+    threading.Thread(
+        target=_load_table_names, args=(metastore_id,), daemon=True
+    ).start()
+
+
+def _load_table_names(metastore_id: int):
+    """Load the stored index if it is newer than the current one,
+       and queue a build if it is stale or missing
+    """
+    try:
+        table_names = _table_names_by_metastore_id.get(metastore_id)
+        built_at = get_table_name_index_built_at(metastore_id)
+        if built_at is not None and (
+            table_names is None or built_at > table_names.built_at
+        ):
+            loaded_index = load_table_name_index(metastore_id)
+            if loaded_index is not None:
+                index, change_id, built_at = loaded_index
+                table_names = _MetastoreTableNames(index, change_id, built_at)
+                with _lock:
+                    _table_names_by_metastore_id[metastore_id] = table_names
+
+        if table_names is None or table_names.is_stale():
+            queue_table_name_index_build(metastore_id)
+    except Exception:
+        import traceback
+
+        LOG.error(traceback.format_exc())
+    finally:
+        with _loading_lock:
+            _loading_metastore_ids.discard(metastore_id)
+
+
+def queue_table_name_index_build(metastore_id: int):
+    if acquire_table_name_index_build_lock(metastore_id):
+        # Delaying this import to avoid circular dependency
+        from tasks.build_table_name_index import build_table_name_index
+
+        build_table_name_index.delay(metastore_id)
+
+
+def build_and_save_table_name_index(metastore_id: int):
+    """Build the index of the metastore and store it for the
+       processes serving autocomplete, run by a celery task
+    """
+    try:
+        start_time = time.time()
+        # Changes published during the build are replayed on the next refresh
+        change_id = get_last_table_name_change_id()
+        index = TableNamePrefixIndex.from_tables(
+            get_table_names_with_weight(metastore_id)
+        )
+        save_table_name_index(metastore_id, index, change_id, start_time)
+
+        tags = {"metastore_id": metastore_id}
+        stats_logger.timing(
+            "table_name_index.build.time", (time.time() - start_time) * 1000, tags=tags
+        )
+        stats_logger.gauge("table_name_index.tables", len(index), tags=tags)
+    finally:
+        release_table_name_index_build_lock(metastore_id)
+
+
+@with_session
+def get_table_names_with_weight(metastore_id: int, session=None):
+    """Get (table id, schema name, table name, weight) of all the tables
+       of the metastore, weighted like in the tables search index
+    """
+    # Delaying this import to avoid circular dependency
+    from logic.elasticsearch import get_table_weight
+
+    last_impressions_date = get_last_impressions_date()
+    table_names_with_weight = []
+    tables_iter = iter(
+        get_all_table_names_by_metastore_id(metastore_id, session=session)
+    )
+    while True:
+        tables = list(islice(tables_iter, TABLE_WEIGHT_BATCH_SIZE))
+        if not tables:
+            break
+
+        table_ids = [table_id for table_id, _, _, _ in tables]
+        samples_count_by_table_id = get_tables_query_samples_count(
+            table_ids, session=session
+        )
+        impressions_count_by_table_id = get_viewers_count_by_items_after_date(
+            ImpressionItemType.DATA_TABLE,
+            table_ids,
+            last_impressions_date,
+            session=session,
+        )
+        for table_id, schema_name, table_name, boost_score in tables:
+            table_names_with_weight.append(
+                (
+                    table_id,
+                    schema_name,
+                    table_name,
+                    get_table_weight(
+                        samples_count_by_table_id.get(table_id, 0),
+                        impressions_count_by_table_id.get(table_id, 0),
+                        boost_score,
+                    ),
+                )
+            )
+    return table_names_with_weight
@@ -15,6 +15,27 @@ def get_tag_items_by_table_id(table_id, session=None):
     )
 
 
+@with_session
+def get_tag_names_by_table_ids(table_ids, session=None):
+    """Get the tag names of multiple tables with one query
+
+    Returns:
+        Dict[int, List[str]] -- table id to its tag names
+    """
+    tag_names_by_table_id = {table_id: [] for table_id in table_ids}
+    if not table_ids:
+        return tag_names_by_table_id
+
+    tag_items = (
+        session.query(TagItem.table_id, TagItem.tag_name)
+        .filter(TagItem.table_id.in_(table_ids))
+        .all()
+    )
+    for table_id, tag_name in tag_items:
+        tag_names_by_table_id[table_id].append(tag_name)
+    return tag_names_by_table_id
+
+
 @with_session
 def get_tags_by_keyword(keyword, limit=10, session=None):
     return (
@@ -2,12 +2,12 @@ from app.db import with_session
 from lib.config import get_config_value
 from const.user_roles import UserRoleType
 from const.elasticsearch import ElasticsearchItem
+from lib.elasticsearch.sync_queue import queue_item_sync
 from models.user import (
     User,
     UserSetting,
     UserRole,
 )
-from tasks.sync_elasticsearch import sync_elasticsearch
 
 
 user_settings_config = get_config_value("user_setting")
@@ -29,6 +29,19 @@ def get_users_by_ids(ids, session=None):
     return session.query(User).filter(User.id.in_(ids)).all()
 
 
+@with_session
+def get_all_users(after_id=0, limit=100, session=None):
+    """Get a page of users ordered by id, pass the last id
+       of the previous page as after_id to get the next one."""
+    return (
+        session.query(User)
+        .filter(User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+        .all()
+    )
+
+
 @with_session
 def get_user_by_name(username, session=None):
     return User.get(username=username, session=session)
@@ -207,6 +220,7 @@ def create_user_role(uid, role, commit=True, session=None):
         session.commit()
         session.refresh(user_role)
 
+    _invalidate_environment_ids(uid)
     return user_role
 
 
@@ -215,9 +229,18 @@ def delete_user_role(id, commit=True, session=None):
     user_role = get_user_role_by_id(id, session=session)
 
     if user_role:
+        uid = user_role.uid
         session.delete(user_role)
         if commit:
             session.commit()
+        _invalidate_environment_ids(uid)
+
+
+def _invalidate_environment_ids(uid):
+    # Delaying this import to avoid circular dependency
+    from logic.environment import get_all_accessible_environment_ids_by_uid
+
+    get_all_accessible_environment_ids_by_uid.invalidate(uid)
 
 
 @with_session
@@ -242,4 +265,4 @@ def create_admin_when_no_admin(user, commit, session=None):
 
 
 def update_es_users_by_id(uid):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.users.value, uid])
+    queue_item_sync(ElasticsearchItem.users.value, uid)
@@ -33,6 +33,10 @@ class DataDoc(Base, CRUDMixin):
     title = sql.Column(sql.String(length=name_length), default="", nullable=False)
     meta = sql.Column(sql.JSON, default={}, nullable=False)
 
+    # Incremented whenever the doc or its cells change,
+    # the serialized doc is cached by version
+    version = sql.Column(sql.Integer, default=1, nullable=False)
+
     cells = relationship(
         "DataCell",
         secondary="data_doc_data_cell",
@@ -80,6 +84,15 @@ class DataCell(Base):
     context = sql.Column(sql.Text(length=mediumtext_length))
     meta = sql.Column(sql.JSON)
 
+    # Text of the context used for search, extracted again
+    # only when the md5 of the context is not plaintext_hash
+    plaintext = sql.Column(sql.Text(length=mediumtext_length))
+    plaintext_hash = sql.Column(sql.String(length=32))
+
+    # Version of the context, incremented by each delta applied to it
+    # (see logic.datadoc_collab.patch_data_cell) and each update of it
+    context_version = sql.Column(sql.Integer, default=1, nullable=False)
+
     created_at = sql.Column(sql.DateTime, default=now, nullable=False)
     updated_at = sql.Column(sql.DateTime, default=now, nullable=False)
 
@@ -95,6 +108,7 @@ class DataCell(Base):
             "id": self.id,
             "cell_type": self.cell_type.name,
             "context": self.context,
+            "context_version": self.context_version,
             "meta": self.meta,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
@@ -108,6 +122,9 @@ class DataCell(Base):
 
 class DataDocDataCell(Base):
     __tablename__ = "data_doc_data_cell"
+    __table_args__ = (
+        sql.Index("ix_data_doc_data_cell_cell_order", "data_doc_id", "cell_order"),
+    )
 
     id = sql.Column(sql.Integer, primary_key=True, autoincrement=True)
     data_doc_id = sql.Column(
@@ -119,7 +136,9 @@ class DataDocDataCell(Base):
         nullable=False,
         unique=True,
     )
-    cell_order = sql.Column(sql.Integer)
+    # Sparse so cells can be inserted or moved without changing
+    # the order of other cells, see logic.datadoc
+    cell_order = sql.Column(sql.BigInteger)
 
     def to_dict(self):
         return {
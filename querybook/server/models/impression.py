@@ -24,3 +24,24 @@ class Impression(Base):
             "uid": self.uid,
             "created_at": self.created_at,
         }
+
+
+class ImpressionDailyRollup(Base):
+    """Number of views of an item by a user on each day (UTC)"""
+
+    __tablename__ = "impression_daily_rollup"
+    __table_args__ = (
+        sql.UniqueConstraint(
+            "item_type", "item_id", "day", "uid", name="unique_impression_daily_rollup"
+        ),
+    )
+
+    id = sql.Column(sql.Integer, primary_key=True, autoincrement=True)
+    item_id = sql.Column(sql.Integer, nullable=False)
+    item_type = sql.Column(sql.Enum(ImpressionItemType), nullable=False)
+    uid = sql.Column(
+        sql.Integer, sql.ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    day = sql.Column(sql.Date, nullable=False)
+    count = sql.Column(sql.Integer, nullable=False, default=0)
+    last_viewed_at = sql.Column(sql.DateTime, nullable=False)
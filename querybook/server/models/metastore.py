@@ -360,6 +360,55 @@ class DataTableQueryExecution(Base, CRUDMixin):
     )
 
 
+class DataTableQueryExecutionStat(Base):
+    """Number of query samples of the table by each user and engine,
+       kept in step with DataTableQueryExecution"""
+
+    __tablename__ = "data_table_query_execution_stat"
+    __table_args__ = (
+        sql.UniqueConstraint(
+            "table_id",
+            "engine_id",
+            "uid",
+            name="unique_data_table_query_execution_stat",
+        ),
+    )
+
+    id = sql.Column(sql.Integer, primary_key=True, autoincrement=True)
+    table_id = sql.Column(
+        sql.Integer, sql.ForeignKey("data_table.id", ondelete="CASCADE"), nullable=False
+    )
+    engine_id = sql.Column(
+        sql.Integer,
+        sql.ForeignKey("query_engine.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    uid = sql.Column(
+        sql.Integer, sql.ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    count = sql.Column(sql.Integer, nullable=False, default=0)
+
+
+class DataTableCoQueryStat(Base):
+    """Number of query samples of the table that also query co_table"""
+
+    __tablename__ = "data_table_co_query_stat"
+    __table_args__ = (
+        sql.UniqueConstraint(
+            "table_id", "co_table_id", name="unique_data_table_co_query_stat"
+        ),
+    )
+
+    id = sql.Column(sql.Integer, primary_key=True, autoincrement=True)
+    table_id = sql.Column(
+        sql.Integer, sql.ForeignKey("data_table.id", ondelete="CASCADE"), nullable=False
+    )
+    co_table_id = sql.Column(
+        sql.Integer, sql.ForeignKey("data_table.id", ondelete="CASCADE"), nullable=False
+    )
+    count = sql.Column(sql.Integer, nullable=False, default=0)
+
+
 class DataTableWarning(Base, CRUDMixin):
     __tablename__ = "data_table_warnings"
 
@@ -20,7 +20,26 @@ Base = db.Base
 
 class QueryExecution(Base):
     __tablename__ = "query_execution"
-    __table_args__ = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"}
+    __table_args__ = (
+        # For the execution history of a user, filtered by engine or status,
+        # newest first and paged by (created_at, id)
+        sql.Index("ix_query_execution_uid_created_at", "uid", "created_at", "id"),
+        sql.Index(
+            "ix_query_execution_uid_engine_id_created_at",
+            "uid",
+            "engine_id",
+            "created_at",
+            "id",
+        ),
+        sql.Index(
+            "ix_query_execution_uid_status_created_at",
+            "uid",
+            "status",
+            "created_at",
+            "id",
+        ),
+        {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
+    )
 
     id = sql.Column(sql.Integer, primary_key=True)
     task_id = sql.Column(sql.String(length=name_length))
@@ -13,3 +13,5 @@ class KeyValueStore(db.Base, CRUDMixin):
     value = sql.Column(sql.Text(length=mediumtext_length))
     created_at = sql.Column(sql.DateTime, default=now)
     updated_at = sql.Column(sql.DateTime, default=now)
+    # Set for the cache entries that expire, pruned by the db clean up job
+    expires_at = sql.Column(sql.DateTime, index=True)
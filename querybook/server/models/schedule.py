@@ -85,8 +85,28 @@ class TaskSchedule(CRUDMixin, Base):
         )
 
 
+class TaskScheduleChange(Base):
+    """Log of the changed task schedules, so the scheduler
+       only reloads the schedules changed since it last read it
+    """
+
+    __tablename__ = "task_schedule_change"
+
+    id = sql.Column(sql.Integer, primary_key=True, autoincrement=True)
+    # Not a foreign key as deleted schedules are logged as well
+    schedule_id = sql.Column(sql.Integer, nullable=False)
+    name = sql.Column(sql.String(length=name_length), nullable=False)
+    created_at = sql.Column(sql.DateTime, default=now)
+
+
 def task_schedules_updated(mapper, connection, target):
     if not hasattr(target, "no_changes") or not target.no_changes:
+        # Written with the connection of the change, so it is logged
+        # in the same transaction
+        connection.execute(
+            TaskScheduleChange.__table__.insert(),
+            {"schedule_id": target.id, "name": target.name, "created_at": now()},
+        )
         Session = sessionmaker(bind=connection)
         TaskSchedules.update_changed(session=Session())
 
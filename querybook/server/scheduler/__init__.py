@@ -1,4 +1,6 @@
+import heapq
 import math
+import time
 
 from datetime import datetime
 from multiprocessing.util import Finalize
@@ -6,17 +8,21 @@ from multiprocessing.util import Finalize
 
 from celery import current_app
 from celery import schedules
-from celery.beat import ScheduleEntry, Scheduler
+from celery.beat import ScheduleEntry, Scheduler, event_t
 from celery.utils.log import get_logger
 from kombu.utils.encoding import safe_str
 
 from lib.schedule import ALL_JOBS
-from models.schedule import TaskSchedule, TaskSchedules
+from models.schedule import TaskSchedule
 from logic.schedule import (
     get_all_active_task_schedules,
     create_task_schedule,
+    get_last_task_schedule_change_id,
     get_task_schedule_by_name,
+    get_task_schedule_changes,
+    get_task_schedules_by_ids,
     update_task_schedule,
+    update_task_schedules_run_info,
 )
 
 
@@ -27,12 +33,16 @@ Cannot add entry %r to database schedule: %r. Contents: %r
 # regular of 5 minutes because it needs to take external
 # changes to the schedule into account.
 DEFAULT_MAX_INTERVAL = 5  # seconds
+# Ids of the change log are given when a change is written but only seen
+# once it commits, a gap in the ids is waited on for this long in case
+# a slower transaction fills it
+CHANGE_LOG_GAP_TIMEOUT = 60  # seconds
 
 logger = get_logger(__name__)
 
 
 class ModelEntry(ScheduleEntry):
-    save_fields = ["last_run_at", "total_run_count", "no_changes"]
+    save_fields = ["last_run_at", "total_run_count"]
     valid_options = ["queue", "exchange", "routing_key", "expires", "priority"]
 
     def __init__(self, model: TaskSchedule, app=None):
@@ -95,11 +105,11 @@ class ModelEntry(ScheduleEntry):
 
     next = __next__
 
+    def get_save_fields(self):
+        return {field: getattr(self.model, field) for field in self.save_fields}
+
     def save(self):
-        update_dict = {}
-        for field in self.save_fields:
-            update_dict[field] = getattr(self.model, field)
-        update_task_schedule(self.model.id, **update_dict)
+        update_task_schedule(self.model.id, no_changes=True, **self.get_save_fields())
 
     @classmethod
     def from_entry(cls, name, app=None, **entry):
@@ -143,15 +153,17 @@ class DatabaseScheduler(Scheduler):
 
     Entry = ModelEntry
     Model = TaskSchedule
-    Changes = TaskSchedules
 
     _schedule = None
-    _last_timestamp = None
-    _initial_read = False
-    _heap_invalidated = False
+    # All the changes up to this id are applied
+    _last_change_id = 0
+    # Changes applied after a gap in the ids
+    _applied_change_ids = None
+    _change_gap_since = None
 
     def __init__(self, *args, **kwargs):
         self._dirty = set()
+        self._applied_change_ids = set()
         self._finalize = Finalize(self, self.sync, exitpriority=5)
         super(DatabaseScheduler, self).__init__(*args, **kwargs)
         self.max_interval = (
@@ -167,8 +179,11 @@ class DatabaseScheduler(Scheduler):
 
     def all_as_schedule(self):
         logger.debug("DatabaseScheduler: Fetching database schedule")
+        return self._models_as_schedule(get_all_active_task_schedules())
+
+    def _models_as_schedule(self, models):
         s = {}
-        for model in get_all_active_task_schedules():
+        for model in models:
             try:
                 entry = self.Entry(model, self.app)
                 s[entry.name] = entry
@@ -176,41 +191,105 @@ class DatabaseScheduler(Scheduler):
                 pass
         return s
 
-    def schedule_changed(self):
-        last, ts = self._last_timestamp, self.Changes.last_change()
-        try:
-            if ts and ts > (last if last else ts):
-                logger.info(
-                    "DatabaseScheduler: Schedules are changed. Old: %s, New: %s",
-                    last,
-                    ts,
-                )
-                return True
-        finally:
-            self._last_timestamp = ts
-        return False
+    def get_schedule_changes(self):
+        """Changes of the change log that are not applied yet
+
+        Returns:
+            List[TaskScheduleChange]
+        """
+        changes = [
+            change
+            for change in get_task_schedule_changes(self._last_change_id)
+            if change.id not in self._applied_change_ids
+        ]
+        self._applied_change_ids.update(change.id for change in changes)
+
+        while self._last_change_id + 1 in self._applied_change_ids:
+            self._last_change_id += 1
+            self._applied_change_ids.remove(self._last_change_id)
+
+        if not self._applied_change_ids:
+            self._change_gap_since = None
+        elif self._change_gap_since is None:
+            self._change_gap_since = time.monotonic()
+        elif time.monotonic() - self._change_gap_since > CHANGE_LOG_GAP_TIMEOUT:
+            # The gap is from a rolled back transaction
+            self._last_change_id = max(self._applied_change_ids)
+            self._applied_change_ids.clear()
+            self._change_gap_since = None
+        return changes
+
+    def apply_schedule_changes(self):
+        changes = self.get_schedule_changes()
+        if not changes:
+            return
+
+        names = set(change.name for change in changes)
+        logger.info("DatabaseScheduler: Schedules are changed: %s", ", ".join(names))
+
+        # Save the run records first as the changed schedules are read again
+        self.sync()
+        changed_schedule = self._models_as_schedule(
+            model
+            for model in get_task_schedules_by_ids(
+                set(change.schedule_id for change in changes)
+            )
+            if model.enabled
+        )
+        for name in names:
+            self._schedule.pop(name, None)
+        self._schedule.update(changed_schedule)
+        self._update_heap(names, changed_schedule.values())
+
+    def _update_heap(self, removed_names, added_entries):
+        # Not populated yet, Scheduler.tick populates it with the whole schedule
+        if self._heap is None:
+            return
+
+        # Updated in place, Scheduler.tick may hold a reference to it
+        self._heap[:] = [
+            event for event in self._heap if event[2].name not in removed_names
+        ]
+        heapq.heapify(self._heap)
+        for entry in added_entries:
+            is_due, next_call_delay = entry.is_due()
+            heapq.heappush(
+                self._heap,
+                event_t(
+                    self._when(entry, 0 if is_due else next_call_delay) or 0, 5, entry
+                ),
+            )
 
     def reserve(self, entry):
-        new_entry = Scheduler.reserve(self, entry)
+        # Not through self.schedule so the changes are not applied in the
+        # middle of Scheduler.tick
+        new_entry = self._schedule[entry.name] = next(entry)
         # Need to store entry by name, because the entry may change in the mean time.
         self._dirty.add(new_entry.name)
         return new_entry
 
     def sync(self):
-        logger.info("Writing entries...")
-        _tried = set()
-        _failed = set()
+        dirty, self._dirty = self._dirty, set()
+        entries = [
+            self._schedule[name]
+            for name in dirty
+            if self._schedule and name in self._schedule
+        ]
+        if not entries:
+            return
+
+        logger.info("Writing %d entries...", len(entries))
         try:
-            while self._dirty:
-                try:
-                    name = self._dirty.pop()
-                    _tried.add(name)
-                    self.schedule[name].save()
-                except KeyError:
-                    pass
-        finally:
-            # retry later, only for the failed ones
-            self._dirty |= _failed
+            update_task_schedules_run_info(
+                [
+                    dict(id=entry.model.id, **entry.get_save_fields())
+                    for entry in entries
+                ]
+            )
+        except Exception:
+            logger.exception("Failed to write entries")
+            # retry later
+            self._dirty |= dirty
 
     def install_default_entries(self, data):
         # celery.backend_cleanup is the default task which celery will schedule.
@@ -236,31 +315,20 @@ class DatabaseScheduler(Scheduler):
         self.schedule.update(s)
 
     def schedules_equal(self, *args, **kwargs):
-        if self._heap_invalidated:
-            self._heap_invalidated = False
-            return False
-        return super(DatabaseScheduler, self).schedules_equal(*args, **kwargs)
+        # The heap is kept up to date by apply_schedule_changes
+        return True
 
     @property
     def schedule(self):
-        initial = update = False
-        if not self._initial_read:
+        if self._schedule is None:
             logger.debug("DatabaseScheduler: initial read")
-            initial = update = True
-            self._initial_read = True
-        elif self.schedule_changed():
-            logger.info("DatabaseScheduler: Schedules are changed.")
-            update = True
-
-        if update:
-            self.sync()
+            # Read before the schedules, changes made in between are applied again
+            self._last_change_id = get_last_task_schedule_change_id()
             self._schedule = self.all_as_schedule()
-            # the schedule changed, invalidate the heap in Scheduler.tick
-            if not initial:
-                self._heap = []
-                self._heap_invalidated = True
             logger.debug(
                 "Current schedule:\n%s",
                 "\n".join(repr(entry) for entry in self._schedule.values()),
             )
+        else:
+            self.apply_schedule_changes()
         return self._schedule
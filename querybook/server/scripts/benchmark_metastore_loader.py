@@ -0,0 +1,89 @@
+"""Compare per table and bulk reflection of SqlAlchemyMetastoreLoader
+
+Creates a local SQLite database as a stand-in warehouse, then times
+loading every table with get_table_and_columns (one inspector call per table)
+against get_all_tables_and_columns_in_schema (one query per schema).
+
+Usage:
+    python scripts/benchmark_metastore_loader.py --tables 2000 --columns 20
+    python scripts/benchmark_metastore_loader.py --conn postgresql://... --schema public
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from lib.metastore.loaders.sqlalchemy_metastore_loader import SqlAlchemyMetastoreLoader
+
+
+def create_sqlite_stand_in(db_path: str, num_tables: int, num_columns: int):
+    engine = create_engine("sqlite:///" + db_path)
+    with engine.begin() as conn:
+        for table_num in range(num_tables):
+            columns = ", ".join(
+                f"col_{column_num} VARCHAR(255)" for column_num in range(num_columns)
+            )
+            conn.execute(f"CREATE TABLE table_{table_num} (id INTEGER, {columns})")
+    engine.dispose()
+
+
+def time_it(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def benchmark(connection_string: str, schema_name: str):
+    loader = SqlAlchemyMetastoreLoader(
+        {
+            "id": None,
+            "metastore_params": {"connection_string": connection_string},
+            "acl_control": {},
+        }
+    )
+
+    per_table_secs, per_table_result = time_it(
+        lambda: [
+            loader.get_table_and_columns(schema_name, table_name)
+            for table_name in loader.get_all_table_names_in_schema(schema_name)
+        ]
+    )
+    bulk_secs, bulk_result = time_it(
+        lambda: loader.get_all_tables_and_columns_in_schema(schema_name)
+    )
+
+    print(f"Tables: {len(per_table_result)}")
+    print(f"Per table reflection: {per_table_secs:.2f}s")
+    if bulk_result is None:
+        print("Bulk reflection is not supported for this dialect")
+    else:
+        print(f"Bulk reflection: {bulk_secs:.2f}s ({len(bulk_result)} tables)")
+        print(f"Speedup: {per_table_secs / max(bulk_secs, 1e-6):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--conn", help="Connection string, a SQLite stand-in is created if not given"
+    )
+    parser.add_argument("--schema", default="main")
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.conn:
+        benchmark(args.conn, args.schema)
+        return
+
+    db_path = os.path.join(tempfile.gettempdir(), "benchmark_metastore.db")
+    try:
+        create_sqlite_stand_in(db_path, args.tables, args.columns)
+        benchmark("sqlite:///" + db_path, args.schema)
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Compare offset and cursor paging of search_query_execution
+
+Seeds a local SQLite database (or the database of --conn, which should be
+an empty stand-in as the tables are created there) with query executions of
+a few users, then times fetching pages deep in the history of one user with
+offset against starting after the (created_at, id) of the previous page.
+
+Usage:
+    python scripts/benchmark_query_execution_search.py --executions 2000000
+    python scripts/benchmark_query_execution_search.py --conn mysql://...
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from const.query_execution import QueryExecutionStatus
+from logic.query_execution import search_query_execution
+from models.admin import QueryEngine, QueryEngineEnvironment
+from models.environment import Environment
+from models.query_execution import QueryExecution
+from models.user import User
+
+PAGE_SIZE = 50
+INSERT_BATCH_SIZE = 10000
+STATUSES = list(QueryExecutionStatus)
+
+
+def seed(engine, num_executions: int, num_users: int, num_engines: int):
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            table.__table__
+            for table in (
+                User,
+                Environment,
+                QueryEngine,
+                QueryEngineEnvironment,
+                QueryExecution,
+            )
+        ],
+    )
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"id": uid, "username": f"user_{uid}"} for uid in range(1, num_users + 1)],
+        )
+        conn.execute(Environment.__table__.insert(), [{"id": 1, "name": "env"}])
+        conn.execute(
+            QueryEngine.__table__.insert(),
+            [
+                {
+                    "id": engine_id,
+                    "name": f"engine_{engine_id}",
+                    "language": "presto",
+                    "executor": "presto",
+                    "executor_params": {},
+                    "feature_params": {},
+                }
+                for engine_id in range(1, num_engines + 1)
+            ],
+        )
+        conn.execute(
+            QueryEngineEnvironment.__table__.insert(),
+            [
+                {"query_engine_id": engine_id, "environment_id": 1, "engine_order": i}
+                for i, engine_id in enumerate(range(1, num_engines + 1))
+            ],
+        )
+
+    start_time = datetime.now() - timedelta(seconds=num_executions)
+    for batch_start in range(0, num_executions, INSERT_BATCH_SIZE):
+        with engine.begin() as conn:
+            conn.execute(
+                QueryExecution.__table__.insert(),
+                [
+                    {
+                        "query": "select 1",
+                        "uid": random.randint(1, num_users),
+                        "engine_id": random.randint(1, num_engines),
+                        "status": random.choice(STATUSES),
+                        # Some executions start in the same second
+                        "created_at": start_time + timedelta(seconds=i - i % 3),
+                    }
+                    for i in range(
+                        batch_start,
+                        min(batch_start + INSERT_BATCH_SIZE, num_executions),
+                    )
+                ],
+            )
+
+
+def time_it(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def benchmark(engine, num_pages: int, page_depth: int):
+    session = sessionmaker(bind=engine)()
+    filters = {"user": 1}
+
+    def search(**kwargs):
+        return search_query_execution(
+            environment_id=1,
+            filters=filters,
+            orderBy="created_at",
+            limit=PAGE_SIZE,
+            session=session,
+            **kwargs,
+        )
+
+    # The page before the first one timed, found by walking with the cursor
+    cursor = None
+    for _ in range(page_depth):
+        page = search(cursor=cursor)
+        if not page:
+            break
+        cursor = page[-1].id
+
+    offset_secs, offset_ids = time_it(
+        lambda: [
+            [qe.id for qe in search(offset=(page_depth + page_num) * PAGE_SIZE)]
+            for page_num in range(num_pages)
+        ]
+    )
+
+    def walk_with_cursor():
+        pages = []
+        page_cursor = cursor
+        for _ in range(num_pages):
+            page = [qe.id for qe in search(cursor=page_cursor)]
+            pages.append(page)
+            if page:
+                page_cursor = page[-1]
+        return pages
+
+    cursor_secs, cursor_ids = time_it(walk_with_cursor)
+
+    print(f"Pages of {PAGE_SIZE} after page {page_depth}: {num_pages}")
+    print(f"Offset: {offset_secs:.2f}s")
+    print(f"Cursor: {cursor_secs:.2f}s")
+    print(f"Speedup: {offset_secs / max(cursor_secs, 1e-6):.1f}x")
+    if offset_ids != cursor_ids:
+        print("Warning: the pages are not the same")
+    session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--conn", help="Connection string, a SQLite stand-in is created if not given"
+    )
+    parser.add_argument("--executions", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--engines", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument(
+        "--depth", type=int, default=1000, help="Number of pages to skip"
+    )
+    args = parser.parse_args()
+
+    db_path = None
+    conn_string = args.conn
+    if not conn_string:
+        db_path = os.path.join(tempfile.gettempdir(), "benchmark_query_execution.db")
+        conn_string = "sqlite:///" + db_path
+
+    engine = create_engine(conn_string)
+    try:
+        seed(engine, args.executions, args.users, args.engines)
+        benchmark(engine, args.pages, args.depth)
+    finally:
+        engine.dispose()
+        if db_path:
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Measure the memory and search latency of TableNamePrefixIndex
+
+Builds an index of generated table names spread over schemas, then reports
+the memory allocated by the index, the build and load times and the search
+latency for prefixes of several lengths.
+
+Usage:
+    python scripts/benchmark_table_name_index.py --tables 1000000 --schemas 2000
+"""
+import argparse
+import random
+import string
+import time
+import tracemalloc
+
+from lib.table_name_index import TableNamePrefixIndex
+
+
+def generate_tables(num_tables: int, num_schemas: int, seed: int):
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+        for _ in range(2000)
+    ]
+    schema_names = [
+        f"{rng.choice(words)}_{schema_num}" for schema_num in range(num_schemas)
+    ]
+    return [
+        (
+            table_id,
+            rng.choice(schema_names),
+            "_".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+            + f"_{table_id}",
+            int(rng.paretovariate(1.5) * 10),
+        )
+        for table_id in range(num_tables)
+    ]
+
+
+def time_searches(index: TableNamePrefixIndex, prefixes, limit: int):
+    start = time.time()
+    for prefix in prefixes:
+        index.search(prefix, limit)
+    return (time.time() - start) / len(prefixes)
+
+
+def benchmark(num_tables: int, num_schemas: int, num_searches: int, limit: int):
+    tables = generate_tables(num_tables, num_schemas, seed=0)
+    full_names = [
+        f"{schema_name}.{table_name}" for _, schema_name, table_name, _ in tables
+    ]
+
+    tracemalloc.start()
+    start = time.time()
+    index = TableNamePrefixIndex.from_tables(tables)
+    build_secs = time.time() - start
+    index_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # The generated tuples are freed once built, the index keeps its own strings
+    print(f"Tables: {len(index)}")
+    print(f"Build: {build_secs:.2f}s")
+    print(f"Index memory: {index_bytes / 2 ** 20:.1f}MiB")
+    print(f"Peak memory while building: {peak_bytes / 2 ** 20:.1f}MiB")
+
+    # What the web processes do with the index stored by the build task
+    fields = index.to_fields()
+    start = time.time()
+    TableNamePrefixIndex.from_fields(fields)
+    print(
+        f"Load: {time.time() - start:.2f}s "
+        f"({sum(len(value) for value in fields.values()) / 2 ** 20:.1f}MiB stored)"
+    )
+
+    rng = random.Random(1)
+    for prefix_len in (1, 2, 4, 8):
+        prefixes = [rng.choice(full_names)[:prefix_len] for _ in range(num_searches)]
+        # The first pass memoizes the top tables of the broad prefixes
+        cold_secs = time_searches(index, prefixes, limit)
+        warm_secs = time_searches(index, prefixes, limit)
+        print(
+            f"Search prefix of {prefix_len} chars: "
+            f"{cold_secs * 1000:.3f}ms cold, {warm_secs * 1000:.3f}ms warm"
+        )
+
+    start = time.time()
+    for table_id in range(min(num_searches, num_tables)):
+        _, schema_name, table_name, weight = tables[table_id]
+        index.upsert(table_id, schema_name, table_name + "_v2", weight + 1)
+    print(
+        f"Upsert: {(time.time() - start) * 1000 / min(num_searches, num_tables):.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=1000000)
+    parser.add_argument("--schemas", type=int, default=2000)
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    benchmark(args.tables, args.schemas, args.searches, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,21 @@ from .run_query import run_query_task
 from .run_sample_query import run_sample_query
 from .dummy_task import dummy_task
 from .update_metastore import update_metastore
-from .sync_elasticsearch import sync_elasticsearch
+from .sync_elasticsearch import (
+    sync_elasticsearch,
+    sync_elasticsearch_queue,
+    recreate_elasticsearch_indices,
+)
 from .run_datadoc import run_datadoc
 from .delete_mysql_cache import delete_mysql_cache
 from .poll_engine_status import poll_engine_status
 from .presto_hive_function_scrapper import presto_hive_function_scrapper
 from .db_clean_up_jobs import run_all_db_clean_up_jobs
+from .normalize_data_doc_cell_order import normalize_data_doc_cell_order_task
+from .persist_data_cell_context import persist_data_cell_context_task
+from .flush_impressions import flush_impressions
+from .rebuild_table_query_stats import rebuild_table_query_stats
+from .build_table_name_index import build_table_name_index
 
 LOG = get_logger(__file__)
 
@@ -30,12 +39,19 @@ run_query_task
 dummy_task
 update_metastore
 sync_elasticsearch
+sync_elasticsearch_queue
+recreate_elasticsearch_indices
 run_datadoc
 delete_mysql_cache
 poll_engine_status
 presto_hive_function_scrapper
 run_all_db_clean_up_jobs
 run_sample_query
+normalize_data_doc_cell_order_task
+persist_data_cell_context_task
+flush_impressions
+rebuild_table_query_stats
+build_table_name_index
 
 LOG = get_task_logger(__name__)
 
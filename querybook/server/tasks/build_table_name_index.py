@@ -0,0 +1,12 @@
+from app.flask_app import celery
+
+
+@celery.task(bind=True)
+def build_table_name_index(self, metastore_id):
+    """Build the table name autocomplete index of the metastore,
+       queued by the web processes when theirs is stale or missing
+    """
+    # Delaying this import to avoid circular dependency
+    from logic.table_name_index import build_and_save_table_name_index
+
+    build_and_save_table_name_index(metastore_id)
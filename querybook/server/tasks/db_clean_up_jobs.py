@@ -1,14 +1,34 @@
 from app.flask_app import celery
 from datetime import datetime, timedelta
+import time
 
 from app.db import DBSession, with_session
+from const.elasticsearch import ElasticsearchItem
 from const.query_execution import QueryExecutionStatus
-from models.schedule import TaskRunRecord
-from models.query_execution import QueryExecution
-from models.impression import Impression
+from lib.elasticsearch.sync_queue import queue_items_sync
+from lib.logger import get_logger
+from lib.result_store import delete_result_store_objects, has_result_store_deleter
+from lib.result_store.deletion_queue import (
+    enqueue_result_store_objects,
+    get_result_store_deletion_queue_size,
+    pop_result_store_objects,
+    requeue_result_store_objects,
+)
+from lib.stats_logger import stats_logger
+from models.schedule import TaskRunRecord, TaskScheduleChange
+from models.query_execution import QueryExecution, StatementExecution
+from models.impression import Impression, ImpressionDailyRollup
 from models.datadoc import DataDoc
+from models.result_store import KeyValueStore
 from logic.schedule import with_task_logging
 
+LOG = get_logger(__file__)
+
+# Rows deleted per statement, small enough to keep the locks short
+DEFAULT_CLEAN_UP_BATCH_SIZE = 1000
+# Pause between the batches so replicas and other writers can catch up
+DEFAULT_CLEAN_UP_SLEEP_SECONDS = 0.5
+
 
 @celery.task(bind=True)
 @with_task_logging()
@@ -17,58 +37,220 @@ def run_all_db_clean_up_jobs(
     days_to_keep_task_record=30,
     days_to_keep_query_exec_done=90,
     days_to_keep_query_exec_else=30,
-    days_to_keep_impression=30,
+    # Views are counted with the daily rollups, which are kept longer
+    days_to_keep_impression=7,
+    days_to_keep_impression_rollup=90,
     days_to_keep_archived_data_doc=60,
+    days_to_keep_task_schedule_change=7,
+    batch_size=DEFAULT_CLEAN_UP_BATCH_SIZE,
+    sleep_seconds=DEFAULT_CLEAN_UP_SLEEP_SECONDS,
 ):
+    batch_kwargs = {"batch_size": batch_size, "sleep_seconds": sleep_seconds}
     with DBSession() as session:
-        clean_up_task_run_record(days_to_keep=days_to_keep_task_record, session=session)
-        clean_up_query_execution(
-            days_to_keep_done=days_to_keep_query_exec_done,
-            days_to_keep_else=days_to_keep_query_exec_else,
-            session=session,
+        rows_deleted = {
+            "task_run_record": clean_up_task_run_record(
+                days_to_keep=days_to_keep_task_record, session=session, **batch_kwargs
+            ),
+            "query_execution": clean_up_query_execution(
+                days_to_keep_done=days_to_keep_query_exec_done,
+                days_to_keep_else=days_to_keep_query_exec_else,
+                session=session,
+                **batch_kwargs,
+            ),
+            "impression": clean_up_impression(
+                days_to_keep=days_to_keep_impression, session=session, **batch_kwargs
+            ),
+            "impression_daily_rollup": clean_up_impression_rollup(
+                days_to_keep=days_to_keep_impression_rollup,
+                session=session,
+                **batch_kwargs,
+            ),
+            "task_schedule_change": clean_up_task_schedule_change(
+                days_to_keep=days_to_keep_task_schedule_change,
+                session=session,
+                **batch_kwargs,
+            ),
+            "key_value_store": clean_up_expired_key_value_store(
+                session=session, **batch_kwargs
+            ),
+        }
+        objects_deleted, bytes_reclaimed = clean_up_result_store_objects(
+            sleep_seconds=sleep_seconds
         )
-        clean_up_impression(days_to_keep=days_to_keep_impression, session=session)
         clean_up_archived_data_doc(
             days_to_keep=days_to_keep_archived_data_doc, session=session
         )
 
+    return {
+        "rows_deleted": rows_deleted,
+        "objects_deleted": objects_deleted,
+        "bytes_reclaimed": bytes_reclaimed,
+    }
+
+
+@with_session
+def delete_in_batches(
+    model,
+    filters,
+    batch_size=DEFAULT_CLEAN_UP_BATCH_SIZE,
+    sleep_seconds=DEFAULT_CLEAN_UP_SLEEP_SECONDS,
+    get_result_uris=None,
+    on_deleted=None,
+    session=None,
+):
+    """Delete the rows matching filters by batches of primary keys,
+       each batch is committed on its own
+
+    Arguments:
+        model -- Model with an integer id
+        filters {List} -- Criteria of the rows to delete
+        get_result_uris {Callable} -- Called with the ids of each batch before it
+                                      is deleted, the result store objects it
+                                      returns are queued for deletion once the
+                                      batch is committed
+        on_deleted {Callable} -- Called with the ids of each committed batch
+
+    Returns:
+        int -- Number of rows deleted
+    """
+    num_deleted = 0
+    while True:
+        ids = [
+            row[0]
+            for row in session.query(model.id)
+            .filter(*filters)
+            .order_by(model.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+
+        uris = get_result_uris(ids) if get_result_uris else []
+        session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+        enqueue_result_store_objects(uris)
+        if on_deleted:
+            on_deleted(ids)
+        num_deleted += len(ids)
+
+        # A partial batch is the last one, do not scan the table again
+        if len(ids) < batch_size:
+            break
+        time.sleep(sleep_seconds)
+
+    LOG.info(f"Deleted {num_deleted} rows of {model.__tablename__}")
+    stats_logger.incr(
+        "db_clean_up.rows_deleted", num_deleted, tags={"table": model.__tablename__}
+    )
+    return num_deleted
+
 
 @with_session
-def clean_up_task_run_record(days_to_keep=30, session=None):
+def clean_up_task_run_record(days_to_keep=30, session=None, **batch_kwargs):
     last_day = datetime.now() - timedelta(days_to_keep)
 
-    session.query(TaskRunRecord).filter(TaskRunRecord.created_at < last_day).delete(
-        synchronize_session=False
+    return delete_in_batches(
+        TaskRunRecord,
+        [TaskRunRecord.created_at < last_day],
+        session=session,
+        **batch_kwargs,
+    )
+
+
+@with_session
+def clean_up_task_schedule_change(days_to_keep=7, session=None, **batch_kwargs):
+    last_day = datetime.now() - timedelta(days_to_keep)
+
+    return delete_in_batches(
+        TaskScheduleChange,
+        [TaskScheduleChange.created_at < last_day],
+        session=session,
+        **batch_kwargs,
+    )
+
+
+@with_session
+def clean_up_expired_key_value_store(session=None, **batch_kwargs):
+    """Cache entries are not returned once expired, but are kept
+       in the db until deleted here
+    """
+    return delete_in_batches(
+        KeyValueStore,
+        [KeyValueStore.expires_at < datetime.utcnow()],
+        session=session,
+        **batch_kwargs,
     )
-    session.commit()
 
 
 @with_session
-def clean_up_query_execution(days_to_keep_done=90, days_to_keep_else=30, session=None):
+def get_statement_execution_result_uris(query_execution_ids, session=None):
+    """Results and logs of the query executions that are in a result store"""
+    paths = session.query(
+        StatementExecution.result_path, StatementExecution.log_path
+    ).filter(StatementExecution.query_execution_id.in_(query_execution_ids))
+    return [
+        path
+        for result_path, log_path in paths
+        for path in (result_path, log_path)
+        if path and has_result_store_deleter(path)
+    ]
+
+
+@with_session
+def clean_up_query_execution(
+    days_to_keep_done=90, days_to_keep_else=30, session=None, **batch_kwargs
+):
     last_day_for_done = datetime.now() - timedelta(days_to_keep_done)
     last_day_for_else = datetime.now() - timedelta(days_to_keep_else)
 
-    session.query(QueryExecution).filter(
-        QueryExecution.status == QueryExecutionStatus.DONE
-    ).filter(QueryExecution.completed_at < last_day_for_done).delete(
-        synchronize_session=False
-    )
-    session.query(QueryExecution).filter(
-        QueryExecution.status != QueryExecutionStatus.DONE
-    ).filter(QueryExecution.created_at < last_day_for_else).delete(
-        synchronize_session=False
+    def get_result_uris(ids):
+        return get_statement_execution_result_uris(ids, session=session)
+
+    def remove_from_search(ids):
+        queue_items_sync(ElasticsearchItem.query_executions.value, ids)
+
+    return delete_in_batches(
+        QueryExecution,
+        [
+            QueryExecution.status == QueryExecutionStatus.DONE,
+            QueryExecution.completed_at < last_day_for_done,
+        ],
+        get_result_uris=get_result_uris,
+        on_deleted=remove_from_search,
+        session=session,
+        **batch_kwargs,
+    ) + delete_in_batches(
+        QueryExecution,
+        [
+            QueryExecution.status != QueryExecutionStatus.DONE,
+            QueryExecution.created_at < last_day_for_else,
+        ],
+        get_result_uris=get_result_uris,
+        on_deleted=remove_from_search,
+        session=session,
+        **batch_kwargs,
     )
-    session.commit()
 
 
 @with_session
-def clean_up_impression(days_to_keep=30, session=None):
+def clean_up_impression(days_to_keep=30, session=None, **batch_kwargs):
     last_day = datetime.now() - timedelta(days_to_keep)
 
-    session.query(Impression).filter(Impression.created_at < last_day).delete(
-        synchronize_session=False
+    return delete_in_batches(
+        Impression, [Impression.created_at < last_day], session=session, **batch_kwargs
+    )
+
+
+@with_session
+def clean_up_impression_rollup(days_to_keep=90, session=None, **batch_kwargs):
+    last_day = (datetime.now() - timedelta(days_to_keep)).date()
+
+    return delete_in_batches(
+        ImpressionDailyRollup,
+        [ImpressionDailyRollup.day < last_day],
+        session=session,
+        **batch_kwargs,
     )
-    session.commit()
 
 
 @with_session
@@ -79,3 +261,45 @@ def clean_up_archived_data_doc(days_to_keep=60, session=None):
         DataDoc.updated_at < last_day
     ).delete(synchronize_session=False)
     session.commit()
+
+
+def clean_up_result_store_objects(
+    batch_size=DEFAULT_CLEAN_UP_BATCH_SIZE,
+    sleep_seconds=DEFAULT_CLEAN_UP_SLEEP_SECONDS,
+):
+    """Delete the queued result store objects, the ones that fail
+       are put back to be retried on the next run
+
+    Returns:
+        Tuple[int, int] -- Number of objects deleted and bytes reclaimed,
+                           stores that cannot tell the size count as 0 bytes
+    """
+    stats_logger.gauge(
+        "db_clean_up.result_store_queue.size", get_result_store_deletion_queue_size()
+    )
+
+    objects_deleted = 0
+    bytes_reclaimed = 0
+    failed_uris = []
+    while True:
+        uris = pop_result_store_objects(batch_size)
+        if not uris:
+            break
+
+        batch_bytes_reclaimed, batch_failed_uris = delete_result_store_objects(uris)
+        objects_deleted += len(uris) - len(batch_failed_uris)
+        bytes_reclaimed += batch_bytes_reclaimed
+        failed_uris.extend(batch_failed_uris)
+
+        if len(uris) < batch_size:
+            break
+        time.sleep(sleep_seconds)
+    requeue_result_store_objects(failed_uris)
+
+    LOG.info(
+        f"Deleted {objects_deleted} result store objects, "
+        f"reclaimed {bytes_reclaimed} bytes, {len(failed_uris)} failed"
+    )
+    stats_logger.incr("db_clean_up.result_store.objects_deleted", objects_deleted)
+    stats_logger.incr("db_clean_up.result_store.bytes_reclaimed", bytes_reclaimed)
+    return objects_deleted, bytes_reclaimed
@@ -0,0 +1,10 @@
+from app.flask_app import celery
+
+
+@celery.task(bind=True)
+def flush_impressions(self):
+    """Write the buffered impressions, scheduled every minute"""
+    # Delaying this import to avoid circular dependency
+    from logic.impression import flush_buffered_impressions
+
+    flush_buffered_impressions()
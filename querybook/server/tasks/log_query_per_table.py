@@ -46,7 +46,7 @@ def log_query_per_table_task(self, query_execution_id):
         log_table_per_statement(
             table_per_statement,
             statement_types,
-            query_execution_id,
+            query_execution,
             metastore_id,
             datadoc_cell.id,
             session=session,
@@ -126,7 +126,7 @@ def sync_table_to_metastore(
 def log_table_per_statement(
     table_per_statement,
     statement_types,
-    query_execution_id,
+    query_execution,
     metastore_id,
     cell_id,
     session=None,
@@ -140,6 +140,7 @@ def log_table_per_statement(
         if statement_type in ("SELECT", "INSERT"):
             all_tables.update(tables)
 
+    table_ids = []
     for table in all_tables:
         schema_name, table_name = table.split(".")
         query_table = m_logic.get_table_by_name(
@@ -147,15 +148,27 @@ def log_table_per_statement(
         )
 
         if query_table:  # Sanity check
-            m_logic.delete_old_able_query_execution_log(
-                cell_id=cell_id,
-                query_execution_id=query_execution_id,
-                commit=False,
-                session=session,
-            )
-            m_logic.create_table_query_execution_log(
-                table_id=query_table.id,
-                cell_id=cell_id,
-                query_execution_id=query_execution_id,
-                session=session,
-            )
+            table_ids.append(query_table.id)
+
+    if not table_ids:
+        return
+
+    # Only the latest query execution of the cell is kept
+    m_logic.delete_old_able_query_execution_log(
+        cell_id=cell_id,
+        query_execution_id=query_execution.id,
+        commit=False,
+        session=session,
+    )
+    for table_id in table_ids:
+        m_logic.create_table_query_execution_log(
+            table_id=table_id,
+            cell_id=cell_id,
+            query_execution_id=query_execution.id,
+            commit=False,
+            session=session,
+        )
+    m_logic.update_table_query_stats(
+        table_ids, query_execution.engine_id, query_execution.uid, 1, session=session
+    )
+    session.commit()
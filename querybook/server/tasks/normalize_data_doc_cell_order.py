@@ -0,0 +1,11 @@
+from app.flask_app import celery
+from lib.celery.task_decorator import debounced_task
+
+
+@debounced_task()
+@celery.task(bind=True)
+def normalize_data_doc_cell_order_task(self, data_doc_id):
+    # Delaying this import to avoid circular dependency
+    from logic.datadoc import normalize_data_doc_cell_order
+
+    normalize_data_doc_cell_order(data_doc_id)
@@ -0,0 +1,9 @@
+from app.flask_app import celery
+
+
+@celery.task(bind=True)
+def persist_data_cell_context_task(self, cell_id):
+    # Delaying this import to avoid circular dependency
+    from logic.datadoc_collab import persist_data_cell_context_once_paused
+
+    persist_data_cell_context_once_paused(cell_id)
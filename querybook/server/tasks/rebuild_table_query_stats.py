@@ -0,0 +1,14 @@
+from app.flask_app import celery
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+
+@celery.task(bind=True)
+def rebuild_table_query_stats(self, batch_size=1000):
+    """Recompute the query example stats of all tables, also used to backfill them"""
+    # Delaying this import to avoid circular dependency
+    from logic import metastore as m_logic
+
+    LOG.info("Rebuilding table query stats")
+    m_logic.rebuild_table_query_stats(batch_size=batch_size)
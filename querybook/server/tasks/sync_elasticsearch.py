@@ -1,8 +1,43 @@
+import traceback
+
 from app.flask_app import celery
 from lib.celery.task_decorator import debounced_task
+from lib.logger import get_logger
 from const.elasticsearch import ElasticsearchItem
 
+LOG = get_logger(__file__)
+
+
+@celery.task(bind=True)
+def sync_elasticsearch_queue(self):
+    """Drain the sync queue of every item type, scheduled every minute"""
+    from logic.elasticsearch import sync_queued_items
+
+    for item_type in ElasticsearchItem:
+        try:
+            sync_queued_items(item_type.value)
+        except Exception:
+            # The failed items are queued again, carry on with the other types
+            LOG.error(
+                "Failed to sync queued {}: {}".format(
+                    item_type.value, traceback.format_exc()
+                )
+            )
+
+
+@celery.task(bind=True)
+def recreate_elasticsearch_indices(self, *config_names):
+    """Rebuild the indices in the background, queued for the
+       indices created empty when the app starts
+    """
+    # Delaying this import to avoid circular depdendency
+    from logic.elasticsearch import recreate_indices
+
+    recreate_indices(*config_names)
+
 
+# Syncs a single item, updates are usually queued
+# with lib.elasticsearch.sync_queue instead
 @debounced_task(countdown=60)
 @celery.task(bind=True)
 def sync_elasticsearch(self, item_type, item_id, *args, **kwargs):
@@ -11,6 +46,7 @@ def sync_elasticsearch(self, item_type, item_id, *args, **kwargs):
         update_data_doc_by_id,
         update_table_by_id,
         update_user_by_id,
+        update_query_execution_by_id,
     )
 
     if item_type == ElasticsearchItem.datadocs.value:
@@ -19,3 +55,5 @@ def sync_elasticsearch(self, item_type, item_id, *args, **kwargs):
         update_table_by_id(item_id)
     elif item_type == ElasticsearchItem.users.value:
         update_user_by_id(item_id)
+    elif item_type == ElasticsearchItem.query_executions.value:
+        update_query_execution_by_id(item_id)
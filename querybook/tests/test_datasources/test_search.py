@@ -0,0 +1,97 @@
+import json
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def search_query_executions():
+    from datasources import search
+
+    environments = {
+        1: mock.Mock(id=1, shareable=True),
+        2: mock.Mock(id=2, shareable=False),
+        3: mock.Mock(id=3, shareable=True),
+    }
+    engine_ids_by_environment_id = {1: [1, 2], 2: [3], 3: []}
+    with mock.patch.object(search, "verify_environment_permission"), mock.patch.object(
+        search, "current_user", mock.Mock(id=10)
+    ), mock.patch.object(
+        search,
+        "get_environment_by_id",
+        side_effect=lambda environment_id: environments[environment_id],
+    ), mock.patch.object(
+        search,
+        "get_engine_ids_by_environment_id",
+        side_effect=lambda environment_id: engine_ids_by_environment_id[environment_id],
+    ), mock.patch.object(
+        search, "_get_matching_objects", return_value=([], 0)
+    ) as get_matching_objects:
+
+        def search_and_get_query(environment_id, **kwargs):
+            result = search.search_query_executions.__raw__(
+                environment_id=environment_id, keywords="", **kwargs
+            )
+            query = (
+                json.loads(get_matching_objects.call_args[0][0])
+                if get_matching_objects.called
+                else None
+            )
+            get_matching_objects.reset_mock()
+            return result, query
+
+        yield search_and_get_query
+
+
+def get_filter_terms(query):
+    return query["query"]["bool"]["filter"]["bool"]["must"]
+
+
+def engine_filter(engine_ids):
+    return {
+        "bool": {
+            "should": [
+                {"match": {"engine_id": str(engine_id)}} for engine_id in engine_ids
+            ]
+        }
+    }
+
+
+def test_search_query_executions_of_shareable_environment(search_query_executions):
+    _, query = search_query_executions(1)
+
+    assert get_filter_terms(query) == [engine_filter([1, 2])]
+    # All the executions of the environment are readable
+    assert "should" not in query["query"]["bool"]["filter"]["bool"]
+
+
+def test_search_query_executions_of_private_environment(search_query_executions):
+    _, query = search_query_executions(2)
+
+    assert get_filter_terms(query) == [engine_filter([3])]
+    assert query["query"]["bool"]["filter"]["bool"]["should"] == [
+        {"term": {"uid": 10}},
+        {"term": {"readable_user_ids": 10}},
+    ]
+    assert query["query"]["bool"]["filter"]["bool"]["minimum_should_match"] == 1
+
+
+def test_search_query_executions_without_engines(search_query_executions):
+    assert search_query_executions(3) == ({"count": 0, "results": []}, None)
+
+
+def test_search_query_executions_repeated_calls(search_query_executions):
+    filters = [["status", 3]]
+    search_query_executions(1, filters=filters)
+    _, query = search_query_executions(2, filters=filters)
+
+    # The filters of the caller are not changed between calls
+    assert filters == [["status", 3]]
+    assert get_filter_terms(query) == [
+        {"match": {"status": "3"}},
+        engine_filter([3]),
+    ]
+
+    search_query_executions(1)
+    _, query = search_query_executions(2)
+    assert get_filter_terms(query) == [engine_filter([3])]
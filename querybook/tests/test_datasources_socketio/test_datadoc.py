@@ -0,0 +1,128 @@
+from unittest import mock
+
+import pytest
+
+
+class FakeSessionRedis:
+    """Sorted sets and hashes of the data doc sessions, runs
+       GET_AND_EXPIRE_SESSIONS_SCRIPT the way redis runs the lua script
+    """
+
+    def __init__(self):
+        self.sorted_sets = {}
+        self.hashes = {}
+        self.scripts = []
+
+    def register_script(self, script):
+        self.scripts.append(script)
+        return self.get_and_expire_sessions
+
+    def get_and_expire_sessions(self, keys, args):
+        session_key, session_user_key, cursor_key = keys
+        sessions = self.sorted_sets.setdefault(session_key, {})
+        session_users = self.hashes.setdefault(session_user_key, {})
+        cursors = self.hashes.setdefault(cursor_key, {})
+
+        # ZRANGEBYSCORE -inf (ARGV[1] excludes the sessions at the cutoff
+        for sid in [sid for sid, score in sessions.items() if score < int(args[0])]:
+            del sessions[sid]
+            session_users.pop(sid, None)
+        for sid in [sid for sid in cursors if sid not in sessions]:
+            del cursors[sid]
+
+        result = []
+        for sid in sorted(sessions, key=lambda sid: (sessions[sid], sid)):
+            if sid in session_users:
+                result += [
+                    sid.encode(),
+                    str(session_users[sid]).encode(),
+                    str(cursors.get(sid, "")).encode(),
+                ]
+        return result
+
+
+NOW = 1600000000
+
+
+@pytest.fixture
+def redis_conn():
+    from datasources_socketio import datadoc
+
+    redis_conn = FakeSessionRedis()
+    with mock.patch.object(datadoc, "time", mock.Mock(time=lambda: NOW + 0.5)):
+        yield redis_conn
+
+
+def add_session(redis_conn, sid, uid, last_action_at, cursor=None):
+    from datasources_socketio.datadoc import get_session_keys
+
+    session_key, session_user_key, cursor_key = get_session_keys(1)
+    redis_conn.sorted_sets.setdefault(session_key, {})[sid] = last_action_at
+    if uid is not None:
+        redis_conn.hashes.setdefault(session_user_key, {})[sid] = uid
+    if cursor is not None:
+        redis_conn.hashes.setdefault(cursor_key, {})[sid] = cursor
+
+
+def test_get_and_expire_session_dicts(redis_conn):
+    from datasources_socketio.datadoc import (
+        DATA_DOC_SESSION_TIMEOUT,
+        GET_AND_EXPIRE_SESSIONS_SCRIPT,
+        get_and_expire_session_dicts,
+        get_session_keys,
+    )
+
+    cutoff = NOW - DATA_DOC_SESSION_TIMEOUT
+    add_session(redis_conn, "idle", 1, cutoff - 1, cursor=10)
+    add_session(redis_conn, "live", 2, NOW, cursor=20)
+    add_session(redis_conn, "live_without_cursor", 2, cutoff)
+    add_session(redis_conn, "live_without_user", None, NOW, cursor=30)
+    # Cursor of a session that already left the doc
+    add_session(redis_conn, "left", 3, NOW, cursor=40)
+    del redis_conn.sorted_sets[get_session_keys(1)[0]]["left"]
+
+    assert get_and_expire_session_dicts(1, redis_conn=redis_conn) == (
+        {"live_without_cursor": 2, "live": 2},
+        {"live": 20},
+    )
+    assert redis_conn.scripts == [GET_AND_EXPIRE_SESSIONS_SCRIPT]
+
+    session_key, session_user_key, cursor_key = get_session_keys(1)
+    # The idle session is pruned along with its uid and cursor
+    assert set(redis_conn.sorted_sets[session_key]) == {
+        "live",
+        "live_without_cursor",
+        "live_without_user",
+    }
+    assert redis_conn.hashes[session_user_key] == {
+        "live": 2,
+        "live_without_cursor": 2,
+        "left": 3,
+    }
+    assert redis_conn.hashes[cursor_key] == {"live": 20, "live_without_user": 30}
+
+
+def test_get_and_expire_session_dicts_of_other_doc(redis_conn):
+    from datasources_socketio.datadoc import get_and_expire_session_dicts
+
+    add_session(redis_conn, "live", 2, NOW, cursor=20)
+
+    assert get_and_expire_session_dicts(2, redis_conn=redis_conn) == ({}, {})
+
+
+def test_get_and_expire_session_dicts_script_arguments():
+    from datasources_socketio import datadoc
+
+    redis_conn = mock.MagicMock()
+    get_and_expire_sessions = redis_conn.register_script.return_value
+    get_and_expire_sessions.return_value = [b"sid", b"1", b""]
+
+    with mock.patch.object(datadoc, "time", mock.Mock(time=lambda: NOW + 0.5)):
+        assert datadoc.get_and_expire_session_dicts(3, redis_conn=redis_conn) == (
+            {"sid": 1},
+            {},
+        )
+    get_and_expire_sessions.assert_called_once_with(
+        keys=("data_doc/3/sessions", "data_doc/3/session_users", "data_doc/3/cursors",),
+        args=[NOW - datadoc.DATA_DOC_SESSION_TIMEOUT],
+    )
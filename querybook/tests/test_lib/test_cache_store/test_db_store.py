@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def session(db_engine):
+    from app.db import DBSession
+    from models.result_store import KeyValueStore
+
+    with DBSession() as session:
+        yield session
+        session.query(KeyValueStore).delete()
+        session.commit()
+
+
+def test_set_and_get(session):
+    from lib.cache_store.stores.db_store import DBCacheStore
+
+    store = DBCacheStore(schedule_expiry=False)
+    store.set("key", '"value"', expires_after=60, session=session)
+
+    entry = store.get("key", session=session)
+    assert entry["value"] == '"value"'
+    assert entry["expires_at"] - entry["updated_at"] in (59, 60, 61)
+
+    # Overwriting without expires_after keeps the key
+    store.set("key", '"value2"', session=session)
+    entry = store.get("key", session=session)
+    assert entry["value"] == '"value2"'
+    assert entry["expires_at"] is None
+
+
+def test_schedule_expiry(session):
+    from lib.cache_store.stores.db_store import DBCacheStore
+
+    with mock.patch(
+        "lib.cache_store.stores.db_store.delete_mysql_cache"
+    ) as delete_mysql_cache:
+        DBCacheStore().set("key", "1", expires_after=60, session=session)
+        delete_mysql_cache.delay.assert_called_once_with("key", countdown=60)
+
+
+def test_expired_entries(session):
+    from lib.cache_store.stores.db_store import DBCacheStore
+    from models.result_store import KeyValueStore
+    from tasks.db_clean_up_jobs import clean_up_expired_key_value_store
+
+    store = DBCacheStore(schedule_expiry=False)
+    store.set("expired", "1", expires_after=60, session=session)
+    store.set("kept", "1", expires_after=60, session=session)
+    store.set("forever", "1", session=session)
+    KeyValueStore.get(
+        key="expired", session=session
+    ).expires_at = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+    assert store.get("expired", session=session) is None
+    assert store.get("kept", session=session) is not None
+
+    with mock.patch("tasks.db_clean_up_jobs.enqueue_result_store_objects"):
+        assert clean_up_expired_key_value_store(session=session, sleep_seconds=0) == 1
+    assert sorted(kvs.key for kvs in session.query(KeyValueStore)) == [
+        "forever",
+        "kept",
+    ]
@@ -0,0 +1,41 @@
+from unittest import TestCase, mock
+
+from lib.cache_store.stores.redis_store import RedisCacheStore
+
+
+class RedisCacheStoreTestCase(TestCase):
+    def setUp(self):
+        self.values = {}
+        self.redis_conn = mock.MagicMock()
+        self.redis_conn.get.side_effect = self.values.get
+        self.redis_conn.set.side_effect = lambda key, value, ex=None: (
+            self.values.__setitem__(key, value)
+        )
+        self.store = RedisCacheStore()
+
+    def test_set_and_get(self):
+        self.store.set("key", '"value"', expires_after=60, redis_conn=self.redis_conn)
+        self.redis_conn.set.assert_called_once_with("cache_store:key", mock.ANY, ex=60)
+
+        entry = self.store.get("key", redis_conn=self.redis_conn)
+        self.assertEqual(entry["value"], '"value"')
+        self.assertEqual(entry["expires_at"], entry["updated_at"] + 60)
+
+    def test_large_values_are_compressed(self):
+        value = "a" * (RedisCacheStore.COMPRESS_MIN_SIZE * 10)
+        self.store.set("key", value, redis_conn=self.redis_conn)
+
+        raw_entry = self.values["cache_store:key"]
+        self.assertTrue(raw_entry.startswith(b"z"))
+        self.assertLess(len(raw_entry), len(value))
+        self.assertEqual(
+            self.store.get("key", redis_conn=self.redis_conn)["value"], value
+        )
+
+    def test_get_missing_key(self):
+        self.assertIsNone(self.store.get("missing", redis_conn=self.redis_conn))
+
+    def test_set_expired_deletes(self):
+        self.store.set("key", "value", expires_after=0, redis_conn=self.redis_conn)
+        self.redis_conn.set.assert_not_called()
+        self.redis_conn.delete.assert_called_once_with("cache_store:key")
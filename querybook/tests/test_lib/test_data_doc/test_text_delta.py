@@ -0,0 +1,100 @@
+import random
+from unittest import TestCase
+
+from lib.data_doc.text_delta import (
+    apply_delta,
+    InvalidDeltaException,
+    transform_delta,
+)
+
+
+class ApplyDeltaTestCase(TestCase):
+    def test_apply(self):
+        self.assertEqual(apply_delta("select 1", [7, -1, "2 + 2"]), "select 2 + 2")
+        self.assertEqual(apply_delta("", ["select"]), "select")
+        self.assertEqual(apply_delta("select", [-6]), "")
+
+    def test_lengths_in_utf16(self):
+        # The emoji is 2 code units
+        self.assertEqual(apply_delta("a😀b", [3, "c", 1]), "a😀cb")
+        with self.assertRaises(InvalidDeltaException):
+            apply_delta("a😀b", [2, "c", 2])
+
+    def test_invalid_delta(self):
+        for delta in ([4], [2], [1, 0, 2], [True, 2], "abc", [1.5]):
+            with self.assertRaises(InvalidDeltaException):
+                apply_delta("abc", delta)
+
+
+class TransformDeltaTestCase(TestCase):
+    def test_concurrent_inserts(self):
+        text = "select 1"
+        applied_delta = ["-- comment\n", 8]
+        delta = [8, "\nlimit 5"]
+        self.assertEqual(
+            apply_delta(
+                apply_delta(text, applied_delta), transform_delta(delta, applied_delta)
+            ),
+            "-- comment\nselect 1\nlimit 5",
+        )
+
+    def test_insert_at_same_place(self):
+        applied_delta = [3, "X"]
+        delta = [3, "Y"]
+        self.assertEqual(
+            apply_delta(
+                apply_delta("abc", applied_delta),
+                transform_delta(delta, applied_delta),
+            ),
+            "abcXY",
+        )
+
+    def test_overlapping_deletes(self):
+        text = "abcdef"
+        applied_delta = [1, -3, 2]  # aef
+        delta = [2, -3, 1]  # abf
+        self.assertEqual(
+            apply_delta(
+                apply_delta(text, applied_delta), transform_delta(delta, applied_delta)
+            ),
+            "af",
+        )
+
+    def test_mismatched_deltas(self):
+        with self.assertRaises(InvalidDeltaException):
+            transform_delta([3], [4])
+
+    def test_random_deltas(self):
+        rng = random.Random(0)
+
+        def random_delta(text_length):
+            delta = []
+            position = 0
+            while position < text_length:
+                length = rng.randint(1, text_length - position)
+                delta.append(length if rng.random() < 0.5 else -length)
+                if rng.random() < 0.3:
+                    delta.append(rng.choice(["x", "yy", "😀"]))
+                position += length
+            return delta
+
+        for _ in range(200):
+            text = "".join(rng.choice("abc😀") for _ in range(rng.randint(1, 20)))
+            length = len(text.encode("utf-16-le")) // 2
+            applied_delta = random_delta(length)
+            delta = random_delta(length)
+            try:
+                apply_delta(text, applied_delta)
+                apply_delta(text, delta)
+            except InvalidDeltaException:
+                # Split an emoji
+                continue
+
+            transformed = transform_delta(delta, applied_delta)
+            result = apply_delta(apply_delta(text, applied_delta), transformed)
+            inserted = "".join(op for op in delta if isinstance(op, str))
+            self.assertEqual(
+                sum(len(op) for op in transformed if isinstance(op, str)),
+                len(inserted),
+            )
+            self.assertIsInstance(result, str)
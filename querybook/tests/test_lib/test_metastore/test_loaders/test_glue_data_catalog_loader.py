@@ -198,3 +198,32 @@ class GlueDataCatalogLoaderTestCase(TestCase):
 
         self.assertEqual(result_table, table)
         self.assertEqual(result_columns, columns)
+
+    @mock_glue
+    def test_get_all_tables_and_columns_in_schema(self):
+        self.client.create_database(DatabaseInput={"Name": DB_NAME_B})
+        self.client.create_table(DatabaseName=DB_NAME_B, TableInput=TABLE_INPUT_B_1)
+        self.client.create_table(DatabaseName=DB_NAME_B, TableInput=TABLE_INPUT_B_2)
+        self.client.create_table(DatabaseName=DB_NAME_B, TableInput=TABLE_INPUT_B_3)
+        self.client.create_partition(
+            DatabaseName=DB_NAME_B,
+            TableName=TABLE_NAME_B_2,
+            PartitionInput=PARTITION_INPUT_A_1,
+        )
+
+        result = self.loader.get_all_tables_and_columns_in_schema(DB_NAME_B)
+
+        self.assertEqual(
+            [table.name for table, _ in result],
+            [TABLE_NAME_B_1, TABLE_NAME_B_2, TABLE_NAME_B_3],
+        )
+        self.assertEqual(
+            [table.partitions for table, _ in result],
+            [[], ["partition_date=2021-01-01/partition_hour=15"], []],
+        )
+        for table_name, (_, columns) in zip(
+            [TABLE_NAME_B_1, TABLE_NAME_B_2, TABLE_NAME_B_3], result
+        ):
+            self.assertEqual(
+                columns, self.loader.get_table_and_columns(DB_NAME_B, table_name)[1]
+            )
@@ -0,0 +1,225 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.mysql.base import MySQLDialect
+from sqlalchemy.dialects.postgresql.base import PGDialect
+
+from lib.metastore.loaders.sqlalchemy_metastore_loader import (
+    SqlAlchemyMetastoreLoader,
+    _column_info_to_data_column,
+)
+
+
+TABLE_DDLS = [
+    """CREATE TABLE table_a (
+        id INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL DEFAULT 'unknown',
+        description TEXT
+    )""",
+    "CREATE TABLE table_b (id INT, value FLOAT, price numeric(10, 2), at DATETIME)",
+    "CREATE VIEW view_a AS SELECT id FROM table_a",
+]
+
+
+@pytest.fixture
+def sqlite_loader(tmp_path):
+    connection_string = "sqlite:///{}".format(tmp_path / "test_metastore.db")
+    engine = create_engine(connection_string)
+    for ddl in TABLE_DDLS:
+        engine.execute(ddl)
+    engine.dispose()
+
+    loader = SqlAlchemyMetastoreLoader(
+        {
+            "id": 1,
+            "metastore_params": {"connection_string": connection_string},
+            "acl_control": {},
+        }
+    )
+    yield loader
+    del loader
+
+
+def test_get_all_tables_and_columns_in_schema(sqlite_loader):
+    result = sqlite_loader.get_all_tables_and_columns_in_schema("main")
+
+    assert [table.name for table, _ in result] == (
+        sqlite_loader.get_all_table_names_in_schema("main")
+    )
+    for table, columns in result:
+        assert (table, columns) == sqlite_loader.get_table_and_columns(
+            "main", table.name
+        )
+    assert [column.type for column in result[1][1]] == [
+        "INTEGER",
+        "FLOAT",
+        "NUMERIC(10, 2)",
+        "DATETIME",
+    ]
+
+
+def test_get_all_tables_and_columns_in_unsupported_dialect(sqlite_loader):
+    sqlite_loader._engine.dialect.name = "unsupported"
+    assert sqlite_loader.get_all_tables_and_columns_in_schema("main") is None
+
+
+# (name, format_type, default, notnull) by table, as stored in pg_catalog
+POSTGRESQL_COLUMNS = {
+    "orders": [
+        ("id", "integer", "nextval('orders_id_seq'::regclass)", True),
+        ("name", "character varying(255)", None, False),
+        ("code", "character(3)", "'abc'::bpchar", False),
+        ("price", "numeric(10,2)", None, False),
+        ("rate", "double precision", None, False),
+        ("created_at", "timestamp without time zone", "now()", True),
+        ("updated_at", "timestamp(3) with time zone", None, False),
+        ("tags", "text[]", None, False),
+        ("mood", "mood", None, False),
+    ],
+    "empty": [],
+}
+
+
+class FakePostgresConnection:
+    """Returns the rows of POSTGRESQL_COLUMNS to the query of the loader,
+       and to the ones of PGDialect.get_columns
+    """
+
+    def execute(self, statement, table_oid=None, **params):
+        result = mock.Mock()
+        if table_oid is None:
+            result.fetchall.return_value = [
+                (table_name,) + column
+                for table_name, columns in sorted(POSTGRESQL_COLUMNS.items())
+                for column in (columns or [(None, None, None, None)])
+            ]
+        else:
+            result.fetchall.return_value = [
+                column + (attnum, table_oid, None, None)
+                for attnum, column in enumerate(POSTGRESQL_COLUMNS[table_oid], 1)
+            ]
+        return result
+
+
+def test_get_all_tables_and_columns_in_postgresql_schema():
+    dialect = PGDialect()
+    dialect.server_version_info = (12,)
+    conn = FakePostgresConnection()
+    engine = mock.Mock(dialect=dialect)
+
+    with mock.patch.object(
+        SqlAlchemyMetastoreLoader,
+        "_get_sqlalchemy",
+        return_value=(engine, mock.Mock(), conn),
+    ), mock.patch.object(dialect, "_load_domains", return_value={}), mock.patch.object(
+        dialect,
+        "_load_enums",
+        return_value=[
+            {"name": "mood", "schema": "public", "visible": True, "labels": ["ok"]}
+        ],
+    ), mock.patch.object(
+        # The oid of a table is its name in FakePostgresConnection
+        dialect,
+        "get_table_oid",
+        side_effect=lambda conn, table_name, schema, **kw: table_name,
+    ):
+        loader = SqlAlchemyMetastoreLoader(
+            {"id": 1, "metastore_params": {}, "acl_control": {}}
+        )
+        result = loader.get_all_tables_and_columns_in_schema("public")
+
+        assert [table.name for table, _ in result] == ["empty", "orders"]
+        # Same columns as the inspector
+        for table, columns in result:
+            assert columns == [
+                _column_info_to_data_column(column_info)
+                for column_info in dialect.get_columns(conn, table.name, "public")
+            ]
+
+    assert [column.type for column in result[1][1]] == [
+        "INTEGER",
+        "VARCHAR(255)",
+        "CHAR(3)",
+        "NUMERIC(10, 2)",
+        "DOUBLE PRECISION",
+        "TIMESTAMP WITHOUT TIME ZONE",
+        "TIMESTAMP(3) WITH TIME ZONE",
+        "TEXT[]",
+        "mood",
+    ]
+
+
+MYSQL_CREATE_TABLES = {
+    "orders": """CREATE TABLE `orders` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `quantity` int(11) DEFAULT '0',
+  `price` decimal(10,2) unsigned DEFAULT NULL,
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8""",
+    "users": """CREATE TABLE `users` (
+  `id` bigint(20) NOT NULL,
+  `bio` text
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+}
+
+# TABLE_NAME, TABLE_TYPE, CREATE_TIME, UPDATE_TIME, data size
+MYSQL_TABLES = [
+    ("orders", "BASE TABLE", datetime(2020, 1, 1), None, 16384),
+    ("users", "BASE TABLE", datetime(2020, 1, 2), datetime(2020, 1, 3), 32768),
+]
+
+
+def test_get_all_tables_and_columns_in_mysql_schema():
+    from lib.metastore.loaders.mysql_metastore_loader import MysqlMetastoreLoader
+
+    dialect = MySQLDialect()
+    dialect.server_version_info = (5, 7, 30)
+    dialect._server_ansiquotes = False
+    dialect._connection_charset = "utf8mb4"
+
+    conn = mock.Mock()
+    conn.execute.return_value.fetchall.return_value = MYSQL_TABLES
+    engine = mock.Mock(dialect=dialect)
+    engine.execute.side_effect = lambda statement: [
+        row[1:] for row in MYSQL_TABLES if f'TABLE_NAME="{row[0]}"' in statement
+    ]
+    # Parses the SHOW CREATE TABLE like Inspector.get_columns
+    inspect = mock.Mock()
+    inspect.get_columns.side_effect = lambda table_name, schema: dialect.get_columns(
+        conn, table_name, schema
+    )
+
+    with mock.patch.object(
+        MysqlMetastoreLoader, "_get_sqlalchemy", return_value=(engine, inspect, conn),
+    ), mock.patch.object(
+        dialect,
+        "_show_create_table",
+        side_effect=lambda conn, table, charset, full_name: MYSQL_CREATE_TABLES[
+            full_name.split(".")[1].strip("`")
+        ],
+    ):
+        loader = MysqlMetastoreLoader(
+            {"id": 1, "metastore_params": {}, "acl_control": {}}
+        )
+        result = loader.get_all_tables_and_columns_in_schema("db")
+
+        assert [table.name for table, _ in result] == ["orders", "users"]
+        # Same tables and columns as the per table reflection
+        for table, columns in result:
+            assert (table, columns) == loader.get_table_and_columns("db", table.name)
+
+    assert [(column.type, column.comment) for column in result[0][1]] == [
+        ("INTEGER(11)", "Default:None Nullable:False"),
+        (
+            "VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin",
+            "Default:None Nullable:False",
+        ),
+        ("INTEGER(11)", "Default:'0' Nullable:True"),
+        ("DECIMAL(10, 2) UNSIGNED", "Default:None Nullable:True"),
+        ("DATETIME", "Default:CURRENT_TIMESTAMP Nullable:True"),
+    ]
+    assert result[1][0].table_updated_at is not None
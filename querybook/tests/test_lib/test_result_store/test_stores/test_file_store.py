@@ -2,6 +2,7 @@ from unittest import TestCase, mock
 from lib.result_store.stores.file_store import (
     FileUploader,
     FileReader,
+    FileDeleter,
     FILE_STORE_PATH,
     get_file_uri,
 )
@@ -97,3 +98,33 @@ class FileReaderTestCase(TestCase):
         with mock.patch("builtins.open", mock.mock_open(read_data=self.mock_raw_csv)):
             reader = FileReader("test")
             self.assertEqual(reader.read_csv(0), self.mock_csv)
+
+
+class FileDeleterTestCase(TestCase):
+    def setUp(self):
+        path_patch = mock.patch("lib.result_store.stores.file_store.os.path")
+        self.mock_os_path = path_patch.start()
+        self.mock_os_path.exists.side_effect = lambda path: not path.endswith("gone")
+        self.mock_os_path.getsize.return_value = 10
+        self.addCleanup(path_patch.stop)
+
+        remove_patch = mock.patch("lib.result_store.stores.file_store.os.remove")
+        self.mock_os_remove = remove_patch.start()
+        self.addCleanup(remove_patch.stop)
+
+    def test_delete(self):
+        bytes_reclaimed = FileDeleter().delete(["1/result.csv", "1/log.txt"])
+
+        self.assertEqual(bytes_reclaimed, 20)
+        self.mock_os_remove.assert_has_calls(
+            [
+                mock.call(f"{FILE_STORE_PATH}1/result.csv"),
+                mock.call(f"{FILE_STORE_PATH}1/log.txt"),
+            ]
+        )
+
+    def test_delete_missing(self):
+        bytes_reclaimed = FileDeleter().delete(["1/result.csv", "2/gone"])
+
+        self.assertEqual(bytes_reclaimed, 10)
+        self.mock_os_remove.assert_called_once_with(f"{FILE_STORE_PATH}1/result.csv")
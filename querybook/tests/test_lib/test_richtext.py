@@ -0,0 +1,27 @@
+from lib.richtext import html_to_plaintext, richtext_to_plaintext
+
+
+def test_draftjs_to_plaintext():
+    content_state = (
+        '{"blocks": [{"text": "Hello"}, {"text": "World"}], "entityMap": {}}'
+    )
+    assert richtext_to_plaintext(content_state) == "Hello\nWorld"
+
+
+def test_non_draftjs_json_to_plaintext():
+    assert richtext_to_plaintext("123") == "123"
+    assert richtext_to_plaintext("null") == "null"
+    assert richtext_to_plaintext("{not json") == "{not json"
+
+
+def test_html_to_plaintext():
+    assert html_to_plaintext("plain text") == "plain text"
+    assert html_to_plaintext("<p>Hello <b>world</b></p>") == "Hello world"
+    assert html_to_plaintext("<p>unclosed <i>italic") == "unclosed italic"
+    assert html_to_plaintext("&amp; &lt;tag&gt; &#39;") == "& <tag> '"
+    assert html_to_plaintext("<!-- comment --><div>a</div>\n<div>b</div>") == "a\nb"
+
+
+def test_html_to_plaintext_skips_script_and_style():
+    assert html_to_plaintext("<script>var a = 1 < 2;</script>hi") == "hi"
+    assert html_to_plaintext("<style>p {}</style><p>styled</p>") == "styled"
@@ -0,0 +1,69 @@
+from unittest import mock
+
+import sqlalchemy as sql
+from sqlalchemy.dialects import mysql, postgresql
+
+from lib.sqlalchemy import upsert_counts
+
+metadata = sql.MetaData()
+stats = sql.Table(
+    "stats",
+    metadata,
+    sql.Column("id", sql.Integer, primary_key=True),
+    sql.Column("key", sql.Integer),
+    sql.Column("count", sql.Integer),
+    sql.Column("last_seen", sql.Integer),
+    sql.UniqueConstraint("key"),
+)
+
+
+def get_upsert_sql(dialect):
+    session = mock.Mock()
+    session.get_bind.return_value.dialect = dialect
+    upsert_counts(
+        stats,
+        ["key"],
+        [{"key": 1, "count": 2, "last_seen": 3}],
+        ["count"],
+        max_names=["last_seen"],
+        session=session,
+    )
+    statement = session.execute.call_args[0][0]
+    return " ".join(str(statement.compile(dialect=dialect)).split())
+
+
+def test_upsert_counts_mysql():
+    assert get_upsert_sql(mysql.dialect()).endswith(
+        "ON DUPLICATE KEY UPDATE count = (stats.count + VALUES(count)), "
+        "last_seen = CASE WHEN (stats.last_seen < VALUES(last_seen)) "
+        "THEN VALUES(last_seen) ELSE stats.last_seen END"
+    )
+
+
+def test_upsert_counts_postgresql():
+    assert get_upsert_sql(postgresql.dialect()).endswith(
+        "ON CONFLICT (key) DO UPDATE SET count = (stats.count + excluded.count), "
+        "last_seen = CASE WHEN (stats.last_seen < excluded.last_seen) "
+        "THEN excluded.last_seen ELSE stats.last_seen END"
+    )
+
+
+def test_upsert_counts_sqlite():
+    engine = sql.create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.connect() as conn:
+        session = mock.Mock(execute=conn.execute)
+        session.get_bind.return_value = engine
+
+        for count, last_seen in ((1, 5), (2, 3), (3, 7)):
+            upsert_counts(
+                stats,
+                ["key"],
+                [{"key": 1, "count": count, "last_seen": last_seen}],
+                ["count"],
+                max_names=["last_seen"],
+                session=session,
+            )
+        assert conn.execute(
+            sql.select([stats.c.count, stats.c.last_seen])
+        ).fetchall() == [(6, 7)]
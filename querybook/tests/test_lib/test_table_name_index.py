@@ -0,0 +1,104 @@
+from lib.table_name_index import TableNamePrefixIndex
+
+
+def create_index():
+    return TableNamePrefixIndex.from_tables(
+        [
+            (1, "default", "users", 10),
+            (2, "default", "user_events", 30),
+            (3, "analytics", "users_daily", 20),
+            (4, "analytics", "orders", 40),
+        ]
+    )
+
+
+def test_search_full_name_and_table_name():
+    index = create_index()
+    assert index.search("user") == [
+        "default.user_events",
+        "analytics.users_daily",
+        "default.users",
+    ]
+    assert index.search("default.u") == ["default.user_events", "default.users"]
+    assert index.search("analytics.") == ["analytics.orders", "analytics.users_daily"]
+    assert index.search("missing") == []
+
+
+def test_search_limit():
+    index = create_index()
+    assert index.search("", limit=2) == ["analytics.orders", "default.user_events"]
+
+
+def test_search_orders_same_weight_by_name():
+    index = TableNamePrefixIndex.from_tables(
+        [(1, "b", "table", 1), (2, "a", "table", 1), (3, "c", "table", 2)]
+    )
+    assert index.search("table") == ["c.table", "a.table", "b.table"]
+
+
+def test_upsert():
+    index = create_index()
+    index.upsert(1, "default", "users", 50)
+    assert index.search("user", limit=1) == ["default.users"]
+
+    # Renamed tables no longer match their old name
+    index.upsert(2, "default", "events", 30)
+    assert index.search("user_") == []
+    assert index.search("events") == ["default.events"]
+
+    index.upsert(5, "analytics", "users_weekly", 0)
+    assert len(index) == 5
+    assert index.search("analytics.users") == [
+        "analytics.users_daily",
+        "analytics.users_weekly",
+    ]
+
+
+def test_remove():
+    index = create_index()
+    index.remove(4)
+    index.remove(100)
+    assert len(index) == 3
+    assert index.search("analytics.") == ["analytics.users_daily"]
+
+    # The slot of the removed table is reused
+    index.upsert(6, "analytics", "orders_v2", 5)
+    assert index.search("orders") == ["analytics.orders_v2"]
+
+
+def test_memoized_prefix_is_invalidated():
+    index = TableNamePrefixIndex.from_tables(
+        (table_id, "default", "table_{}".format(table_id), table_id)
+        for table_id in range(TableNamePrefixIndex.MEMOIZE_MIN_MATCHES * 2)
+    )
+    top_table = "default.table_{}".format(
+        TableNamePrefixIndex.MEMOIZE_MIN_MATCHES * 2 - 1
+    )
+    assert index.search("table_", limit=1) == [top_table]
+
+    index.upsert(0, "default", "table_0", TableNamePrefixIndex.MEMOIZE_MIN_MATCHES * 3)
+    assert index.search("table_", limit=2) == ["default.table_0", top_table]
+
+    index.remove(0)
+    assert index.search("table_", limit=1) == [top_table]
+
+
+def test_from_fields():
+    index = create_index()
+    # Leaves a free slot
+    index.remove(2)
+
+    loaded_index = TableNamePrefixIndex.from_fields(index.to_fields())
+    assert len(loaded_index) == 3
+    assert loaded_index.search("") == index.search("")
+    assert loaded_index.search("users") == ["analytics.users_daily", "default.users"]
+
+    loaded_index.upsert(5, "default", "user_events_v2", 50)
+    assert loaded_index.search("default.user") == [
+        "default.user_events_v2",
+        "default.users",
+    ]
+    assert (
+        TableNamePrefixIndex.from_fields(TableNamePrefixIndex().to_fields()).search("")
+        == []
+    )
@@ -0,0 +1,34 @@
+from unittest import mock
+
+from lib.utils.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_size=2, ttl_secs=10)
+    with mock.patch("lib.utils.cache.time.monotonic", return_value=100):
+        cache.set("a", 1)
+    with mock.patch("lib.utils.cache.time.monotonic", return_value=105):
+        assert cache.get("a") == 1
+    with mock.patch("lib.utils.cache.time.monotonic", return_value=111):
+        assert cache.get("a", "default") == "default"
+        assert "a" not in cache
+
+
+def test_lru_cache_caches_falsy_values():
+    cache = LRUCache()
+    cache.set("empty", [])
+    assert "empty" in cache
+    assert cache.get("empty", "default") == []
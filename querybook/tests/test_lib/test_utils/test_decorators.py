@@ -0,0 +1,155 @@
+import json
+from unittest import TestCase, mock
+
+from lib.utils import decorators
+from lib.utils.decorators import in_mem_memoized
+
+
+class InMemoryMemoizedTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def create_memoized(self, **kwargs):
+        @in_mem_memoized(**kwargs)
+        def add(a, b=0, session=None):
+            self.calls.append((a, b))
+            return a + b
+
+        return add
+
+    def test_memoized_by_arguments(self):
+        add = self.create_memoized()
+        self.assertEqual(add(1, b=2), 3)
+        self.assertEqual(add(1, b=2, session="session"), 3)
+        self.assertEqual(add(2), 2)
+        self.assertEqual(self.calls, [(1, 2), (2, 0)])
+
+    def test_memoized_by_bound_arguments(self):
+        add = self.create_memoized()
+        add(1)
+        add(a=1)
+        add(1, 0)
+        add(1, b=0, session="session")
+        self.assertEqual(self.calls, [(1, 0)])
+
+        add.invalidate(a=1)
+        add(1)
+        self.assertEqual(self.calls, [(1, 0), (1, 0)])
+
+    def test_unhashable_arguments_are_not_memoized(self):
+        @in_mem_memoized()
+        def get_len(items):
+            self.calls.append(items)
+            return len(items)
+
+        self.assertEqual(get_len([1, 2]), 2)
+        self.assertEqual(get_len([1, 2]), 2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_max_size(self):
+        add = self.create_memoized(max_size=2)
+        add(1)
+        add(2)
+        add(1)
+        add(3)  # Evicts 2, the least recently used
+        add(1)
+        add(2)
+        self.assertEqual(self.calls, [(1, 0), (2, 0), (3, 0), (2, 0)])
+
+    def test_ttl(self):
+        add = self.create_memoized(ttl_secs=10)
+        with mock.patch("lib.utils.cache.time.monotonic", return_value=0):
+            add(1)
+        with mock.patch("lib.utils.cache.time.monotonic", return_value=5):
+            add(1)
+        with mock.patch("lib.utils.cache.time.monotonic", return_value=11):
+            add(1)
+        self.assertEqual(self.calls, [(1, 0), (1, 0)])
+
+    def test_invalidate(self):
+        add = self.create_memoized()
+        add(1)
+        add(2)
+        add.invalidate(1)
+        add(1)
+        add(2)
+        add.invalidate_all()
+        add(2)
+        self.assertEqual(self.calls, [(1, 0), (2, 0), (1, 0), (2, 0)])
+
+    def test_result_computed_during_invalidation_is_not_memoized(self):
+        @in_mem_memoized()
+        def get_value():
+            get_value.invalidate()
+            self.calls.append(None)
+
+        get_value()
+        get_value()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_method(self):
+        class Adder:
+            def __init__(self, base):
+                self.base = base
+
+            @in_mem_memoized()
+            def add(self, a):
+                return self.base + a
+
+        self.assertEqual(Adder(1).add(1), 2)
+        self.assertEqual(Adder(2).add(1), 3)
+
+    def test_invalidation_across_processes(self):
+        redis_conn = mock.MagicMock()
+        with mock.patch(
+            "lib.utils.decorators._start_invalidation_listener"
+        ), mock.patch("lib.utils.decorators.get_redis", return_value=redis_conn):
+            add = self.create_memoized(invalidate_across_processes=True)
+            add(1, b=2)
+            add.invalidate(1, b=2)
+
+            channel, message = redis_conn.publish.call_args[0]
+            self.assertEqual(channel, decorators.MEMOIZED_INVALIDATION_CHANNEL)
+            # Sent with the arguments bound to the signature
+            self.assertEqual(json.loads(message)["args"], [1, 2])
+            self.assertEqual(json.loads(message)["kwargs"], {})
+
+            # Message received from another process
+            add(1, b=2)
+            decorators._handle_invalidation(message)
+            add(1, b=2)
+            self.assertEqual(self.calls, [(1, 2), (1, 2), (1, 2)])
+
+    def test_invalidation_across_processes_of_tuple_arguments(self):
+        redis_conn = mock.MagicMock()
+        with mock.patch(
+            "lib.utils.decorators._start_invalidation_listener"
+        ), mock.patch("lib.utils.decorators.get_redis", return_value=redis_conn):
+
+            @in_mem_memoized(invalidate_across_processes=True)
+            def get_items(items, options=None, session=None):
+                self.calls.append(items)
+                return list(items)
+
+            get_items((1, 2), options={"c": [3]})
+            get_items.invalidate((1, 2), options={"c": [3]}, session=object())
+            message = redis_conn.publish.call_args[0][1]
+
+            # Received as lists from another process
+            get_items((1, 2), options={"c": [3]})
+            decorators._handle_invalidation(message)
+            get_items((1, 2), options={"c": [3]})
+            self.assertEqual(len(self.calls), 3)
+
+    def test_not_json_serializable_arguments_across_processes(self):
+        with mock.patch("lib.utils.decorators._start_invalidation_listener"):
+
+            @in_mem_memoized(invalidate_across_processes=True)
+            def get_type(value):
+                self.calls.append(value)
+                return type(value)
+
+            value = object()
+            get_type(value)
+            get_type(value)
+            self.assertEqual(len(self.calls), 2)
@@ -0,0 +1,79 @@
+from unittest import TestCase, mock
+
+from lib.cache_store.stores.base_store import BaseCacheStore
+from lib.utils import mysql_cache
+
+
+class InMemoryCacheStore(BaseCacheStore):
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, session=None):
+        return self.entries.get(key)
+
+    def set(self, key, value, expires_after=None, session=None):
+        self.entries[key] = {"key": key, "value": value, "updated_at": 100}
+
+    def delete(self, key, session=None):
+        self.entries.pop(key, None)
+
+
+class MysqlCacheTestCase(TestCase):
+    def setUp(self):
+        self.store = InMemoryCacheStore()
+        store_patch = mock.patch(
+            "lib.utils.mysql_cache.get_cache_store", return_value=self.store
+        )
+        store_patch.start()
+        self.addCleanup(store_patch.stop)
+
+        now_patch = mock.patch(
+            "lib.utils.mysql_cache.DATETIME_TO_UTC", return_value=110
+        )
+        now_patch.start()
+        self.addCleanup(now_patch.stop)
+
+        mysql_cache._local_cache.clear()
+        self.session = mock.MagicMock()
+
+    def test_set_and_get(self):
+        mysql_cache.set_key("key", {"a": 1}, session=self.session)
+        self.assertEqual(mysql_cache.get_key("key", session=self.session), {"a": 1})
+
+    def test_local_cache(self):
+        mysql_cache.set_key("key", [1], session=self.session)
+        mysql_cache.get_key("key", session=self.session)
+        self.store.entries.clear()
+
+        # Served from the local cache, which is not mutated by callers
+        mysql_cache.get_key("key", session=self.session).append(2)
+        self.assertEqual(mysql_cache.get_key("key", session=self.session), [1])
+
+        mysql_cache.delete_key("key", session=self.session)
+        with self.assertRaises(LookupError):
+            mysql_cache.get_key("key", session=self.session)
+
+    def test_expiry(self):
+        mysql_cache.set_key("key", 1, session=self.session)
+        self.assertEqual(
+            mysql_cache.get_key("key", expires_after=10, session=self.session), 1
+        )
+        with self.assertRaises(LookupError):
+            mysql_cache.get_key("key", expires_after=5, session=self.session)
+
+        self.store.entries["expired"] = {
+            "key": "expired",
+            "value": "1",
+            "updated_at": 100,
+            "expires_at": 105,
+        }
+        with self.assertRaises(LookupError):
+            mysql_cache.get_key("expired", session=self.session)
+
+    def test_with_mysql_cache(self):
+        fn = mock.MagicMock(return_value="result")
+        cached_fn = mysql_cache.with_mysql_cache("fn_key", expires_after=60)(fn)
+
+        self.assertEqual(cached_fn(), "result")
+        self.assertEqual(cached_fn(), "result")
+        fn.assert_called_once()
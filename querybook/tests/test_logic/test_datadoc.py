@@ -0,0 +1,370 @@
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def session(db_engine):
+    from app.db import DBSession
+    from models.datadoc import DataCell, DataDoc, DataDocDataCell
+
+    with mock.patch("logic.datadoc.update_es_data_doc_by_id"), mock.patch(
+        "logic.datadoc.normalize_data_doc_cell_order_task"
+    ), DBSession() as session:
+        yield session
+        for model in (DataDocDataCell, DataCell, DataDoc):
+            session.query(model).delete()
+        session.commit()
+
+
+def create_doc(session, num_cells):
+    from logic.datadoc import create_data_doc
+
+    return create_data_doc(
+        environment_id=1,
+        owner_uid=1,
+        cells=[
+            {"type": "text", "context": str(index), "meta": None}
+            for index in range(num_cells)
+        ],
+        commit=False,
+        session=session,
+    )
+
+
+def create_cell(session, context):
+    from logic.datadoc import create_data_cell
+
+    return create_data_cell(
+        cell_type="text", context=context, commit=False, session=session
+    )
+
+
+def get_cells(session, data_doc_id):
+    """(context, cell_order) of the cells of the doc in order"""
+    from models.datadoc import DataCell, DataDocDataCell
+
+    return (
+        session.query(DataCell.context, DataDocDataCell.cell_order)
+        .join(DataDocDataCell, DataDocDataCell.data_cell_id == DataCell.id)
+        .filter(DataDocDataCell.data_doc_id == data_doc_id)
+        .order_by(DataDocDataCell.cell_order)
+        .all()
+    )
+
+
+def set_cell_orders(session, data_doc_id, cell_orders):
+    from models.datadoc import DataDocDataCell
+
+    data_doc_cells = (
+        session.query(DataDocDataCell)
+        .filter(DataDocDataCell.data_doc_id == data_doc_id)
+        .order_by(DataDocDataCell.cell_order)
+        .all()
+    )
+    for data_doc_cell, cell_order in zip(data_doc_cells, cell_orders):
+        data_doc_cell.cell_order = cell_order
+    session.flush()
+
+
+def get_cell_id(session, data_doc_id, index):
+    from models.datadoc import DataDocDataCell
+
+    return (
+        session.query(DataDocDataCell.data_cell_id)
+        .filter(DataDocDataCell.data_doc_id == data_doc_id)
+        .order_by(DataDocDataCell.cell_order)
+        .offset(index)
+        .limit(1)
+        .scalar()
+    )
+
+
+def test_create_data_doc_spreads_cell_orders(session):
+    from logic.datadoc import CELL_ORDER_GAP
+
+    data_doc = create_doc(session, 3)
+
+    assert get_cells(session, data_doc.id) == [
+        ("0", 0),
+        ("1", CELL_ORDER_GAP),
+        ("2", 2 * CELL_ORDER_GAP),
+    ]
+    assert [cell.context for cell in data_doc.cells] == ["0", "1", "2"]
+
+
+def test_get_cell_order_at(session):
+    from logic.datadoc import CELL_ORDER_GAP, _get_cell_order_at
+
+    data_doc = create_doc(session, 2)
+    empty_data_doc = create_doc(session, 0)
+
+    assert _get_cell_order_at(empty_data_doc.id, 0, session) == 0
+    # Before the first cell, between two cells and after the last cell
+    assert _get_cell_order_at(data_doc.id, 0, session) == -CELL_ORDER_GAP
+    assert _get_cell_order_at(data_doc.id, 1, session) == CELL_ORDER_GAP // 2
+    assert _get_cell_order_at(data_doc.id, 2, session) == 2 * CELL_ORDER_GAP
+    # Without the first cell, index 0 is above the second cell
+    assert (
+        _get_cell_order_at(
+            data_doc.id,
+            0,
+            session,
+            exclude_cell_id=get_cell_id(session, data_doc.id, 0),
+        )
+        == 0
+    )
+
+
+@pytest.mark.parametrize("index", [-1, 3, 10])
+def test_get_cell_order_at_invalid_index(session, index):
+    from logic.datadoc import _get_cell_order_at
+
+    data_doc = create_doc(session, 2)
+
+    with pytest.raises(AssertionError, match="Invalid cell index"):
+        _get_cell_order_at(data_doc.id, index, session)
+
+
+def test_insert_data_doc_cell(session):
+    from logic.datadoc import CELL_ORDER_GAP, insert_data_doc_cell
+
+    data_doc = create_doc(session, 2)
+    version = data_doc.version
+
+    insert_data_doc_cell(
+        data_doc.id, create_cell(session, "new").id, 1, commit=False, session=session
+    )
+
+    # Only the row of the new cell is written
+    assert get_cells(session, data_doc.id) == [
+        ("0", 0),
+        ("new", CELL_ORDER_GAP // 2),
+        ("1", CELL_ORDER_GAP),
+    ]
+    assert [cell.context for cell in data_doc.cells] == ["0", "new", "1"]
+    session.refresh(data_doc)
+    assert data_doc.version == version + 1
+
+
+def test_insert_data_doc_cell_invalid_index(session):
+    from logic.datadoc import insert_data_doc_cell
+
+    data_doc = create_doc(session, 2)
+
+    with pytest.raises(AssertionError, match="Invalid cell index"):
+        insert_data_doc_cell(
+            data_doc.id,
+            create_cell(session, "new").id,
+            3,
+            commit=False,
+            session=session,
+        )
+
+
+def test_delete_data_doc_cell(session):
+    from logic.datadoc import CELL_ORDER_GAP, delete_data_doc_cell
+
+    data_doc = create_doc(session, 3)
+
+    delete_data_doc_cell(
+        data_doc.id,
+        get_cell_id(session, data_doc.id, 1),
+        commit=False,
+        session=session,
+    )
+
+    # The cells below keep their order
+    assert get_cells(session, data_doc.id) == [("0", 0), ("2", 2 * CELL_ORDER_GAP)]
+
+
+@pytest.mark.parametrize(
+    "from_index, to_index, expected_contexts",
+    [(0, 2, ["1", "2", "0"]), (2, 0, ["2", "0", "1"]), (0, 1, ["1", "0", "2"])],
+)
+def test_move_data_doc_cell(session, from_index, to_index, expected_contexts):
+    from logic.datadoc import move_data_doc_cell
+
+    data_doc = create_doc(session, 3)
+    cell_orders = dict(get_cells(session, data_doc.id))
+    moved_context = str(from_index)
+
+    move_data_doc_cell(data_doc.id, from_index, to_index, commit=False, session=session)
+
+    cells = get_cells(session, data_doc.id)
+    assert [context for context, _ in cells] == expected_contexts
+    assert [cell.context for cell in data_doc.cells] == expected_contexts
+    # Only the moved cell gets a new order
+    assert {
+        context: cell_order for context, cell_order in cells if context != moved_context
+    } == {
+        context: cell_order
+        for context, cell_order in cell_orders.items()
+        if context != moved_context
+    }
+
+
+@pytest.mark.parametrize("from_index, to_index", [(0, 3), (2, 0), (-1, 0)])
+def test_move_data_doc_cell_invalid_index(session, from_index, to_index):
+    from logic.datadoc import move_data_doc_cell
+
+    data_doc = create_doc(session, 2)
+
+    with pytest.raises(AssertionError, match="Invalid"):
+        move_data_doc_cell(
+            data_doc.id, from_index, to_index, commit=False, session=session
+        )
+
+
+@pytest.mark.parametrize(
+    "from_index, index, expected_contexts",
+    [
+        # Moving down in the same doc puts the cell above the cell at index
+        (0, 2, ["1", "0", "2"]),
+        (0, 3, ["1", "2", "0"]),
+        (2, 0, ["2", "0", "1"]),
+    ],
+)
+def test_move_data_doc_cell_to_same_doc(session, from_index, index, expected_contexts):
+    from logic.datadoc import move_data_doc_cell_to_doc
+
+    data_doc = create_doc(session, 3)
+
+    move_data_doc_cell_to_doc(
+        get_cell_id(session, data_doc.id, from_index),
+        data_doc.id,
+        index,
+        commit=False,
+        session=session,
+    )
+
+    assert [context for context, _ in get_cells(session, data_doc.id)] == (
+        expected_contexts
+    )
+
+
+def test_move_data_doc_cell_to_doc(session):
+    from logic.datadoc import CELL_ORDER_GAP, move_data_doc_cell_to_doc
+
+    data_doc = create_doc(session, 3)
+    other_data_doc = create_doc(session, 2)
+    cell_id = get_cell_id(session, data_doc.id, 1)
+
+    move_data_doc_cell_to_doc(
+        cell_id, other_data_doc.id, 1, commit=False, session=session
+    )
+
+    # The cells of both docs keep their order
+    assert get_cells(session, data_doc.id) == [("0", 0), ("2", 2 * CELL_ORDER_GAP)]
+    assert get_cells(session, other_data_doc.id) == [
+        ("0", 0),
+        ("1", CELL_ORDER_GAP // 2),
+        ("1", CELL_ORDER_GAP),
+    ]
+    assert get_cell_id(session, other_data_doc.id, 1) == cell_id
+    assert [cell.context for cell in data_doc.cells] == ["0", "2"]
+    assert [cell.id for cell in other_data_doc.cells][1] == cell_id
+
+
+def test_move_data_doc_cell_to_doc_invalid_index(session):
+    from logic.datadoc import move_data_doc_cell_to_doc
+
+    data_doc = create_doc(session, 1)
+    other_data_doc = create_doc(session, 2)
+
+    with pytest.raises(AssertionError, match="Invalid cell index"):
+        move_data_doc_cell_to_doc(
+            get_cell_id(session, data_doc.id, 0),
+            other_data_doc.id,
+            3,
+            commit=False,
+            session=session,
+        )
+
+
+def test_normalize_data_doc_cell_order(session):
+    from logic.datadoc import CELL_ORDER_GAP, normalize_data_doc_cell_order
+
+    data_doc = create_doc(session, 3)
+    set_cell_orders(session, data_doc.id, [-7, 3, 4])
+
+    normalize_data_doc_cell_order(data_doc.id, commit=False, session=session)
+
+    assert get_cells(session, data_doc.id) == [
+        ("0", 0),
+        ("1", CELL_ORDER_GAP),
+        ("2", 2 * CELL_ORDER_GAP),
+    ]
+
+
+def test_small_gap_normalizes_in_background(session):
+    from logic.datadoc import (
+        CELL_ORDER_MIN_GAP,
+        insert_data_doc_cell,
+        normalize_data_doc_cell_order_task,
+    )
+
+    data_doc = create_doc(session, 2)
+    set_cell_orders(session, data_doc.id, [0, CELL_ORDER_MIN_GAP])
+
+    insert_data_doc_cell(
+        data_doc.id, create_cell(session, "new").id, 1, commit=False, session=session
+    )
+
+    assert get_cells(session, data_doc.id) == [
+        ("0", 0),
+        ("new", CELL_ORDER_MIN_GAP // 2),
+        ("1", CELL_ORDER_MIN_GAP),
+    ]
+    normalize_data_doc_cell_order_task.delay.assert_called_once_with(data_doc.id)
+
+
+def test_large_gap_is_not_normalized(session):
+    from logic.datadoc import (
+        CELL_ORDER_MIN_GAP,
+        insert_data_doc_cell,
+        normalize_data_doc_cell_order_task,
+    )
+
+    data_doc = create_doc(session, 2)
+    set_cell_orders(session, data_doc.id, [0, 2 * CELL_ORDER_MIN_GAP + 2])
+
+    insert_data_doc_cell(
+        data_doc.id, create_cell(session, "new").id, 1, commit=False, session=session
+    )
+
+    normalize_data_doc_cell_order_task.delay.assert_not_called()
+
+
+def test_exhausted_gap_normalizes_in_transaction(session):
+    from logic.datadoc import (
+        CELL_ORDER_GAP,
+        insert_data_doc_cell,
+        move_data_doc_cell,
+    )
+
+    data_doc = create_doc(session, 3)
+    set_cell_orders(session, data_doc.id, [0, 1, 2])
+
+    # No order left between the first two cells
+    insert_data_doc_cell(
+        data_doc.id, create_cell(session, "new").id, 1, commit=False, session=session
+    )
+
+    assert get_cells(session, data_doc.id) == [
+        ("0", 0),
+        ("new", CELL_ORDER_GAP // 2),
+        ("1", CELL_ORDER_GAP),
+        ("2", 2 * CELL_ORDER_GAP),
+    ]
+
+    # Same when the cell is moved between two adjacent orders
+    set_cell_orders(session, data_doc.id, [0, 1, 2, 3])
+    move_data_doc_cell(data_doc.id, 3, 1, commit=False, session=session)
+
+    assert get_cells(session, data_doc.id) == [
+        ("0", 0),
+        ("2", CELL_ORDER_GAP // 2),
+        ("new", CELL_ORDER_GAP),
+        ("1", 2 * CELL_ORDER_GAP),
+    ]
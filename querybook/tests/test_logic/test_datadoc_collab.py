@@ -0,0 +1,94 @@
+import time
+from unittest import mock
+
+import pytest
+
+from lib.data_doc.data_cell_context import DataCellContext
+
+
+class FakeDataCellContexts:
+    """Live contexts and persist markers of lib.data_doc.data_cell_context"""
+
+    def __init__(self):
+        self.contexts = {}
+        self.persist_scheduled = set()
+
+    def apply_data_cell_delta(self, cell_id, context_version, delta, load_context):
+        now = time.time()
+        current = self.contexts.get(cell_id)
+        self.contexts[cell_id] = DataCellContext(
+            context="",
+            version=context_version + 1,
+            dirty_since=current.dirty_since if current else now,
+            changed_at=now,
+        )
+        return self.contexts[cell_id], delta
+
+    def mark_persist_scheduled(self, cell_id, expires_after):
+        if cell_id in self.persist_scheduled:
+            return False
+        self.persist_scheduled.add(cell_id)
+        return True
+
+
+@pytest.fixture
+def collab():
+    from logic import datadoc_collab
+
+    fake = FakeDataCellContexts()
+    with mock.patch.multiple(
+        datadoc_collab,
+        assert_can_write=mock.DEFAULT,
+        verify_environment_permission=mock.DEFAULT,
+        socketio=mock.DEFAULT,
+        persist_data_cell_context_task=mock.DEFAULT,
+        mark_data_cell_context_persisted=mock.DEFAULT,
+        apply_data_cell_delta=fake.apply_data_cell_delta,
+        get_data_cell_context=lambda cell_id: fake.contexts.get(cell_id),
+        mark_data_cell_context_persist_scheduled=fake.mark_persist_scheduled,
+        clear_data_cell_context_persist_scheduled=fake.persist_scheduled.discard,
+    ) as mocks, mock.patch.object(datadoc_collab, "logic") as logic:
+        yield datadoc_collab, fake, mocks["persist_data_cell_context_task"], logic
+
+
+def test_patch_data_cell_schedules_one_persist(collab):
+    datadoc_collab, fake, persist_task, logic = collab
+    session = mock.Mock()
+
+    for version in range(3):
+        datadoc_collab.patch_data_cell(1, version, [], session=session)
+    persist_task.apply_async.assert_called_once_with(
+        args=[1], countdown=datadoc_collab.DATA_CELL_CONTEXT_PERSIST_DELAY
+    )
+
+    # Persisting clears the marker, so the next delta schedules another one
+    datadoc_collab.persist_data_cell_context(1, session=session)
+    logic.update_data_cell_context.assert_called_once_with(1, "", 3, session=session)
+    datadoc_collab.patch_data_cell(1, 3, [], session=session)
+    assert persist_task.apply_async.call_count == 2
+
+
+def test_persist_data_cell_context_once_paused(collab):
+    datadoc_collab, fake, persist_task, logic = collab
+    session = mock.Mock()
+    now = time.time()
+
+    # Got a delta 1 second ago, checked again once paused
+    fake.contexts[1] = DataCellContext("a", 2, dirty_since=now - 10, changed_at=now - 1)
+    datadoc_collab.persist_data_cell_context_once_paused(1, session=session)
+    logic.update_data_cell_context.assert_not_called()
+    countdown = persist_task.apply_async.call_args[1]["countdown"]
+    assert countdown == pytest.approx(
+        datadoc_collab.DATA_CELL_CONTEXT_PERSIST_DELAY - 1, abs=0.5
+    )
+
+    # Paused
+    fake.contexts[1] = DataCellContext("a", 2, dirty_since=now - 10, changed_at=now - 6)
+    datadoc_collab.persist_data_cell_context_once_paused(1, session=session)
+    logic.update_data_cell_context.assert_called_once_with(1, "a", 2, session=session)
+
+    # Kept getting deltas since the max delay
+    logic.update_data_cell_context.reset_mock()
+    fake.contexts[1] = DataCellContext("b", 3, dirty_since=now - 61, changed_at=now)
+    datadoc_collab.persist_data_cell_context_once_paused(1, session=session)
+    logic.update_data_cell_context.assert_called_once_with(1, "b", 3, session=session)
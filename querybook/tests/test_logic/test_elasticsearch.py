@@ -0,0 +1,67 @@
+from datetime import datetime
+from unittest import mock
+
+from const.query_execution import QueryExecutionStatus
+
+
+def test_query_executions_to_es():
+    from logic import elasticsearch
+
+    query_executions = [
+        mock.Mock(
+            id=1,
+            query="select * from db.table_a join db.table_b on a = b",
+            engine=mock.Mock(language="presto"),
+            engine_id=2,
+            uid=3,
+            status=QueryExecutionStatus.DONE,
+            created_at=datetime(2020, 1, 1),
+            completed_at=datetime(2020, 1, 1, 0, 1),
+        ),
+        mock.Mock(
+            id=4,
+            query="select <",
+            engine=None,
+            engine_id=5,
+            uid=6,
+            status=QueryExecutionStatus.RUNNING,
+            created_at=datetime(2020, 1, 1),
+            completed_at=None,
+        ),
+    ]
+
+    with mock.patch.object(
+        elasticsearch,
+        "get_viewer_uids_by_query_execution_ids",
+        return_value={1: [7, 8], 4: []},
+    ) as get_viewer_uids:
+        documents = elasticsearch.query_executions_to_es(
+            query_executions, session=mock.Mock()
+        )
+        # The viewers of all the executions are fetched at once
+        assert get_viewer_uids.call_args[0][0] == [1, 4]
+
+    assert documents == [
+        {
+            "id": 1,
+            "query": "select * from db.table_a join db.table_b on a = b",
+            "tables": ["db.table_a", "db.table_b"],
+            "engine_id": 2,
+            "uid": 3,
+            "readable_user_ids": [7, 8],
+            "status": QueryExecutionStatus.DONE.value,
+            "created_at": 1577836800,
+            "completed_at": 1577836860,
+        },
+        {
+            "id": 4,
+            "query": "select &lt;",
+            "tables": [],
+            "engine_id": 5,
+            "uid": 6,
+            "readable_user_ids": [],
+            "status": QueryExecutionStatus.RUNNING.value,
+            "created_at": 1577836800,
+            "completed_at": None,
+        },
+    ]
@@ -0,0 +1,169 @@
+from datetime import date, datetime, timezone
+from unittest import mock
+
+import pytest
+
+
+class FakeImpressionBuffer:
+    def __init__(self, impressions):
+        self.impressions = list(impressions)
+        self.dead_letter = []
+
+    def pop(self, batch_size):
+        batch = self.impressions[:batch_size]
+        self.impressions = self.impressions[batch_size:]
+        return batch
+
+    def requeue(self, impressions):
+        self.impressions = list(impressions) + self.impressions
+
+    def dead_letter_impressions(self, impressions):
+        self.dead_letter.extend(impressions)
+
+
+@pytest.fixture
+def session(db_engine):
+    from app.db import DBSession
+    from models.impression import Impression, ImpressionDailyRollup
+
+    with DBSession() as session:
+        yield session
+        for model in (Impression, ImpressionDailyRollup):
+            session.query(model).delete()
+        session.commit()
+
+
+def flush(buffer, session):
+    from logic.impression import flush_buffered_impressions
+
+    with mock.patch(
+        "logic.impression.pop_buffered_impressions", side_effect=buffer.pop
+    ), mock.patch(
+        "logic.impression.requeue_impressions", side_effect=buffer.requeue
+    ), mock.patch(
+        "logic.impression.dead_letter_impressions",
+        side_effect=buffer.dead_letter_impressions,
+    ), mock.patch(
+        "logic.impression.get_impression_buffer_size", return_value=0
+    ):
+        return flush_buffered_impressions(batch_size=2, session=session)
+
+
+def get_impressions(session):
+    from models.impression import Impression
+
+    return sorted(
+        (impression.item_id, impression.uid) for impression in session.query(Impression)
+    )
+
+
+def test_flush_buffered_impressions(session):
+    buffer = FakeImpressionBuffer([(1, 0, 1, 0.0), (2, 0, 1, 0.0), (1, 0, 2, 0.0)])
+
+    assert flush(buffer, session) == 3
+    assert buffer.impressions == []
+    assert get_impressions(session) == [(1, 1), (1, 2), (2, 1)]
+
+
+def test_flush_poison_impression(session):
+    from logic.impression import IMPRESSION_FLUSH_MAX_ATTEMPTS
+
+    # The item type of the second impression is invalid
+    buffer = FakeImpressionBuffer(
+        [(1, 0, 1, 0.0), (2, 99, 1, 0.0), (3, 0, 1, 0.0), (4, 0, 1, 0.0)]
+    )
+
+    for attempts in range(1, IMPRESSION_FLUSH_MAX_ATTEMPTS):
+        with pytest.raises(ValueError):
+            flush(buffer, session)
+        # The batch is put back, with its attempts
+        assert buffer.impressions[:2] == [
+            (1, 0, 1, 0.0, attempts),
+            (2, 99, 1, 0.0, attempts),
+        ]
+        assert get_impressions(session) == []
+
+    # Then the batch is written one by one and the rest is drained
+    assert flush(buffer, session) == 3
+    assert buffer.impressions == []
+    assert buffer.dead_letter == [(2, 99, 1, 0.0, IMPRESSION_FLUSH_MAX_ATTEMPTS - 1)]
+    assert get_impressions(session) == [(1, 1), (3, 1), (4, 1)]
+
+
+def get_rollups(session):
+    from models.impression import ImpressionDailyRollup
+
+    return sorted(
+        (rollup.item_id, rollup.uid, str(rollup.day), rollup.count)
+        for rollup in session.query(ImpressionDailyRollup)
+    )
+
+
+def test_flush_rolls_up_impressions(session):
+    from const.impression import ImpressionItemType
+    from logic import impression as logic
+
+    day_1 = datetime(2020, 1, 1, 10, tzinfo=timezone.utc).timestamp()
+    day_2 = datetime(2020, 1, 2, 10, tzinfo=timezone.utc).timestamp()
+    buffer = FakeImpressionBuffer(
+        [
+            (1, 0, 1, day_1),
+            (1, 0, 1, day_1 + 60),
+            (1, 0, 2, day_1),
+            (2, 0, 1, day_1),
+            (1, 1, 1, day_1),  # Another item type
+        ]
+    )
+    assert flush(buffer, session) == 5
+    # Views of the same keys in a later flush are added to the rollups
+    buffer = FakeImpressionBuffer([(1, 0, 1, day_2), (1, 0, 2, day_1 + 120)])
+    assert flush(buffer, session) == 2
+
+    assert get_impressions(session) == [
+        (1, 1),
+        (1, 1),
+        (1, 1),
+        (1, 1),
+        (1, 2),
+        (1, 2),
+        (2, 1),
+    ]
+    assert get_rollups(session) == [
+        (1, 1, "2020-01-01", 1),
+        (1, 1, "2020-01-01", 2),
+        (1, 1, "2020-01-02", 1),
+        (1, 2, "2020-01-01", 2),
+        (2, 1, "2020-01-01", 1),
+    ]
+
+    data_doc = ImpressionItemType.DATA_DOC
+    after_date = date(2020, 1, 1)
+    assert logic.get_viewers_by_item_after_date(
+        data_doc, 1, after_date, session=session
+    ) == [
+        {
+            "uid": 1,
+            "latest_view_at": datetime.utcfromtimestamp(day_2),
+            "views_count": 3,
+        },
+        {
+            "uid": 2,
+            "latest_view_at": datetime.utcfromtimestamp(day_1 + 120),
+            "views_count": 2,
+        },
+    ]
+    assert (
+        logic.get_viewers_count_by_item_after_date(
+            data_doc, 1, date(2020, 1, 2), session=session
+        )
+        == 1
+    )
+    assert logic.get_viewers_count_by_items_after_date(
+        data_doc, [1, 2, 3], after_date, session=session
+    ) == {1: 2, 2: 1}
+    assert sorted(
+        (count, str(day))
+        for count, day in logic.get_item_timeseries_after_date(
+            data_doc, 1, after_date, session=session
+        )
+    ) == [(1, "2020-01-02"), (2, "2020-01-01")]
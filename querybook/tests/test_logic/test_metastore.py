@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def session(db_engine):
+    from app.db import DBSession
+    from models.metastore import DataTableCoQueryStat, DataTableQueryExecutionStat
+
+    with DBSession() as session:
+        yield session
+        for model in (DataTableQueryExecutionStat, DataTableCoQueryStat):
+            session.query(model).delete()
+        session.commit()
+
+
+def get_query_execution_stats(session):
+    from models.metastore import DataTableQueryExecutionStat
+
+    return sorted(
+        (stat.table_id, stat.engine_id, stat.uid, stat.count)
+        for stat in session.query(DataTableQueryExecutionStat)
+    )
+
+
+def get_co_query_stats(session):
+    from models.metastore import DataTableCoQueryStat
+
+    return sorted(
+        (stat.table_id, stat.co_table_id, stat.count)
+        for stat in session.query(DataTableCoQueryStat)
+    )
+
+
+def test_update_table_query_stats(session):
+    from logic.metastore import update_table_query_stats
+
+    update_table_query_stats([1, 2], 1, 1, 1, session=session)
+    update_table_query_stats([1], 1, 1, 1, session=session)
+    update_table_query_stats([1], 2, 1, 1, session=session)
+    assert get_query_execution_stats(session) == [
+        (1, 1, 1, 2),
+        (1, 2, 1, 1),
+        (2, 1, 1, 1),
+    ]
+    assert get_co_query_stats(session) == [(1, 2, 1), (2, 1, 1)]
+
+    update_table_query_stats([1, 2], 1, 1, -1, session=session)
+    # Stats counting down to 0 are deleted
+    assert get_query_execution_stats(session) == [(1, 1, 1, 1), (1, 2, 1, 1)]
+    assert get_co_query_stats(session) == []
+
+    # Removing a log that has no stat does not create one
+    update_table_query_stats([3], 1, 1, -1, session=session)
+    assert get_query_execution_stats(session) == [(1, 1, 1, 1), (1, 2, 1, 1)]
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def session(db_engine):
+    from app.db import DBSession
+    from models.admin import QueryEngineEnvironment
+    from models.query_execution import QueryExecution
+
+    with DBSession() as session:
+        session.add(
+            QueryEngineEnvironment(query_engine_id=1, environment_id=1, engine_order=0)
+        )
+        session.commit()
+        yield session
+        for model in (QueryExecution, QueryEngineEnvironment):
+            session.query(model).delete()
+        session.commit()
+
+
+def create_query_executions(session, created_ats):
+    from models.query_execution import QueryExecution
+
+    query_executions = [
+        QueryExecution(query="select 1", engine_id=1, uid=1, created_at=created_at)
+        for created_at in created_ats
+    ]
+    session.add_all(query_executions)
+    session.commit()
+    return [query_execution.id for query_execution in query_executions]
+
+
+def search_pages(session, limit, delete_cursor=False):
+    from logic.query_execution import search_query_execution
+    from models.query_execution import QueryExecution
+
+    pages = []
+    cursor = None
+    while True:
+        page = [
+            query_execution.id
+            for query_execution in search_query_execution(
+                1, {"user": 1}, "created_at", limit, cursor=cursor, session=session
+            )
+        ]
+        if not page:
+            return pages
+        pages.append(page)
+        cursor = page[-1]
+        if delete_cursor:
+            session.query(QueryExecution).filter(QueryExecution.id == cursor).delete()
+            session.commit()
+
+
+def test_search_query_execution_cursor(session):
+    now = datetime.utcnow().replace(microsecond=0)
+    # Executions 1-3 and 4-5 are created at the same time
+    ids = create_query_executions(
+        session, [now, now, now, now + timedelta(1), now + timedelta(1)]
+    )
+
+    assert search_pages(session, 2) == [
+        [ids[4], ids[3]],
+        [ids[2], ids[1]],
+        [ids[0]],
+    ]
+
+
+def test_search_query_execution_deleted_cursor(session):
+    now = datetime.utcnow().replace(microsecond=0)
+    ids = create_query_executions(session, [now, now, now, now + timedelta(1)])
+
+    assert search_pages(session, 1, delete_cursor=True) == [
+        [ids[3]],
+        [ids[2]],
+        [ids[1]],
+        [ids[0]],
+    ]
@@ -0,0 +1,176 @@
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def scheduler(db_engine):
+    from celery import Celery
+
+    from app.db import DBSession
+    from logic.schedule import create_task_schedule
+    from models.schedule import TaskSchedule, TaskScheduleChange, TaskSchedules
+    from scheduler import DatabaseScheduler
+
+    for name, cron in (("a", "0 1 * * *"), ("b", "0 2 * * *"), ("c", "0 3 * * *")):
+        create_task_schedule(name=name, task="tasks.dummy_task", cron=cron)
+
+    # lazy so the default jobs are not installed
+    scheduler = DatabaseScheduler(app=Celery(set_as_current=False), lazy=True)
+    scheduler.schedule
+    scheduler.populate_heap()
+    yield scheduler
+
+    with DBSession() as session:
+        for model in (TaskSchedule, TaskScheduleChange, TaskSchedules):
+            session.query(model).delete()
+        session.commit()
+
+
+def get_next_run_times(scheduler):
+    return {event[2].name: event[0] for event in scheduler._heap}
+
+
+def get_schedule_id(scheduler, name):
+    return scheduler._schedule[name].model.id
+
+
+def assert_unchanged(scheduler, entries, next_run_times, names):
+    assert {name: scheduler._schedule[name] for name in names} == {
+        name: entries[name] for name in names
+    }
+    assert {
+        name: next_run_time
+        for name, next_run_time in get_next_run_times(scheduler).items()
+        if name in names
+    } == {name: next_run_times[name] for name in names}
+
+
+def test_initial_read(scheduler):
+    assert set(scheduler.schedule) == {"a", "b", "c"}
+    assert set(get_next_run_times(scheduler)) == {"a", "b", "c"}
+
+
+def test_add_schedule(scheduler):
+    from logic.schedule import create_task_schedule
+
+    entries = dict(scheduler.schedule)
+    next_run_times = get_next_run_times(scheduler)
+
+    create_task_schedule(name="d", task="tasks.dummy_task", cron="0 4 * * *")
+
+    assert set(scheduler.schedule) == {"a", "b", "c", "d"}
+    assert set(get_next_run_times(scheduler)) == {"a", "b", "c", "d"}
+    assert_unchanged(scheduler, entries, next_run_times, ["a", "b", "c"])
+
+
+def test_change_schedule(scheduler):
+    from logic.schedule import update_task_schedule
+
+    entries = dict(scheduler.schedule)
+    next_run_times = get_next_run_times(scheduler)
+
+    update_task_schedule(get_schedule_id(scheduler, "b"), cron="30 5 * * *")
+
+    assert set(scheduler.schedule) == {"a", "b", "c"}
+    assert scheduler.schedule["b"] is not entries["b"]
+    assert scheduler.schedule["b"].model.cron == "30 5 * * *"
+    assert get_next_run_times(scheduler)["b"] != next_run_times["b"]
+    assert_unchanged(scheduler, entries, next_run_times, ["a", "c"])
+
+
+def test_disable_schedule(scheduler):
+    from logic.schedule import update_task_schedule
+
+    entries = dict(scheduler.schedule)
+    next_run_times = get_next_run_times(scheduler)
+
+    update_task_schedule(get_schedule_id(scheduler, "b"), enabled=False)
+
+    assert set(scheduler.schedule) == {"a", "c"}
+    assert set(get_next_run_times(scheduler)) == {"a", "c"}
+    assert_unchanged(scheduler, entries, next_run_times, ["a", "c"])
+
+
+def test_delete_schedule(scheduler):
+    from logic.schedule import delete_task_schedule
+
+    entries = dict(scheduler.schedule)
+    next_run_times = get_next_run_times(scheduler)
+
+    delete_task_schedule(get_schedule_id(scheduler, "c"))
+
+    assert set(scheduler.schedule) == {"a", "b"}
+    assert set(get_next_run_times(scheduler)) == {"a", "b"}
+    assert_unchanged(scheduler, entries, next_run_times, ["a", "b"])
+
+
+def test_run_info_is_not_a_change(scheduler):
+    entries = dict(scheduler.schedule)
+    next_run_times = get_next_run_times(scheduler)
+
+    scheduler.reserve(entries["a"])
+    scheduler.sync()
+
+    with mock.patch("scheduler.get_task_schedules_by_ids") as get_task_schedules:
+        assert set(scheduler.schedule) == {"a", "b", "c"}
+    get_task_schedules.assert_not_called()
+    assert_unchanged(scheduler, entries, next_run_times, ["b", "c"])
+
+
+def get_changes_after(changes):
+    return lambda after_id: [change for change in changes if change.id > after_id]
+
+
+def test_schedule_changes_after_gap(scheduler):
+    import scheduler as scheduler_module
+
+    last_change_id = scheduler._last_change_id
+    changes = [mock.Mock(id=last_change_id + 1), mock.Mock(id=last_change_id + 3)]
+
+    with mock.patch.object(
+        scheduler_module,
+        "get_task_schedule_changes",
+        side_effect=get_changes_after(changes),
+    ), mock.patch.object(scheduler_module, "time", mock.Mock(monotonic=lambda: 100)):
+        assert scheduler.get_schedule_changes() == changes
+        # Waits on the gap, the change after it is not applied again
+        assert scheduler._last_change_id == last_change_id + 1
+        assert scheduler.get_schedule_changes() == []
+
+    late_change = mock.Mock(id=last_change_id + 2)
+    with mock.patch.object(
+        scheduler_module,
+        "get_task_schedule_changes",
+        side_effect=get_changes_after(changes + [late_change]),
+    ):
+        assert scheduler.get_schedule_changes() == [late_change]
+    assert scheduler._last_change_id == last_change_id + 3
+    assert scheduler._change_gap_since is None
+
+
+def test_schedule_changes_gap_timeout(scheduler):
+    import scheduler as scheduler_module
+
+    last_change_id = scheduler._last_change_id
+    changes = [mock.Mock(id=last_change_id + 2)]
+
+    with mock.patch.object(
+        scheduler_module,
+        "get_task_schedule_changes",
+        side_effect=get_changes_after(changes),
+    ), mock.patch.object(scheduler_module, "time", mock.Mock(monotonic=lambda: 100)):
+        scheduler.get_schedule_changes()
+    assert scheduler._last_change_id == last_change_id
+
+    with mock.patch.object(
+        scheduler_module, "get_task_schedule_changes", return_value=[]
+    ), mock.patch.object(
+        scheduler_module,
+        "time",
+        mock.Mock(monotonic=lambda: 100 + scheduler_module.CHANGE_LOG_GAP_TIMEOUT + 1),
+    ):
+        scheduler.get_schedule_changes()
+    # The missing change was rolled back
+    assert scheduler._last_change_id == last_change_id + 2
+    assert scheduler._change_gap_since is None
@@ -0,0 +1,30 @@
+import { applyTextDelta, makeTextDelta } from 'lib/data-doc/text-delta';
+
+test('makeTextDelta keeps the unchanged ends', () => {
+    expect(makeTextDelta('select 1', 'select 2 + 2')).toStrictEqual([
+        7,
+        -1,
+        '2 + 2',
+    ]);
+    expect(makeTextDelta('', 'select')).toStrictEqual(['select']);
+    expect(makeTextDelta('select', '')).toStrictEqual([-6]);
+    expect(makeTextDelta('select', 'select')).toStrictEqual([6]);
+});
+
+test('applyTextDelta reverses makeTextDelta', () => {
+    const pairs = [
+        ['select 1', 'select 2 + 2'],
+        ['aaa', 'aaaa'],
+        ['a😀b', 'a😀cb'],
+        ['', ''],
+    ];
+    for (const [oldText, newText] of pairs) {
+        expect(applyTextDelta(oldText, makeTextDelta(oldText, newText))).toBe(
+            newText
+        );
+    }
+});
+
+test('applyTextDelta rejects a delta of another text', () => {
+    expect(() => applyTextDelta('abc', [2])).toThrow();
+});
@@ -10,6 +10,8 @@ export interface IDataCellBase {
     updated_at: number;
 
     docId: number;
+    // Version of the context, sent along with its deltas
+    context_version?: number;
 }
 
 export interface IDataCellMetaBase {
@@ -43,6 +43,29 @@ export interface ISearchTableParams {
     offset?: number;
 }
 
+export interface IQueryExecutionPreview {
+    id: number;
+    engine_id: number;
+    uid: number;
+    status: number;
+    tables: string[];
+    created_at: number;
+    completed_at: number;
+    highlight?: {
+        query?: string[];
+    };
+}
+
+export interface ISearchQueryExecutionParams {
+    environment_id: number;
+    keywords: string;
+    filters?: Array<[filterName: string, filterValue: any]>;
+    sort_key?: string | string[];
+    sort_order?: 'desc' | 'asc';
+    limit?: number;
+    offset?: number;
+}
+
 export type ISearchPreview = IDataDocPreview | ITablePreview;
 
 export interface IUserSearchResultRow {
@@ -3,6 +3,7 @@ import type { ContentState } from 'draft-js';
 import type { IDataCellMeta } from 'const/datadoc';
 import { BatchManager, spreadMergeFunction } from 'lib/batch/batch-manager';
 import dataDocSocket from 'lib/data-doc/datadoc-socketio';
+import { makeTextDelta } from 'lib/data-doc/text-delta';
 import { convertIfContentStateToHTML } from 'lib/richtext/serialize';
 import { DataDocResource } from 'resource/dataDoc';
 
@@ -49,23 +50,71 @@ interface IUpdateDataCell {
     meta?: IDataCellMeta;
 }
 
+export interface ISyncedDataCellContext {
+    context: string;
+    version: number;
+}
+
 export class DataCellSaveManager {
     private itemSaverByCellId: Record<
         number,
         BatchManager<IUpdateDataCell, IUpdateDataCell>
     > = {};
 
+    // Context of the cell as saved on the server, deltas are made on it
+    private syncedContextByCellId: Record<number, ISyncedDataCellContext> = {};
+    private onRebaseByCellId: Record<
+        number,
+        (sentContext: string, synced: ISyncedDataCellContext) => void
+    > = {};
+
+    public getSyncedContext(cellId: number): ISyncedDataCellContext {
+        return this.syncedContextByCellId[cellId];
+    }
+
+    public setSyncedContext(cellId: number, synced: ISyncedDataCellContext) {
+        if (synced == null) {
+            delete this.syncedContextByCellId[cellId];
+        } else {
+            this.syncedContextByCellId[cellId] = synced;
+        }
+    }
+
     public saveDataCell(
         docId: number,
         cellId: number,
         context?: string | ContentState,
         meta?: IDataCellMeta,
-        frequency: number = 2000
+        frequency: number = 2000,
+        onRebase?: (sentContext: string, synced: ISyncedDataCellContext) => void
     ) {
+        if (onRebase) {
+            this.onRebaseByCellId[cellId] = onRebase;
+        }
         if (!(cellId in this.itemSaverByCellId)) {
             this.itemSaverByCellId[cellId] = new BatchManager({
                 mergeFunction: spreadMergeFunction,
-                processFunction: (data) => {
+                processFunction: async (data) => {
+                    const isActiveDoc = dataDocSocket.activeDataDocId === docId;
+                    const synced = this.syncedContextByCellId[cellId];
+                    if (
+                        isActiveDoc &&
+                        data.meta == null &&
+                        typeof data.context === 'string' &&
+                        synced != null
+                    ) {
+                        try {
+                            await this.patchDataCellContext(
+                                cellId,
+                                data.context,
+                                synced
+                            );
+                            return;
+                        } catch (e) {
+                            // Save the whole context instead
+                        }
+                    }
+
                     const stringifiedContext = convertIfContentStateToHTML(
                         data.context
                     );
@@ -77,11 +126,20 @@ export class DataCellSaveManager {
                         ...(data.meta != null && { meta: data.meta }),
                     };
 
-                    if (dataDocSocket.activeDataDocId === docId) {
-                        return dataDocSocket.updateDataCell(cellId, fields);
-                    } else {
-                        return DataDocResource.updateCell(cellId, fields);
-                    }
+                    const cell = isActiveDoc
+                        ? await dataDocSocket.updateDataCell(cellId, fields)
+                        : (await DataDocResource.updateCell(cellId, fields))
+                              .data;
+                    this.setSyncedContext(
+                        cellId,
+                        typeof cell.context === 'string' &&
+                            cell.context_version != null
+                            ? {
+                                  context: cell.context,
+                                  version: cell.context_version,
+                              }
+                            : null
+                    );
                 },
                 batchFrequency: frequency,
             });
@@ -93,6 +151,28 @@ export class DataCellSaveManager {
         });
     }
 
+    private async patchDataCellContext(
+        cellId: number,
+        context: string,
+        synced: ISyncedDataCellContext
+    ) {
+        const result = await dataDocSocket.patchDataCell(
+            cellId,
+            synced.version,
+            makeTextDelta(synced.context, context)
+        );
+
+        const newSynced = {
+            // Other changes got merged in if the whole context is sent back
+            context: result.context ?? context,
+            version: result.context_version,
+        };
+        this.setSyncedContext(cellId, newSynced);
+        if (result.context != null && cellId in this.onRebaseByCellId) {
+            this.onRebaseByCellId[cellId](context, newSynced);
+        }
+    }
+
     public forceSaveDataCell(cellId: number) {
         if (cellId in this.itemSaverByCellId) {
             this.itemSaverByCellId[cellId].forceProcess();
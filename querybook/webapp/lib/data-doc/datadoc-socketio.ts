@@ -3,6 +3,7 @@ import type { Socket } from 'socket.io-client';
 import { IAccessRequest } from 'const/accessRequest';
 import { IDataDocEditor, IDataCellMeta } from 'const/datadoc';
 import SocketIOManager from 'lib/socketio-manager';
+import type { TextDelta } from 'lib/data-doc/text-delta';
 import { IQueryExecution } from 'const/queryExecution';
 import { DataDocResource } from 'resource/dataDoc';
 
@@ -29,6 +30,14 @@ export interface IDataDocSocketEvent {
     updateDataCell?: IDataDocSocketEventPromise<
         (rawDataCell, isSameOrigin: boolean) => any
     >;
+    patchDataCell?: IDataDocSocketEventPromise<
+        (
+            cellId: number,
+            contextVersion: number,
+            delta: TextDelta,
+            isSameOrigin: boolean
+        ) => any
+    >;
     insertDataCell?: IDataDocSocketEventPromise<
         (index: number, rawDataCell, isSameOrigin: boolean) => any
     >;
@@ -169,6 +178,18 @@ export class DataDocSocket {
             (resp) => resp.data
         );
 
+    public patchDataCell = (
+        cellId: number,
+        contextVersion: number,
+        delta: TextDelta
+    ) =>
+        DataDocResource.patchCellContext(
+            cellId,
+            contextVersion,
+            delta,
+            this.socketId
+        ).then((resp) => resp.data);
+
     public deleteDataCell = (docId: number, cellId: number) => {
         this.socket.emit('delete_data_cell', docId, cellId);
         return this.makePromise<IDataDocSocketPromise<[index: number]>>(
@@ -328,6 +349,19 @@ export class DataDocSocket {
                 );
             });
 
+            this.socket.on(
+                'data_cell_patched',
+                (originator, cellId, contextVersion, delta) => {
+                    this.resolveProimseAndEvent(
+                        'patchDataCell',
+                        originator,
+                        cellId,
+                        contextVersion,
+                        delta
+                    );
+                }
+            );
+
             this.socket.on('data_cell_deleted', (originator, cellId) => {
                 this.resolveProimseAndEvent(
                     'deleteDataCell',
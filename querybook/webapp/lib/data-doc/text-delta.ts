@@ -0,0 +1,67 @@
+/**
+ * Deltas of text, in the format of ot.js text operations:
+ *    positive number: keep that many characters
+ *    negative number: delete that many characters
+ *    string: insert the string
+ *
+ * Lengths are in UTF-16 code units, same as String.length
+ */
+export type TextDelta = Array<number | string>;
+
+export function makeTextDelta(oldText: string, newText: string): TextDelta {
+    const maxLength = Math.min(oldText.length, newText.length);
+
+    let prefixLength = 0;
+    while (
+        prefixLength < maxLength &&
+        oldText[prefixLength] === newText[prefixLength]
+    ) {
+        prefixLength++;
+    }
+
+    let suffixLength = 0;
+    while (
+        suffixLength < maxLength - prefixLength &&
+        oldText[oldText.length - 1 - suffixLength] ===
+            newText[newText.length - 1 - suffixLength]
+    ) {
+        suffixLength++;
+    }
+
+    const deletedLength = oldText.length - prefixLength - suffixLength;
+    const inserted = newText.slice(prefixLength, newText.length - suffixLength);
+
+    const delta: TextDelta = [];
+    if (prefixLength) {
+        delta.push(prefixLength);
+    }
+    if (deletedLength) {
+        delta.push(-deletedLength);
+    }
+    if (inserted) {
+        delta.push(inserted);
+    }
+    if (suffixLength) {
+        delta.push(suffixLength);
+    }
+    return delta;
+}
+
+export function applyTextDelta(text: string, delta: TextDelta): string {
+    const parts: string[] = [];
+    let position = 0;
+    for (const op of delta) {
+        if (typeof op === 'string') {
+            parts.push(op);
+        } else if (op > 0) {
+            parts.push(text.slice(position, position + op));
+            position += op;
+        } else {
+            position -= op;
+        }
+    }
+    if (position !== text.length) {
+        throw new Error('Delta does not match the text');
+    }
+    return parts.join('');
+}
@@ -21,6 +21,7 @@ import {
 import { getQueryEngineId } from 'lib/utils';
 import { convertRawToContentState } from 'lib/richtext/serialize';
 import dataDocSocket from 'lib/data-doc/datadoc-socketio';
+import { applyTextDelta, TextDelta } from 'lib/data-doc/text-delta';
 import {
     IUpdateDataDocPollingAction,
     ThunkResult,
@@ -331,7 +332,20 @@ export function updateDataDocCell(
     context?: string | ContentState,
     meta?: IDataCellMeta
 ): ThunkResult<Promise<void>> {
-    return (dispatch) => {
+    return (dispatch, getState) => {
+        const cell = getState().dataDoc.dataDocCellById[id];
+        if (
+            dataCellSaveManager.getSyncedContext(id) == null &&
+            typeof cell?.context === 'string' &&
+            cell.context_version != null
+        ) {
+            // Deltas of this edit are made on the context before it
+            dataCellSaveManager.setSyncedContext(id, {
+                context: cell.context,
+                version: cell.context_version,
+            });
+        }
+
         dispatch({
             type: '@@dataDoc/UPDATE_DATA_DOC_CELL_DATA',
             payload: {
@@ -342,6 +356,27 @@ export function updateDataDocCell(
             },
         });
 
+        const onRebase = (
+            sentContext: string,
+            synced: { context: string; version: number }
+        ) => {
+            if (
+                getState().dataDoc.dataDocCellById[id]?.context === sentContext
+            ) {
+                dispatch({
+                    type: '@@dataDoc/UPDATE_DATA_DOC_CELL_DATA',
+                    payload: {
+                        cellId: id,
+                        context: synced.context,
+                        contextVersion: synced.version,
+                    },
+                });
+            } else {
+                // Edited since, the next save sends the whole context
+                dataCellSaveManager.setSyncedContext(id, null);
+            }
+        };
+
         const saveCellTimeout = 5000;
         const completeAt = moment().add(saveCellTimeout, 'ms').unix();
         const saveKey = `cell-${id}`;
@@ -351,7 +386,7 @@ export function updateDataDocCell(
 
         onSave(true);
         return dataCellSaveManager
-            .saveDataCell(docId, id, context, meta, saveCellTimeout)
+            .saveDataCell(docId, id, context, meta, saveCellTimeout, onRebase)
             .then(onSave.bind(null, false), (e) => {
                 // Clear the saving status
                 onSave(false);
@@ -360,6 +395,89 @@ export function updateDataDocCell(
     };
 }
 
+export function receiveDataCellContext(
+    cellId: number,
+    context: string | ContentState,
+    meta: IDataCellMeta,
+    contextVersion?: number
+): ThunkResult<void> {
+    return (dispatch) => {
+        if (
+            typeof context === 'string' &&
+            contextVersion != null &&
+            dataCellSaveManager.getSyncedContext(cellId) != null
+        ) {
+            dataCellSaveManager.setSyncedContext(cellId, {
+                context,
+                version: contextVersion,
+            });
+        }
+
+        dispatch({
+            type: '@@dataDoc/UPDATE_DATA_DOC_CELL_DATA',
+            payload: {
+                cellId,
+                context,
+                meta,
+                contextVersion,
+            },
+        });
+    };
+}
+
+export function receiveDataCellPatch(
+    cellId: number,
+    contextVersion: number,
+    delta: TextDelta
+): ThunkResult<Promise<void>> {
+    return async (dispatch, getState) => {
+        const getCell = () => getState().dataDoc.dataDocCellById[cellId];
+        const cell = getCell();
+        if (typeof cell?.context !== 'string') {
+            return;
+        }
+        const synced = dataCellSaveManager.getSyncedContext(cellId) ?? {
+            context: cell.context,
+            version: cell.context_version,
+        };
+        if (synced.context !== cell.context) {
+            // Local edits are not saved yet, their save gets
+            // rebased on the server and returns the merged context
+            return;
+        }
+
+        if (synced.version === contextVersion - 1) {
+            try {
+                dispatch(
+                    receiveDataCellContext(
+                        cellId,
+                        applyTextDelta(synced.context, delta),
+                        null,
+                        contextVersion
+                    )
+                );
+                return;
+            } catch (e) {
+                // Refetch the whole context below
+            }
+        } else if (synced.version != null && synced.version >= contextVersion) {
+            return;
+        }
+
+        const { data } = await DataDocResource.getCellContext(cellId);
+        if (getCell()?.context === cell.context) {
+            dispatch(
+                receiveDataCellContext(
+                    cellId,
+                    data.context,
+                    null,
+                    data.context_version
+                )
+            );
+        }
+    };
+}
+
 export function updateDataDocField(
     docId: number,
     fieldName: string,
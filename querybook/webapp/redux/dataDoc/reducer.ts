@@ -96,6 +96,10 @@ function dataDocCellByIdReducer(
                 if (action.payload.meta != null) {
                     draft[cellId].meta = action.payload.meta;
                 }
+                if (action.payload.contextVersion != null) {
+                    draft[cellId].context_version =
+                        action.payload.contextVersion;
+                }
 
                 return;
             }
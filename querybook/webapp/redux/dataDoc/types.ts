@@ -98,6 +98,7 @@ export interface IUpdateDataDocCellDataAction extends Action {
 
         context?: string | ContentState;
         meta?: IDataCellMeta;
+        contextVersion?: number;
     };
 }
 
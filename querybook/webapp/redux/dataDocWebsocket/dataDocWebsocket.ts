@@ -13,6 +13,8 @@ import {
     receiveDataDoc,
     deserializeCell,
     fetchDataDoc,
+    receiveDataCellContext,
+    receiveDataCellPatch,
 } from 'redux/dataDoc/action';
 
 export function openDataDoc(docId: number): ThunkResult<Promise<any>> {
@@ -69,14 +71,23 @@ export function openDataDoc(docId: number): ThunkResult<Promise<any>> {
                     if (!isSameOrigin) {
                         const cell = deserializeCell(rawDataCell);
 
-                        dispatch({
-                            type: '@@dataDoc/UPDATE_DATA_DOC_CELL_DATA',
-                            payload: {
-                                cellId: cell.id,
-                                context: cell.context,
-                                meta: cell.meta,
-                            },
-                        });
+                        dispatch(
+                            receiveDataCellContext(
+                                cell.id,
+                                cell.context,
+                                cell.meta,
+                                cell.context_version
+                            )
+                        );
+                    }
+                },
+            },
+            patchDataCell: {
+                resolve: (cellId, contextVersion, delta, isSameOrigin) => {
+                    if (!isSameOrigin) {
+                        dispatch(
+                            receiveDataCellPatch(cellId, contextVersion, delta)
+                        );
                     }
                 },
             },
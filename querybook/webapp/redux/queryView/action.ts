@@ -39,13 +39,20 @@ function resetQueryView(): IQueryViewResetAction {
 }
 
 function mapStateToSearch(state: IQueryViewState) {
-    const { filters, orderBy, offset } = state;
+    const { filters, orderBy, queryExecutionIds } = state;
 
     const searchParam = {
         filters,
         orderBy,
         limit: CHUNK_LOAD_SIZE,
-        offset,
+        // The cursor only works for the created_at order
+        ...(orderBy === 'created_at'
+            ? {
+                  cursor: queryExecutionIds.length
+                      ? queryExecutionIds[queryExecutionIds.length - 1]
+                      : null,
+              }
+            : { offset: queryExecutionIds.length }),
     };
 
     return searchParam;
@@ -64,7 +71,6 @@ export function searchQueries(): ThunkResult<Promise<IRawQueryExecution[]>> {
                 return [];
             }
 
-            const { offset } = queryViewState;
             const searchRequest = QueryViewResource.search(
                 state.environment.currentEnvironmentId,
                 mapStateToSearch(queryViewState)
@@ -108,7 +114,6 @@ export function searchQueries(): ThunkResult<Promise<IRawQueryExecution[]>> {
                 payload: {
                     queryExecutionIds,
                     endOfList: count < CHUNK_LOAD_SIZE,
-                    offset: offset + count,
                 },
             });
 
@@ -10,7 +10,6 @@ import { UserAction } from 'redux/user/types';
 const initialSearchState: IQueryViewSearchState = {
     // pagination
     queryExecutionIds: [],
-    offset: 0,
     // Boolean variable to indicate no more fetching is possible
     endOfList: false,
     isLoading: false,
@@ -46,14 +45,13 @@ export default function queryView(
                 return;
             }
             case '@@querySnippets/QUERY_VIEW_SEARCH_DONE': {
-                const { queryExecutionIds, endOfList, offset } = action.payload;
+                const { queryExecutionIds, endOfList } = action.payload;
 
                 for (const id of queryExecutionIds) {
                     if (!draft.queryExecutionIds.includes(id)) {
                         draft.queryExecutionIds.push(id);
                     }
                 }
-                draft.offset = offset;
                 draft.isLoading = false;
                 draft.endOfList = endOfList;
                 return;
@@ -24,7 +24,6 @@ export interface IQueryViewSearchDoneAction extends Action {
     payload: {
         queryExecutionIds: number[];
         endOfList: boolean;
-        offset: number;
     };
 }
 
@@ -78,9 +77,8 @@ export type ThunkResult<R> = ThunkAction<
 >;
 
 export interface IQueryViewSearchState {
-    // pagination
+    // pagination, the next page starts after the last id
     queryExecutionIds: number[];
-    offset: number;
 
     // Boolean variable to indicate no more fetching is possible
     endOfList: boolean;
@@ -12,6 +12,7 @@ import type {
 } from 'const/schedule';
 
 import dataDocSocket from 'lib/data-doc/datadoc-socketio';
+import type { TextDelta } from 'lib/data-doc/text-delta';
 import ds from 'lib/datasource';
 
 export const DataDocResource = {
@@ -77,6 +78,31 @@ export const DataDocResource = {
         return ds.update<IDataCell>(`/data_cell/${cellId}/`, params);
     },
 
+    patchCellContext: (
+        cellId: number,
+        contextVersion: number,
+        delta: TextDelta,
+        sid?: string
+    ) => {
+        const params = { context_version: contextVersion, delta };
+        if (sid != null) {
+            params['sid'] = sid;
+        }
+
+        return ds.update<{
+            id: number;
+            context_version: number;
+            delta: TextDelta;
+            // Only if other deltas were applied since contextVersion
+            context?: string;
+        }>(`/data_cell/${cellId}/delta/`, params);
+    },
+
+    getCellContext: (cellId: number) =>
+        ds.fetch<{ context: string; context_version: number }>(
+            `/data_cell/${cellId}/context/`
+        ),
+
     delete: (docId: number) => ds.delete(`/datadoc/${docId}/`),
 
     favorite: (docId: number) =>
@@ -15,7 +15,11 @@ export const QueryViewResource = {
                 user?: number;
             };
             orderBy?: string;
+            limit?: number;
             offset?: number;
+            // Id of the last query execution received,
+            // only when ordered by created_at
+            cursor?: number;
         }
     ) =>
         ds.fetch<IRawQueryExecution[]>('/query_execution/search/', {
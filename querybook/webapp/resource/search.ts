@@ -2,7 +2,9 @@ import ds from 'lib/datasource';
 import type { ITableSearchResult } from 'redux/dataTableSearch/types';
 import type {
     IDataDocPreview,
+    IQueryExecutionPreview,
     ISearchDataDocParams,
+    ISearchQueryExecutionParams,
     ISearchTableParams,
     ISearchUserParams,
     ITablePreview,
@@ -36,6 +38,17 @@ export const SearchDataDocResource = {
         }>('/search/datadoc/', (params as unknown) as Record<string, unknown>),
 };
 
+export const SearchQueryExecutionResource = {
+    search: (params: ISearchQueryExecutionParams) =>
+        ds.fetch<{
+            results: IQueryExecutionPreview[];
+            count: number;
+        }>(
+            '/search/query_execution/',
+            (params as unknown) as Record<string, unknown>
+        ),
+};
+
 export const SearchUserResource = {
     search: (params: ISearchUserParams) =>
         ds.fetch<IUserSearchResultRow[]>(